@@ -0,0 +1,317 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import sys
+import math
+import json
+import time
+import platform
+import subprocess
+from typing import Optional, Callable, List, Dict
+
+from textprocessor.TextProcessor import TextProcessor, NumProcess
+from textprocessor.Tokenizer import TokenizerOption
+from textprocessor.Normalizer import NormalizerOption
+from indexer.Indexer import Indexer, TopTierSize
+from querymanager.QueryManager import QueryManager
+from .CorpusGenerator import CorpusGenerator
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+TextFileDirName = 'text'
+IndexDirName = 'index'
+IntermediateIndexDirName = 'intermediate_index'
+
+IndexFileName = 'index.pickle'
+InvertedIndexFileName = 'inverted_index.pickle'
+DocIdIndexFileName = 'docId_index.pickle'
+DocIdStoreFileName = 'docId_store.bin'
+TermDictionaryFileName = 'term_dictionary.txt'
+
+TieredIndexFileName = 'tiered_index.pickle'
+ImpactOrderedIndexFileName = 'impact_ordered_index.pickle'
+
+PercentileList = [ 50, 95, 99 ]
+
+#   Number of top results compared between exact and tiered query
+RecallResultNum = 10
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def computePercentile( valueList : List[float], percent : float ) -> float:
+    ''' This function computes nearest-rank percentile of given values
+    '''
+
+    assert( len(valueList) > 0 )
+
+    sortedValueList = sorted( valueList )
+
+    rank = max( 1, int(math.ceil( percent/100*len(sortedValueList) )) )
+
+    return sortedValueList[ rank-1 ]
+
+def measureLatency( queryFunction : Callable, queryLog : List[str], numRepeat : int ) -> Dict:
+    ''' This function replays query log and summarizes latency in
+        milliseconds
+    '''
+
+    latencyList = list()
+
+    for _ in range( numRepeat ):
+        for queryStr in queryLog:
+            startTime = time.perf_counter()
+            queryFunction( queryStr )
+            latencyList.append( ( time.perf_counter() - startTime )*1000 )
+
+    latencyDict = { 'numQuery': len(latencyList),
+                    'meanMilliseconds': sum(latencyList)/len(latencyList) }
+    latencyDict.update( { 'p{}Milliseconds'.format( percent ): computePercentile( latencyList, percent ) for percent in PercentileList } )
+
+    return latencyDict
+
+def computeRecall( queryManager : QueryManager, queryLog : List[str], queryFunction : Callable ) -> float:
+    ''' This function computes fraction of top exact query results with
+        nonzero score which are also returned by given query function
+    '''
+
+    numRelevant = 0
+    numRetrieved = 0
+
+    for queryStr in queryLog:
+        exactDocIdSet = { docId for docId, score in queryManager.query( queryStr )[:RecallResultNum] if score > 0 }
+        docIdSet = { docId for docId, _ in queryFunction( queryStr ) }
+        numRelevant += len(exactDocIdSet)
+        numRetrieved += len(exactDocIdSet & docIdSet)
+
+    return numRetrieved/numRelevant if numRelevant > 0 else 1.0
+
+def getDirSize( dirPath : str ) -> int:
+    ''' This function sums size of all files under given directory
+    '''
+
+    return sum( os.path.getsize( os.path.join( rootDir, fileName ) ) for rootDir, _, fileNameList in os.walk( dirPath ) for fileName in fileNameList )
+
+def getCommitId() -> Optional[str]:
+    ''' This function gets current git commit id of the repository
+        or None if it is unavailable
+    '''
+
+    try:
+        return subprocess.check_output( [ 'git', 'rev-parse', 'HEAD' ], cwd=os.path.dirname( os.path.abspath( __file__ ) ), stderr=subprocess.DEVNULL ).decode().strip()
+    except ( OSError, subprocess.CalledProcessError ):
+        return None
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class Benchmark(object):
+
+    def __init__( self, workDir : str, corpusGenerator : CorpusGenerator,
+                        numQuery : Optional[int] = 200,
+                        numQueryRepeat : Optional[int] = 3,
+                        numProcess : Optional[int] = NumProcess,
+                        topTierSize : Optional[int] = TopTierSize,
+                        pruneWeightThreshold : Optional[float] = 0.0,
+                        postingBudget : Optional[int] = None,
+                        tokenizerOption : Optional[int] = TokenizerOption.REMOVE_STOP_WORDS,
+                        normalizerOption : Optional[int] = NormalizerOption.REMOVE_PUNCTUATION | NormalizerOption.CASE_FOLDING,
+                        isBytesAnalyzer : Optional[bool] = False ):
+
+        if not os.path.isdir( workDir ):
+            raise ValueError( 'Benchmark - No work directory at {}.'.format( workDir ) )
+
+        self.workDir = workDir
+        self.corpusGenerator = corpusGenerator
+        self.numQuery = numQuery
+        self.numQueryRepeat = numQueryRepeat
+        self.numProcess = numProcess
+        self.topTierSize = topTierSize
+        self.pruneWeightThreshold = pruneWeightThreshold
+        self.postingBudget = postingBudget
+        self.tokenizerOption = tokenizerOption
+        self.normalizerOption = normalizerOption
+        self.isBytesAnalyzer = isBytesAnalyzer
+
+        self.textFileDir = os.path.join( workDir, TextFileDirName )
+        self.indexDir = os.path.join( workDir, IndexDirName )
+        self.intermediateIndexDir = os.path.join( workDir, IntermediateIndexDirName )
+
+        self.result = dict()
+
+    def prepareWorkDir( self ):
+        ''' This function creates benchmark sub directories and writes
+            synthetic corpus if it has not been written yet
+        '''
+
+        for dirPath in ( self.textFileDir, self.indexDir, self.intermediateIndexDir ):
+            os.makedirs( dirPath, exist_ok=True )
+
+        #   Remove indices from previous run
+        for dirPath in ( self.indexDir, self.intermediateIndexDir ):
+            for fileName in os.listdir( dirPath ):
+                os.remove( os.path.join( dirPath, fileName ) )
+
+        #   Reuse corpus from previous run
+        if len(os.listdir( self.textFileDir )) == self.corpusGenerator.numDoc:
+            return
+
+        self.corpusGenerator.writeCorpus( self.textFileDir )
+
+    def benchmarkIndexing( self ) -> List[int]:
+        ''' This function measures intermediate indexing throughput
+        '''
+
+        startTime = time.perf_counter()
+
+        textProcessor = TextProcessor( self.textFileDir, tokenizerOption=self.tokenizerOption, normalizerOption=self.normalizerOption, isBytesAnalyzer=self.isBytesAnalyzer )
+        textProcessor.writeDocIdIndex( self.indexDir, DocIdIndexFileName )
+        textProcessor.writeDocIdStore( self.indexDir, DocIdStoreFileName )
+        textProcessor.writeIntermediateIndex( self.intermediateIndexDir, numProcess=self.numProcess, isQuiet=True )
+
+        deltaTime = time.perf_counter() - startTime
+
+        numDoc = len( textProcessor.docIdToTextFileNameTupleList )
+        corpusSize = getDirSize( self.textFileDir )
+
+        self.result['indexing'] = { 'seconds': deltaTime,
+                                    'numDoc': numDoc,
+                                    'corpusBytes': corpusSize,
+                                    'docsPerSecond': numDoc/deltaTime,
+                                    'bytesPerSecond': corpusSize/deltaTime }
+
+        return [ docId for docId, _ in textProcessor.docIdToTextFileNameTupleList ]
+
+    def benchmarkMerge( self, docIdList : List[int] ):
+        ''' This function measures merging intermediate indices into final
+            index and inverted index, then writing them
+        '''
+
+        startTime = time.perf_counter()
+
+        indexer = Indexer()
+        indexer.readFromIntermediateIndexDir( self.intermediateIndexDir )
+        indexer.convertIndexToTfIdf( len(docIdList) )
+
+        mergeTime = time.perf_counter() - startTime
+
+        indexer.writeTermDictionary( self.indexDir, TermDictionaryFileName )
+        indexer.writeIndex( self.indexDir, IndexFileName )
+        indexer.constructInvertedIndexTfIdf( docIdList )
+        indexer.normalizeInvertedIndexTfIdf()
+        indexer.writeInvertedIndex( self.indexDir, InvertedIndexFileName )
+
+        indexer.constructTieredIndex( self.topTierSize, self.pruneWeightThreshold )
+        indexer.writeTieredIndex( self.indexDir, TieredIndexFileName )
+
+        indexer.constructImpactOrderedIndex()
+        indexer.writeImpactOrderedIndex( self.indexDir, ImpactOrderedIndexFileName )
+
+        self.result['merge'] = { 'seconds': mergeTime,
+                                    'totalSeconds': time.perf_counter() - startTime,
+                                    'numTerm': len(indexer.index) }
+
+        self.result['indexSize'] = { 'bytes': getDirSize( self.indexDir ) }
+
+    def benchmarkLoad( self ) -> Indexer:
+        ''' This function measures loading searcher side index
+        '''
+
+        startTime = time.perf_counter()
+
+        indexer = Indexer()
+        indexer.readFromDocIdStoreDir( self.indexDir, DocIdStoreFileName )
+        indexer.readFromInvertedIndexDir( self.indexDir, InvertedIndexFileName )
+        indexer.readFromTermDictionaryDir( self.indexDir, TermDictionaryFileName )
+
+        self.result['load'] = { 'seconds': time.perf_counter() - startTime }
+
+        return indexer
+
+    def benchmarkQuery( self, indexer : Indexer ):
+        ''' This function measures query latency percentiles over fixed
+            query log
+        '''
+
+        queryManager = QueryManager( indexer, self.tokenizerOption, self.normalizerOption )
+
+        queryLog = self.corpusGenerator.generateQueryLog( self.numQuery )
+
+        self.result['query'] = measureLatency( queryManager.query, queryLog, self.numQueryRepeat )
+
+    def benchmarkTieredQuery( self, indexer : Indexer ):
+        ''' This function measures tiered top result latency percentiles
+            and its recall against exact query
+        '''
+
+        indexer.readFromTieredIndexDir( self.indexDir, TieredIndexFileName )
+
+        queryManager = QueryManager( indexer, self.tokenizerOption, self.normalizerOption )
+
+        queryLog = self.corpusGenerator.generateQueryLog( self.numQuery )
+
+        self.result['tieredQuery'] = measureLatency( lambda queryStr: queryManager.queryTiered( queryStr, RecallResultNum ), queryLog, self.numQueryRepeat )
+
+        self.result['tieredQuery']['recallAt{}'.format( RecallResultNum )] = computeRecall( queryManager, queryLog, lambda queryStr: queryManager.queryTiered( queryStr, RecallResultNum ) )
+
+    def benchmarkImpactOrderedQuery( self, indexer : Indexer ):
+        ''' This function measures budgeted score-at-a-time latency
+            percentiles, its recall against exact query and fraction of
+            exact answers
+        '''
+
+        indexer.readFromImpactOrderedIndexDir( self.indexDir, ImpactOrderedIndexFileName )
+
+        queryManager = QueryManager( indexer, self.tokenizerOption, self.normalizerOption )
+
+        queryLog = self.corpusGenerator.generateQueryLog( self.numQuery )
+
+        queryFunction = lambda queryStr: queryManager.queryImpactOrdered( queryStr, RecallResultNum, postingBudget=self.postingBudget )
+
+        self.result['impactOrderedQuery'] = measureLatency( queryFunction, queryLog, self.numQueryRepeat )
+        self.result['impactOrderedQuery']['recallAt{}'.format( RecallResultNum )] = computeRecall( queryManager, queryLog, lambda queryStr: queryFunction( queryStr )[0] )
+        self.result['impactOrderedQuery']['exactFraction'] = sum( queryFunction( queryStr )[1] for queryStr in queryLog )/len(queryLog)
+
+    def run( self ) -> Dict:
+        ''' This function runs all benchmark stages and returns the result
+        '''
+
+        self.result = { 'commitId': getCommitId(),
+                        'python': sys.version.split()[0],
+                        'platform': platform.platform(),
+                        'config': { 'numDoc': self.corpusGenerator.numDoc,
+                                    'vocabularySize': self.corpusGenerator.vocabularySize,
+                                    'meanDocSize': self.corpusGenerator.meanDocSize,
+                                    'docSizeDistribution': self.corpusGenerator.docSizeDistribution,
+                                    'zipfExponent': self.corpusGenerator.zipfExponent,
+                                    'seed': self.corpusGenerator.seed,
+                                    'numQuery': self.numQuery,
+                                    'numQueryRepeat': self.numQueryRepeat,
+                                    'numProcess': self.numProcess,
+                                    'topTierSize': self.topTierSize,
+                                    'pruneWeightThreshold': self.pruneWeightThreshold,
+                                    'postingBudget': self.postingBudget } }
+
+        self.prepareWorkDir()
+
+        docIdList = self.benchmarkIndexing()
+        self.benchmarkMerge( docIdList )
+        indexer = self.benchmarkLoad()
+        self.benchmarkQuery( indexer )
+        self.benchmarkTieredQuery( indexer )
+        self.benchmarkImpactOrderedQuery( indexer )
+
+        return self.result
+
+    def writeResult( self, resultFilePath : str ):
+        ''' This function writes benchmark result as json file
+        '''
+
+        with open( resultFilePath, 'w', encoding='utf-8' ) as resultFile:
+            json.dump( self.result, resultFile, indent=4, sort_keys=True )
@@ -0,0 +1,119 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import math
+import random
+import itertools
+from typing import Optional, List
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+SyllableList = [ 'ka', 'lo', 'mi', 're', 'su', 'ta', 'ne', 'vo', 'ri', 'da',
+                    'po', 'li', 'ze', 'mu', 'ha', 'ge', 'fi', 'no', 'be', 'sa' ]
+
+DocFileNameFormat = 'doc_{id:06d}.txt'
+
+NumWordPerLine = 12
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def generateVocabulary( vocabularySize : int ) -> List[str]:
+    ''' This function generates deterministic vocabulary of distinct words
+        made of syllables, shortest words first
+    '''
+
+    vocabularyList = list()
+
+    for numSyllable in itertools.count(1):
+        for syllableTuple in itertools.product( SyllableList, repeat=numSyllable ):
+            if len(vocabularyList) == vocabularySize:
+                return vocabularyList
+            vocabularyList.append( ''.join(syllableTuple) )
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class DocSizeDistribution(object):
+    UNIFORM = 'uniform'
+    LOGNORMAL = 'lognormal'
+
+class CorpusGenerator(object):
+
+    def __init__( self, numDoc : int,
+                        vocabularySize : Optional[int] = 50000,
+                        meanDocSize : Optional[int] = 2000,
+                        docSizeDistribution : Optional[str] = DocSizeDistribution.LOGNORMAL,
+                        zipfExponent : Optional[float] = 1.0,
+                        seed : Optional[int] = 0 ):
+
+        if numDoc < 1:
+            raise ValueError( 'CorpusGenerator - Number of documents must be positive, got {}.'.format( numDoc ) )
+        if docSizeDistribution not in ( DocSizeDistribution.UNIFORM, DocSizeDistribution.LOGNORMAL ):
+            raise ValueError( 'CorpusGenerator - Unknown document size distribution {!r}.'.format( docSizeDistribution ) )
+
+        self.numDoc = numDoc
+        self.vocabularySize = vocabularySize
+        self.meanDocSize = meanDocSize
+        self.docSizeDistribution = docSizeDistribution
+        self.zipfExponent = zipfExponent
+        self.seed = seed
+
+        #   Construct vocabulary and its cumulative zipfian weights
+        self.vocabularyList = generateVocabulary( vocabularySize )
+        self.cumWeightList = list(itertools.accumulate( [ 1/(rank**zipfExponent) for rank in range( 1, vocabularySize+1 ) ] ))
+
+    def sampleDocSize( self, rng : random.Random ) -> int:
+        ''' This function samples number of words of a document
+        '''
+
+        if self.docSizeDistribution == DocSizeDistribution.UNIFORM:
+            return rng.randint( 1, 2*self.meanDocSize )
+
+        #   Lognormal with given mean and unit shape
+        sigma = 1.0
+        mu = math.log( self.meanDocSize ) - sigma**2/2
+
+        return max( 1, int(rng.lognormvariate( mu, sigma )) )
+
+    def sampleWordList( self, rng : random.Random, numWord : int ) -> List[str]:
+        ''' This function samples words from zipfian vocabulary
+        '''
+
+        return rng.choices( self.vocabularyList, cum_weights=self.cumWeightList, k=numWord )
+
+    def writeCorpus( self, textFileDir : str ):
+        ''' This function writes all generated documents into given
+            text file directory
+        '''
+
+        #   Check if text file directory exists
+        if not os.path.isdir( textFileDir ):
+            raise ValueError( 'writeCorpus() - No directory at {}.'.format( textFileDir ) )
+
+        rng = random.Random( self.seed )
+
+        for docNum in range( self.numDoc ):
+
+            #   Sample document words
+            wordList = self.sampleWordList( rng, self.sampleDocSize( rng ) )
+
+            #   Write document with a fixed number of words per line
+            with open( os.path.join( textFileDir, DocFileNameFormat.format( id=docNum ) ), 'w', encoding='utf-8' ) as textFile:
+                for i in range( 0, len(wordList), NumWordPerLine ):
+                    textFile.write( ' '.join( wordList[ i:i+NumWordPerLine ] ) + '\n' )
+
+    def generateQueryLog( self, numQuery : int, maxNumQueryTerm : Optional[int] = 3 ) -> List[str]:
+        ''' This function generates a fixed query log, independent of the
+            corpus random stream
+        '''
+
+        rng = random.Random( self.seed + 1 )
+
+        return [ ' '.join( self.sampleWordList( rng, rng.randint( 1, maxNumQueryTerm ) ) ) for _ in range( numQuery ) ]
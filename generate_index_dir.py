@@ -4,14 +4,21 @@
 #   IMPORT
 ##########################################################################
 
+import os
 import sys
 from optparse import OptionParser
 
-from textprocessor.TextProcessor import TextProcessor
+from textprocessor.TextProcessor import TextProcessor, WorkerMemoryBudget
 from textprocessor.Tokenizer import TokenizerOption
 from textprocessor.Normalizer import NormalizerOption
+from textprocessor.BytesAnalyzer import DecodeErrorPolicy, DecodeErrorPolicyList
+from textprocessor.NearDuplicateDetector import NearDuplicateThreshold
 
-from indexer.Indexer import Indexer
+from indexer.Indexer import Indexer, TopTierSize
+from indexer.DocIdReorderer import ReorderMethodList
+from indexer.IndexManifest import IndexManifest, IndexFileKind, createStagingDir, publishGeneration, computeDictChecksum
+from indexer.IndexJournal import IndexJournal
+from metrics.Metrics import metrics
 
 ##########################################################################
 #   GLOBAL
@@ -26,7 +33,16 @@ IndexDir = 'index'
 IndexFileName = 'index.pickle'
 InvertedIndexFileName = 'inverted_index.pickle'
 DocIdIndexFileName = 'docId_index.pickle'
+DocIdStoreFileName = 'docId_store.bin'
+ForwardIndexFileName = 'forward_index.bin'
+TermDictionaryFileName = 'term_dictionary.txt'
+VocabularyFilterFileName = 'vocabulary_filter.bin'
+TermFreqIndexFileName = 'term_freq_index.txt'
+TieredIndexFileName = 'tiered_index.pickle'
+ImpactOrderedIndexFileName = 'impact_ordered_index.pickle'
+SimilarityIndexFileName = 'similarity_index.pickle'
 IntermediateIndexDir = 'intermediate_index'
+BuildJournalFileName = 'build_journal.jsonl'
 
 ##########################################################################
 #   HELPER
@@ -49,6 +65,99 @@ def main():
                         dest='textDir',
                         default=TextFileDir,
                         help='text file directory (default = {!r})'.format(TextFileDir) )
+    parser.add_option( '--tiered',
+                        action='store_true',
+                        dest='isTiered',
+                        default=False,
+                        help='build impact tiered index for low latency top results' )
+    parser.add_option( '--topTierSize',
+                        action='store',
+                        type='int',
+                        dest='topTierSize',
+                        default=TopTierSize,
+                        help='number of highest weighted postings per term in top tier (default = {!r})'.format(TopTierSize) )
+    parser.add_option( '--pruneThreshold',
+                        action='store',
+                        type='float',
+                        dest='pruneThreshold',
+                        default=0.0,
+                        help='prune tiered postings whose normalized weight is not above threshold (default = 0.0)' )
+    parser.add_option( '--impactOrdered',
+                        action='store_true',
+                        dest='isImpactOrdered',
+                        default=False,
+                        help='build quantized impact ordered index for budgeted score-at-a-time queries' )
+    parser.add_option( '--similarity',
+                        action='store_true',
+                        dest='isSimilarity',
+                        default=False,
+                        help='build document sketches for finding similar documents' )
+    parser.add_option( '--memoryBudget',
+                        action='store',
+                        type='int',
+                        dest='memoryBudget',
+                        default=WorkerMemoryBudget >> 20,
+                        help='megabytes of postings each indexing worker holds before spilling a sorted run (default = {!r})'.format(WorkerMemoryBudget >> 20) )
+    parser.add_option( '--snippet',
+                        action='store_true',
+                        dest='isSnippet',
+                        default=False,
+                        help='build forward index of passages for result snippets' )
+    parser.add_option( '--dedup',
+                        action='store_true',
+                        dest='isDedup',
+                        default=False,
+                        help='index one canonical document of each cluster of near duplicates, e.g. editions of a book' )
+    parser.add_option( '--dedupThreshold',
+                        action='store',
+                        type='float',
+                        dest='dedupThreshold',
+                        default=NearDuplicateThreshold,
+                        help='estimated Jaccard similarity of term sets from which documents are near duplicates (default = {!r})'.format(NearDuplicateThreshold) )
+    parser.add_option( '--reorder',
+                        action='store',
+                        type='choice',
+                        choices=ReorderMethodList,
+                        dest='reorderMethod',
+                        default=None,
+                        help='reassign docIds so documents sharing terms are close, by one of {} (default = keep scan order)'.format(', '.join(ReorderMethodList)) )
+    parser.add_option( '--bytesAnalyzer',
+                        action='store_true',
+                        dest='isBytesAnalyzer',
+                        default=False,
+                        help='tokenize and normalize text as bytes, decoding non-ascii tokens only' )
+    parser.add_option( '--decodeErrors',
+                        action='store',
+                        type='choice',
+                        choices=DecodeErrorPolicyList,
+                        dest='decodeErrorPolicy',
+                        default=DecodeErrorPolicy.REPLACE,
+                        help='policy for mis-encoded tokens with bytes analyzer, one of {} (default = {!r})'.format(', '.join(DecodeErrorPolicyList), DecodeErrorPolicy.REPLACE) )
+    parser.add_option( '--resume',
+                        action='store_true',
+                        dest='isResume',
+                        default=False,
+                        help='resume an interrupted build of the same corpus and options, skipping finished documents and stages' )
+    parser.add_option( '--quiet',
+                        action='store_true',
+                        dest='isQuiet',
+                        default=False,
+                        help='do not render indexing progress' )
+    parser.add_option( '--metrics',
+                        action='store',
+                        dest='metricsFilePath',
+                        default=None,
+                        help='collect stage metrics into given file, prometheus text if it ends with .prom or json otherwise' )
+    parser.add_option( '--profile',
+                        action='store',
+                        dest='profileFilePath',
+                        default=None,
+                        help='capture cProfile statistics into given file' )
+    parser.add_option( '--traceMemory',
+                        action='store_true',
+                        dest='isTraceMemory',
+                        default=False,
+                        help='measure memory high-water marks with tracemalloc' )
 
     (options, args) = parser.parse_args()
 
@@ -59,16 +168,80 @@ def main():
     #   Parse options
     textDir = options.textDir
 
+    #   Enable metrics and profiling capture
+    if options.metricsFilePath is not None or options.profileFilePath is not None:
+        metrics.enable( isProfile=options.profileFilePath is not None, isTraceMemory=options.isTraceMemory )
+
     #   Construct text processor
     textProcessor = TextProcessor( textDir,
                                     tokenizerOption=TokenizerOption.REMOVE_STOP_WORDS,
-                                    normalizerOption=NormalizerOption.REMOVE_PUNCTUATION | NormalizerOption.CASE_FOLDING )
+                                    normalizerOption=NormalizerOption.REMOVE_PUNCTUATION | NormalizerOption.CASE_FOLDING,
+                                    isBytesAnalyzer=options.isBytesAnalyzer,
+                                    decodeErrorPolicy=options.decodeErrorPolicy )
+
+    #   Hash corpus in scan order, before docIds are reordered
+    fileListHash = textProcessor.getFileListHash()
+
+    #   Initialize index file name dictionary of manifest
+    fileNameDict = { IndexFileKind.INDEX: IndexFileName,
+                        IndexFileKind.INVERTED_INDEX: InvertedIndexFileName,
+                        IndexFileKind.DOC_ID_INDEX: DocIdIndexFileName,
+                        IndexFileKind.DOC_ID_STORE: DocIdStoreFileName,
+                        IndexFileKind.TERM_DICTIONARY: TermDictionaryFileName,
+                        IndexFileKind.VOCABULARY_FILTER: VocabularyFilterFileName,
+                        IndexFileKind.TERM_FREQ_INDEX: TermFreqIndexFileName }
+
+    #   Build new index generation aside from the published one
+    generationId, stagingDir = createStagingDir( IndexDir, isResume=options.isResume )
+
+    #   Journal finished stages, a resumed build of the same corpus and
+    #   options reads their files back instead of redoing them
+    buildJournal = IndexJournal( os.path.join( stagingDir, BuildJournalFileName ),
+                                    computeDictChecksum( { 'fileListHash': fileListHash,
+                                                            'tokenizerOption': int(textProcessor.tokenizerOption),
+                                                            'normalizerOption': int(textProcessor.normalizerOption),
+                                                            'isSnippet': options.isSnippet,
+                                                            'isTiered': options.isTiered,
+                                                            'topTierSize': options.topTierSize,
+                                                            'pruneThreshold': options.pruneThreshold,
+                                                            'isImpactOrdered': options.isImpactOrdered,
+                                                            'isSimilarity': options.isSimilarity,
+                                                            'isDedup': options.isDedup,
+                                                            'dedupThreshold': options.dedupThreshold,
+                                                            'reorderMethod': options.reorderMethod } ) )
+    stageToEntryDict = { entry['stage']: entry for entry in buildJournal.open( isResume=options.isResume ) }
+
+    if len(stageToEntryDict) > 0:
+        print('generate_index_dir - Resume after stages {}.'.format(', '.join(stageToEntryDict.keys())))
+
+    if 'docId' not in stageToEntryDict:
+
+        #   Write docId index
+        textProcessor.writeDocIdIndex( stagingDir, DocIdIndexFileName )
+        textProcessor.writeDocIdStore( stagingDir, DocIdStoreFileName )
+        buildJournal.append( { 'stage': 'docId' } )
+
+    #   Intermediate runs are only needed by stages left to do
+    if 'index' not in stageToEntryDict or ( options.isSnippet and 'forwardIndex' not in stageToEntryDict ):
 
-    #   Write docId index
-    textProcessor.writeDocIdIndex( IndexDir, DocIdIndexFileName )
+        #   Construct intermediate index
+        textProcessor.writeIntermediateIndex( IntermediateIndexDir, isQuiet=options.isQuiet, isForwardIndex=options.isSnippet, memoryBudget=options.memoryBudget << 20, isResume=options.isResume, isMinHash=options.isDedup )
 
-    #   Construct intermediate index
-    textProcessor.writeIntermediateIndex( IntermediateIndexDir )
+    #   Map near duplicates to canonical documents, they get no postings
+    duplicateDict = dict()
+
+    if options.isDedup:
+
+        if 'dedup' in stageToEntryDict:
+            duplicateDict = { int(docId): canonicalDocId for docId, canonicalDocId in stageToEntryDict['dedup']['duplicateDict'].items() }
+        else:
+            duplicateDict = textProcessor.findNearDuplicateDict( options.dedupThreshold )
+            buildJournal.append( { 'stage': 'dedup', 'duplicateDict': duplicateDict } )
+
+        print('generate_index_dir - Near duplicates: {} documents left out for {} canonical ones.'.format(len(duplicateDict), len(set(duplicateDict.values()))))
+
+    #   Intermediate index keeps docIds in scan order
+    excludedDocIdSet = set( duplicateDict.keys() )
 
     #   Get docId list
     docIdList = [ x[0] for x in textProcessor.docIdToTextFileNameTupleList ]
@@ -79,23 +252,169 @@ def main():
     #   Construct indexer
     indexer = Indexer()
 
-    #   Read intermediate index
-    indexer.readFromIntermediateIndexDir( IntermediateIndexDir )
+    if options.reorderMethod is not None:
+
+        if 'reorder' in stageToEntryDict:
+            docIdOrder = stageToEntryDict['reorder']['docIdOrder']
+            reorderStatDict = stageToEntryDict['reorder']['statDict']
+
+        else:
+
+            #   Merge intermediate index and reorder its postings
+            indexer.readFromIntermediateIndexDir( IntermediateIndexDir, excludedDocIdSet=excludedDocIdSet )
+            docIdOrder, reorderStatDict = indexer.reorderDocId( numDoc, options.reorderMethod )
+
+        #   Rename documents by new docIds
+        textProcessor.reorderDocId( docIdOrder )
+        newDocIdDict = { docId: newDocId for newDocId, docId in enumerate( docIdOrder ) }
+        duplicateDict = { newDocIdDict[docId]: newDocIdDict[canonicalDocId] for docId, canonicalDocId in duplicateDict.items() }
+
+        if 'reorder' not in stageToEntryDict:
+
+            #   Rewrite docId index in new order
+            textProcessor.writeDocIdIndex( stagingDir, DocIdIndexFileName )
+            textProcessor.writeDocIdStore( stagingDir, DocIdStoreFileName )
+            buildJournal.append( { 'stage': 'reorder', 'docIdOrder': docIdOrder, 'statDict': reorderStatDict } )
+
+        print('generate_index_dir - DocId reordering: variable byte postings {compressedByteSize} -> {reorderedCompressedByteSize} bytes, Elias gamma postings {gammaByteSize} -> {reorderedGammaByteSize} bytes, {numIntersection} intersections {intersectionTime:.3f} -> {reorderedIntersectionTime:.3f} seconds.'.format(**reorderStatDict))
+
+    if options.isSnippet:
+
+        if 'forwardIndex' not in stageToEntryDict:
+
+            #   Write forward index collected along with intermediate index
+            textProcessor.writeForwardIndex( stagingDir, ForwardIndexFileName )
+            buildJournal.append( { 'stage': 'forwardIndex' } )
+
+        fileNameDict[ IndexFileKind.FORWARD_INDEX ] = ForwardIndexFileName
+
+    if 'index' in stageToEntryDict:
+
+        #   Read merged index back
+        indexer.readFromTermDictionaryDir( stagingDir, TermDictionaryFileName )
+        indexer.readFromIndexDir( stagingDir, IndexFileName )
+
+    else:
+
+        if indexer.index is None:
+
+            #   Read intermediate index
+            indexer.readFromIntermediateIndexDir( IntermediateIndexDir, excludedDocIdSet=excludedDocIdSet )
+
+            if options.reorderMethod is not None:
+                indexer.remapDocId( docIdOrder )
+
+        #   Write term dictionary
+        indexer.writeTermDictionary( stagingDir, TermDictionaryFileName )
+        indexer.writeVocabularyFilter( stagingDir, VocabularyFilterFileName )
+
+        #   Keep raw term frequencies as text posting file, so the index
+        #   can be merged with others exactly and streamed while merging
+        indexer.writeIndex( stagingDir, TermFreqIndexFileName, isUsePickle=False )
+
+        #   Convert index to tf-idf weighted
+        indexer.convertIndexToTfIdf( numDoc - len(duplicateDict) )
+
+        #   Write to file
+        indexer.writeIndex( stagingDir, IndexFileName )
+        buildJournal.append( { 'stage': 'index' } )
+
+    if 'invertedIndex' in stageToEntryDict:
+
+        #   Read normalized inverted index back
+        indexer.readFromInvertedIndexDir( stagingDir, InvertedIndexFileName )
+
+    else:
+
+        #   Construct inverted index
+        indexer.constructInvertedIndexTfIdf( docIdList )
+
+        #   Normalize inverted index
+        indexer.normalizeInvertedIndexTfIdf()
+
+        #   Write to file
+        indexer.writeInvertedIndex( stagingDir, InvertedIndexFileName )
+        buildJournal.append( { 'stage': 'invertedIndex' } )
+
+    if options.isTiered:
+
+        if 'tieredIndex' in stageToEntryDict:
+            tieredIndexStatDict = stageToEntryDict['tieredIndex']['statDict']
+
+        else:
+
+            #   Construct tiered index
+            tieredIndexStatDict = indexer.constructTieredIndex( options.topTierSize, options.pruneThreshold )
+
+            #   Write to file
+            indexer.writeTieredIndex( stagingDir, TieredIndexFileName )
+            buildJournal.append( { 'stage': 'tieredIndex', 'statDict': tieredIndexStatDict } )
+
+        fileNameDict[ IndexFileKind.TIERED_INDEX ] = TieredIndexFileName
+
+        print('generate_index_dir - Tiered index: {numTopTierPosting} top tier, {numTailPosting} tail and {numPrunedPosting} pruned of {numPosting} postings.'.format(**tieredIndexStatDict))
+
+    if options.isImpactOrdered:
+
+        if 'impactOrderedIndex' in stageToEntryDict:
+            impactOrderedIndexStatDict = stageToEntryDict['impactOrderedIndex']['statDict']
+
+        else:
+
+            #   Construct impact ordered index
+            impactOrderedIndexStatDict = indexer.constructImpactOrderedIndex()
+
+            #   Write to file
+            indexer.writeImpactOrderedIndex( stagingDir, ImpactOrderedIndexFileName )
+            buildJournal.append( { 'stage': 'impactOrderedIndex', 'statDict': impactOrderedIndexStatDict } )
+
+        fileNameDict[ IndexFileKind.IMPACT_ORDERED_INDEX ] = ImpactOrderedIndexFileName
+
+        print('generate_index_dir - Impact ordered index: {numImpactPosting} postings in {numImpactSegment} impact segments.'.format(**impactOrderedIndexStatDict))
+
+    if options.isSimilarity:
+
+        if 'similarityIndex' in stageToEntryDict:
+            similarityIndexStatDict = stageToEntryDict['similarityIndex']['statDict']
+
+        else:
+
+            #   Construct similarity index
+            similarityIndexStatDict = indexer.constructSimilarityIndex()
+
+            #   Write to file
+            indexer.writeSimilarityIndex( stagingDir, SimilarityIndexFileName )
+            buildJournal.append( { 'stage': 'similarityIndex', 'statDict': similarityIndexStatDict } )
+
+        fileNameDict[ IndexFileKind.SIMILARITY_INDEX ] = SimilarityIndexFileName
 
-    #   Convert index to tf-idf weighted
-    indexer.convertIndexToTfIdf( numDoc )
+        print('generate_index_dir - Similarity index: {numSketch} document sketches in {numBucket} buckets.'.format(**similarityIndexStatDict))
 
-    #   Write to file
-    indexer.writeIndex( IndexDir, IndexFileName )
+    #   Collect corpus statistics
+    statDict = { 'numTerm': len( indexer.termDictionary ),
+                    'numPosting': sum( len(docIdToWeightDict) for docIdToWeightDict in indexer.index.values() ),
+                    'totalByteSize': sum( textProcessor.textFileByteSizeList ),
+                    'numDuplicate': len( duplicateDict ),
+                    'reorderStat': reorderStatDict if options.reorderMethod is not None else None,
+                    'textFileDir': os.path.abspath( textDir ) }
 
-    #   Construct inverted index
-    indexer.constructInvertedIndexTfIdf( docIdList )
+    #   Publish generation atomically, searchers never see a partial index
+    indexManifest = IndexManifest( numDoc,
+                                    textProcessor.tokenizerOption,
+                                    textProcessor.normalizerOption,
+                                    fileListHash,
+                                    fileNameDict,
+                                    statDict=statDict )
+    buildJournal.remove()
+    generationDir = publishGeneration( IndexDir, generationId, indexManifest )
 
-    #   Normalize inverted index
-    indexer.normalizeInvertedIndexTfIdf()
+    print('generate_index_dir - Published index generation at {}.'.format(generationDir))
 
-    #   Write to file
-    indexer.writeInvertedIndex( IndexDir, InvertedIndexFileName )
+    #   Dump metrics and profiling capture
+    if options.profileFilePath is not None:
+        metrics.writeProfile( options.profileFilePath )
+    if options.metricsFilePath is not None:
+        metrics.writeMetrics( options.metricsFilePath )
 
 ##########################################################################
 #   RUN
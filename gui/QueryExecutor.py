@@ -0,0 +1,446 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import time
+import queue
+import traceback
+from collections import OrderedDict
+from typing import Optional, List, Tuple
+
+from PyQt5 import QtCore
+
+from querymanager.TermExpander import MultiCharWildcard
+from querymanager.QueryManager import encodeCursor, OperatorQuoteChar
+from querymanager.SnippetGenerator import SnippetGenerator
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   Milliseconds of typing pause before search-as-you-type query starts
+DebounceInterval = 250
+
+#   Seconds between two partial results sent to the gui
+PartialResultInterval = 0.1
+
+#   Number of final results kept for repeated and prefix queries
+ResultCacheSize = 64
+
+#   Shortest last word which is searched as prefix while typing
+MinPrefixLength = 2
+
+#   Word being typed is searched as backquoted prefix wildcard term
+PrefixTermSuffix = MultiCharWildcard + OperatorQuoteChar
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getSearchAsYouTypeQueryStr( text : str ) -> str:
+    ''' This function treats the word being typed at the end of text as
+        prefix, unless it is too short or has query operator or punctuation
+        characters, which would turn into operators in backquotes or split
+        the prefix
+    '''
+
+    tokenList = text.split()
+
+    #   Nothing is being typed
+    if len(tokenList) == 0 or text[-1].isspace():
+        return text
+
+    lastToken = tokenList[-1]
+
+    if len(lastToken) < MinPrefixLength or not lastToken.isalnum():
+        return text
+
+    return text[:-len(lastToken)] + OperatorQuoteChar + lastToken + PrefixTermSuffix
+
+def resolveResultRowList( indexer, docIdToCosineSimilaryTupleList : List[Tuple[int, float]], snippetList : Optional[List[str]] = None ) -> List[Tuple]:
+    ''' This function resolves shown results into (docId, score, title,
+        byte size, name, snippet) rows while their index generation is held
+    '''
+
+    if snippetList is None:
+        snippetList = [ '' ]*len(docIdToCosineSimilaryTupleList)
+
+    return [ ( docId, score, indexer.docIdStore.getDocTitle( docId ), indexer.docIdStore.getDocByteSize( docId ), indexer.getDocNameById( docId ), snippet ) for ( docId, score ), snippet in zip( docIdToCosineSimilaryTupleList, snippetList ) ]
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class QueryWorker( QtCore.QThread ):
+    ''' This class is a persistent query thread which serves queries
+        submitted by query executor one at a time. A query is abandoned
+        between two chunks once executor generation has moved on. Each
+        query holds the index generation it started on until its result
+        rows are resolved, even if a new one is swapped in meanwhile.
+    '''
+
+    partialSignal = QtCore.pyqtSignal( int, 'PyQt_PyObject' )
+    finalSignal = QtCore.pyqtSignal( int, str, str, int, 'PyQt_PyObject', float, 'PyQt_PyObject' )
+    pageSignal = QtCore.pyqtSignal( int, 'PyQt_PyObject', 'PyQt_PyObject' )
+
+    def __init__(self, queryExecutor):
+        QtCore.QThread.__init__(self)
+        self.queryExecutor = queryExecutor
+        self.requestQueue = queue.Queue()
+
+        #   Snippet generator keeps archives of text files open, it is
+        #   reused until index generation changes
+        self.snippetGenerator = None
+        self.snippetGenerationName = None
+
+    def iterQuery( self, queryStr : str, maxResultNum : int, indexer, similarDocId : Optional[int] = None ):
+        ''' This function yields partial top results of a query, answered
+            at once from tiered index if it is loaded, or documents similar
+            to given docId instead if there is one
+        '''
+
+        queryManager = self.queryExecutor.indexReloader.queryManager
+
+        if similarDocId is not None:
+            yield queryManager.querySimilar( similarDocId, maxResultNum, indexer=indexer )
+        elif indexer.tieredIndex is not None:
+            yield queryManager.queryTiered( queryStr, maxResultNum, indexer=indexer )
+        else:
+            yield from queryManager.iterQueryTopResult( queryStr, maxResultNum, indexer=indexer )
+
+    def generateSnippetList( self, queryStr : str, docIdToCosineSimilaryTupleList : List[Tuple[int, float]], indexGeneration ) -> Optional[List[str]]:
+        ''' This function generates snippets of final results if the index
+            generation has been built with forward index
+        '''
+
+        if indexGeneration.indexer.forwardIndex is None:
+            return None
+
+        if self.snippetGenerationName != indexGeneration.generationName:
+            if self.snippetGenerator is not None:
+                self.snippetGenerator.close()
+            indexManifest = indexGeneration.indexManifest
+            self.snippetGenerator = SnippetGenerator( indexManifest.statDict.get( 'textFileDir' ), indexManifest.normalizerOption )
+            self.snippetGenerationName = indexGeneration.generationName
+
+        snippetGenerator = self.snippetGenerator
+        queryTermSetList = self.queryExecutor.indexReloader.queryManager.getQueryTermSetList( queryStr, indexer=indexGeneration.indexer )
+
+        snippetList = list()
+        for docId, _ in docIdToCosineSimilaryTupleList:
+            snippet = snippetGenerator.generateSnippet( indexGeneration.indexer, docId, queryTermSetList )
+            snippetList.append( snippet if snippet is not None else '' )
+
+        return snippetList
+
+    def run(self):
+
+        while True:
+
+            request = self.requestQueue.get()
+
+            #   Stop request
+            if request is None:
+                if self.snippetGenerator is not None:
+                    self.snippetGenerator.close()
+                return
+
+            generation, queryStr, maxResultNum, similarDocId, cursor = request
+
+            #   Skip query superseded while waiting
+            if generation != self.queryExecutor.generation:
+                continue
+
+            startTime = time.perf_counter()
+            lastPartialTime = startTime
+            isCancelled = False
+            docIdToCosineSimilaryTupleList = list()
+
+            try:
+                with self.queryExecutor.indexReloader.acquire() as indexGeneration:
+
+                    #   Next page continues ranking after cursor at once
+                    if cursor is not None:
+                        docIdToCosineSimilaryTupleList, nextCursor = self.queryExecutor.indexReloader.queryManager.queryPage( queryStr, maxResultNum, cursor, indexer=indexGeneration.indexer )
+                        snippetList = self.generateSnippetList( queryStr, docIdToCosineSimilaryTupleList, indexGeneration )
+
+                        self.pageSignal.emit( generation, resolveResultRowList( indexGeneration.indexer, docIdToCosineSimilaryTupleList, snippetList ), nextCursor )
+                        continue
+
+                    for docIdToCosineSimilaryTupleList in self.iterQuery( queryStr, maxResultNum, indexGeneration.indexer, similarDocId ):
+
+                        if generation != self.queryExecutor.generation:
+                            isCancelled = True
+                            break
+
+                        #   Throttle partial results so the gui is not flooded
+                        currentTime = time.perf_counter()
+                        if currentTime - lastPartialTime >= PartialResultInterval:
+                            self.partialSignal.emit( generation, resolveResultRowList( indexGeneration.indexer, docIdToCosineSimilaryTupleList ) )
+                            lastPartialTime = currentTime
+
+                    if not isCancelled:
+
+                        #   Snippets are generated for shown results only, and
+                        #   there are no query terms to show for similar ones
+                        docIdToCosineSimilaryTupleList = docIdToCosineSimilaryTupleList[:maxResultNum]
+                        snippetList = self.generateSnippetList( queryStr, docIdToCosineSimilaryTupleList, indexGeneration ) if similarDocId is None else None
+
+                        self.finalSignal.emit( generation, indexGeneration.generationName, queryStr, maxResultNum, resolveResultRowList( indexGeneration.indexer, docIdToCosineSimilaryTupleList, snippetList ), time.perf_counter() - startTime, similarDocId )
+
+            except Exception:
+
+                #   Keep worker alive for next query
+                traceback.print_exc()
+
+                #   Executor waits for a requested page until it arrives, so
+                #   a failed page ends paging of the query instead
+                if cursor is not None:
+                    self.pageSignal.emit( generation, list(), None )
+
+class QueryExecutor( QtCore.QObject ):
+    ''' This class runs queries of the gui on a persistent worker thread.
+        Every new query cancels the one in flight, partial top results are
+        streamed as they become available, and typed text is debounced
+        before it is searched. Final results are kept in a small LRU cache
+        per index generation, so a cached shorter prefix is shown right
+        away while typing.
+    '''
+
+    #   Top result rows and whether they are final
+    resultSignal = QtCore.pyqtSignal( 'PyQt_PyObject', bool )
+
+    #   Result rows of the next page
+    pageSignal = QtCore.pyqtSignal( 'PyQt_PyObject' )
+
+    def __init__(self, indexReloader, isDebug=False, debounceInterval=DebounceInterval, resultCacheSize=ResultCacheSize):
+        super(QueryExecutor, self).__init__()
+        self.indexReloader = indexReloader
+        self.isDebug = isDebug
+        self.resultCacheSize = resultCacheSize
+
+        #   NOTE -  Generation is bumped by every new query or cancellation,
+        #           the worker and result slots drop anything older
+        self.generation = 0
+
+        #   Generation name, query string and max result number to result rows
+        self.resultCache = OrderedDict()
+
+        #   Query shown results belong to and cursor of its next page, if any
+        self.pageQueryStr = None
+        self.nextCursor = None
+        self.isPageInFlight = False
+        self.shownDocIdSet = set()
+
+        #   Initialize debounce timer for search-as-you-type
+        self.pendingQuery = None
+        self.debounceTimer = QtCore.QTimer( self )
+        self.debounceTimer.setSingleShot( True )
+        self.debounceTimer.setInterval( debounceInterval )
+        self.debounceTimer.timeout.connect( self.submitPendingQuery )
+
+        #   Start persistent worker
+        self.queryWorker = QueryWorker( self )
+        self.queryWorker.partialSignal.connect( self.receivePartialResult )
+        self.queryWorker.finalSignal.connect( self.receiveFinalResult )
+        self.queryWorker.pageSignal.connect( self.receivePage )
+        self.queryWorker.start()
+
+    def submit( self, queryStr : str, maxResultNum : int ):
+        ''' This function starts query right away, cancelling the one in
+            flight
+        '''
+
+        self.cancel()
+
+        #   Answer repeated query from cache
+        docIdToCosineSimilaryTupleList = self.getCachedResult( queryStr, maxResultNum )
+        if docIdToCosineSimilaryTupleList is not None:
+            self.startPaging( queryStr, maxResultNum, docIdToCosineSimilaryTupleList )
+            self.resultSignal.emit( docIdToCosineSimilaryTupleList, True )
+            return
+
+        self.queryWorker.requestQueue.put( ( self.generation, queryStr, maxResultNum, None, None ) )
+
+    def submitSimilar( self, docId : int, maxResultNum : int ):
+        ''' This function starts finding documents similar to given docId
+            right away, cancelling the query in flight
+        '''
+
+        self.cancel()
+
+        self.queryWorker.requestQueue.put( ( self.generation, '', maxResultNum, docId, None ) )
+
+    def submitNextPage( self, pageSize : int ):
+        ''' This function fetches the page following shown results, unless
+            there is none or it is already being fetched. The shown query is
+            kept, a new query still cancels the page.
+        '''
+
+        if self.nextCursor is None or self.isPageInFlight:
+            return
+
+        self.isPageInFlight = True
+
+        self.queryWorker.requestQueue.put( ( self.generation, self.pageQueryStr, pageSize, None, self.nextCursor ) )
+
+    def hasNextPage( self ) -> bool:
+        ''' This function checks if shown results are followed by another
+            page
+        '''
+
+        return self.nextCursor is not None
+
+    def startPaging( self, queryStr : str, maxResultNum : int, resultRowList : List[Tuple] ):
+        ''' This function points cursor after the last of final results
+            shown for a query, a page short of max result number is the
+            last one as is a result matching no query term
+        '''
+
+        self.pageQueryStr = queryStr
+        self.shownDocIdSet = { resultRow[0] for resultRow in resultRowList }
+
+        if len(resultRowList) >= maxResultNum and resultRowList[-1][1] > 0:
+            self.nextCursor = encodeCursor( resultRowList[-1][1], resultRowList[-1][0] )
+        else:
+            self.nextCursor = None
+
+    def submitDebounced( self, text : str, maxResultNum : int ):
+        ''' This function schedules search-as-you-type query once typing
+            pauses, the word being typed is searched as prefix
+        '''
+
+        #   Query in flight is already stale
+        self.cancel()
+
+        if text.strip() == '':
+            self.resultSignal.emit( list(), True )
+            return
+
+        queryStr = getSearchAsYouTypeQueryStr( text )
+
+        #   Show results of a shorter cached prefix until the query finishes
+        docIdToCosineSimilaryTupleList = self.getCachedPrefixResult( queryStr, maxResultNum )
+        if docIdToCosineSimilaryTupleList is not None:
+            self.resultSignal.emit( docIdToCosineSimilaryTupleList, False )
+
+        self.pendingQuery = ( queryStr, maxResultNum )
+        self.debounceTimer.start()
+
+    def submitPendingQuery( self ):
+        ''' This is callback function of debounce timer
+        '''
+
+        if self.pendingQuery is None:
+            return
+
+        queryStr, maxResultNum = self.pendingQuery
+
+        self.submit( queryStr, maxResultNum )
+
+    def cancel( self ):
+        ''' This function cancels both pending and in flight queries
+        '''
+
+        self.generation += 1
+        self.pendingQuery = None
+        self.debounceTimer.stop()
+
+        #   Shown results are about to be replaced
+        self.nextCursor = None
+        self.isPageInFlight = False
+
+    def stop( self ):
+        ''' This function cancels queries and waits for worker to exit
+        '''
+
+        self.cancel()
+        self.queryWorker.requestQueue.put( None )
+        self.queryWorker.wait()
+
+    def getCachedResult( self, queryStr : str, maxResultNum : int ) -> Optional[List[Tuple[int, float]]]:
+        ''' This function gets cached final result on current index
+            generation and marks it recently used
+        '''
+
+        key = ( self.indexReloader.currentGeneration.generationName, queryStr, maxResultNum )
+
+        if key not in self.resultCache:
+            return None
+
+        self.resultCache.move_to_end( key )
+
+        return self.resultCache[key]
+
+    def getCachedPrefixResult( self, queryStr : str, maxResultNum : int ) -> Optional[List[Tuple[int, float]]]:
+        ''' This function gets cached final result of the longest query
+            string which is a prefix of given one
+        '''
+
+        generationName = self.indexReloader.currentGeneration.generationName
+        bestQueryStr = None
+
+        for cachedGenerationName, cachedQueryStr, cachedMaxResultNum in self.resultCache.keys():
+            literalQueryStr = cachedQueryStr[:-len(PrefixTermSuffix)] if cachedQueryStr.endswith( PrefixTermSuffix ) else cachedQueryStr
+            if cachedGenerationName == generationName and cachedMaxResultNum == maxResultNum and queryStr.startswith( literalQueryStr ) and ( bestQueryStr is None or len(cachedQueryStr) > len(bestQueryStr) ):
+                bestQueryStr = cachedQueryStr
+
+        if bestQueryStr is None:
+            return None
+
+        return self.getCachedResult( bestQueryStr, maxResultNum )
+
+    def receivePartialResult( self, generation : int, resultRowList : List[Tuple] ):
+        ''' This is callback function of worker partial result signal
+        '''
+
+        if generation == self.generation:
+            self.resultSignal.emit( resultRowList, False )
+
+    def receiveFinalResult( self, generation : int, generationName : str, queryStr : str, maxResultNum : int, resultRowList : List[Tuple], deltaTime : float, similarDocId : Optional[int] ):
+        ''' This is callback function of worker final result signal
+        '''
+
+        #   Cache final query result, least recently used one is evicted,
+        #   similar documents are found fast enough without
+        if similarDocId is None:
+            key = ( generationName, queryStr, maxResultNum )
+            self.resultCache[key] = resultRowList
+            self.resultCache.move_to_end( key )
+            if len(self.resultCache) > self.resultCacheSize:
+                self.resultCache.popitem( last=False )
+
+        #   Drop result of a cancelled query
+        if generation != self.generation:
+            return
+
+        #   Similar documents are not paged
+        if similarDocId is None:
+            self.startPaging( queryStr, maxResultNum, resultRowList )
+
+        if self.isDebug:
+
+            #   Display timer log message
+            if similarDocId is None:
+                print( 'Queried {!r} on {} in {} seconds.'.format( queryStr, generationName, deltaTime ) )
+            else:
+                print( 'Found documents similar to docId {} on {} in {} seconds.'.format( similarDocId, generationName, deltaTime ) )
+
+        self.resultSignal.emit( resultRowList, True )
+
+    def receivePage( self, generation : int, resultRowList : List[Tuple], nextCursor : Optional[str] ):
+        ''' This is callback function of worker page signal, rows already
+            shown are dropped in case scores tie across the page boundary
+        '''
+
+        #   Drop page of a cancelled query
+        if generation != self.generation:
+            return
+
+        self.isPageInFlight = False
+        self.nextCursor = nextCursor
+
+        resultRowList = [ resultRow for resultRow in resultRowList if resultRow[0] not in self.shownDocIdSet ]
+        self.shownDocIdSet.update( resultRow[0] for resultRow in resultRowList )
+
+        self.pageSignal.emit( resultRowList )
@@ -3,18 +3,15 @@
 ##########################################################################
 
 import os
-import time
 
 from PyQt5 import QtWidgets
 from PyQt5 import QtGui
 from PyQt5 import QtCore
 
 from .PyQtHelper import getIntValidator
-from indexer.Indexer import Indexer
-from textprocessor.Tokenizer import TokenizerOption
-from textprocessor.Normalizer import NormalizerOption
-from textprocessor.TextProcessor import TextProcessor
-from querymanager.QueryManager import QueryManager
+from .QueryExecutor import QueryExecutor
+from indexer.IndexManifest import IndexFileKind
+from querymanager.IndexReloader import IndexReloader
 
 ##########################################################################
 #   GLOBAL
@@ -24,6 +21,9 @@ DefaultMaxResultNum = 10
 
 WindowTitle = 'Simple Text Search Engine'
 
+#   Index files loaded from every generation, missing ones are skipped
+IndexFileKindList = [ IndexFileKind.DOC_ID_STORE, IndexFileKind.INVERTED_INDEX, IndexFileKind.TERM_DICTIONARY, IndexFileKind.TIERED_INDEX, IndexFileKind.FORWARD_INDEX, IndexFileKind.SIMILARITY_INDEX, IndexFileKind.VOCABULARY_FILTER ]
+
 ##########################################################################
 #   HELPER
 ##########################################################################
@@ -43,37 +43,11 @@ def logResult( queryManger, docIdToCosineSimilaryTupleList ):
 #   CLASS
 ##########################################################################
 
-class QueryThread( QtCore.QThread ):
-
-    signal = QtCore.pyqtSignal('PyQt_PyObject')
-
-    def __init__(self, queryManager, queryStr, isDebug=False):
-        QtCore.QThread.__init__(self)
-        self.queryManager = queryManager
-        self.queryStr = queryStr
-        self.isDebug = isDebug
-
-    def run(self):
-        
-        #   Start timer
-        startTime = time.time()
-
-        #   Do query
-        docIdToCosineSimilaryTupleList = self.queryManager.query( self.queryStr )
-
-        #   End timer
-        deltaTime = time.time() - startTime
-        
-        if self.isDebug:
-
-            #   Display timer log message
-            print( 'Queried in {} seconds.'.format( deltaTime ) )
-
-        #   Return result
-        self.signal.emit( docIdToCosineSimilaryTupleList )
-
 class SimpleTextSearchEngineWindow( QtWidgets.QMainWindow ):
 
+    #   Name of index generation swapped in by index reloader
+    generationSignal = QtCore.pyqtSignal( str )
+
     def __init__(self, isDebug=False):
         super(SimpleTextSearchEngineWindow, self).__init__()
         self.isDebug = isDebug
@@ -143,12 +117,19 @@ class SimpleTextSearchEngineWindow( QtWidgets.QMainWindow ):
         #   Create result table widget
         self.tableResult = QtWidgets.QTableWidget()
         self.tableResult.setRowCount(0)
-        self.tableResult.setColumnCount(3)
-        self.tableResult.setHorizontalHeaderLabels(['Score', 'Id', 'Name'])
+        self.tableResult.setColumnCount(6)
+        self.tableResult.setHorizontalHeaderLabels(['Score', 'Id', 'Title', 'Size', 'Name', 'Snippet'])
         self.tableResult.setSortingEnabled(True)
         self.tableResult.setEditTriggers( QtWidgets.QAbstractItemView.NoEditTriggers )
+        self.tableResult.setContextMenuPolicy( QtCore.Qt.CustomContextMenu )
+
+        #   Create more result button widget fetching the next page
+        self.buttonMoreResult = QtWidgets.QPushButton()
+        self.buttonMoreResult.setText( 'More Results' )
+        self.buttonMoreResult.setEnabled( False )
 
         vBoxResult.addWidget(self.tableResult)
+        vBoxResult.addWidget(self.buttonMoreResult)
 
         #   Set result group box layout
         groupBoxResult.setLayout(vBoxResult)
@@ -174,20 +155,64 @@ class SimpleTextSearchEngineWindow( QtWidgets.QMainWindow ):
         #   Set callback function for search button
         self.buttonSearch.clicked.connect( self.buttonSearch_cb )
 
-    def loadIndexDir( self, indexDir, docIdIndexFileName, invertedIndexFileName ):
-        ''' This function loads inverted index and docId index from index directory
-            object stored in this class instance for further
-            querying
+        #   Set search-as-you-type and enter key callback functions
+        #   for key word line edit widget
+        self.lineEditKeyWord.textEdited.connect( self.lineEditKeyWord_cb )
+        self.lineEditKeyWord.returnPressed.connect( self.buttonSearch_cb )
+
+        #   Set more like this context menu callback function for result
+        #   table widget
+        self.tableResult.customContextMenuRequested.connect( self.tableResultContextMenu_cb )
+
+        #   Set next page callback functions for result table scroll bar
+        #   reaching the bottom and more result button
+        self.tableResult.verticalScrollBar().valueChanged.connect( self.tableResultScroll_cb )
+        self.buttonMoreResult.clicked.connect( self.buttonMoreResult_cb )
+
+    def loadIndexDir( self, indexDir, numProcess=1 ):
+        ''' This function loads published index generation from index
+            directory for further querying, and keeps watching it so a
+            newly published generation is swapped in without restarting.
+            Tiered and forward indices are loaded too if the index has been
+            built with them, for answering first page queries and showing
+            result snippets.
         '''
 
-        self.indexer = Indexer()
-        self.indexer.readFromDocIdIndexDir( indexDir, docIdIndexFileName )
-        self.indexer.readFromInvertedIndexDir( indexDir, invertedIndexFileName )
+        self.indexReloader = IndexReloader( indexDir, IndexFileKindList, numProcess=numProcess )
+        self.indexReloader.load()
+        self.queryManager = self.indexReloader.queryManager
 
-        #   Construct query manager
-        self.queryManager = QueryManager( self.indexer,
-                                        TokenizerOption.REMOVE_STOP_WORDS,
-                                        NormalizerOption.REMOVE_PUNCTUATION | NormalizerOption.CASE_FOLDING )
+        #   Construct query executor running queries off the gui thread
+        self.queryExecutor = QueryExecutor( self.indexReloader, self.isDebug )
+        self.queryExecutor.resultSignal.connect( self.finishQuery )
+        self.queryExecutor.pageSignal.connect( self.finishPage )
+
+        #   NOTE -  Swap callback runs on watcher thread, the signal brings
+        #           it back to the gui thread
+        self.generationSignal.connect( self.updateGeneration )
+        self.indexReloader.addSwapCallback( lambda generation: self.generationSignal.emit( generation.generationName ) )
+        self.updateGeneration( self.indexReloader.currentGeneration.generationName )
+
+        self.indexReloader.start()
+
+    def updateGeneration( self, generationName ):
+        ''' This function shows name of index generation being searched
+        '''
+
+        self.setWindowTitle( '{} - {}'.format( WindowTitle, generationName ) )
+
+    def closeEvent( self, event ):
+        ''' This function stops query executor worker and index reloader
+            before closing
+        '''
+
+        if hasattr( self, 'queryExecutor' ):
+            self.queryExecutor.stop()
+
+        if hasattr( self, 'indexReloader' ):
+            self.indexReloader.stop()
+
+        super(SimpleTextSearchEngineWindow, self).closeEvent( event )
 
     def lineEditMaxResult_cb( self ):
         ''' This is callback function of max result line edit widget
@@ -227,59 +252,134 @@ class SimpleTextSearchEngineWindow( QtWidgets.QMainWindow ):
         #   Get query string from keyword line edit widget
         queryStr =  self.lineEditKeyWord.text()
 
-        #   Begin query with thread
+        #   Begin query, cancelling the one in flight
         self.beginQuery( queryStr )
 
+    def lineEditKeyWord_cb( self, text ):
+        ''' This is callback function of key word line edit widget
+            which searches as user types
+        '''
+
+        #   Check if query manager is initialized
+        if not hasattr( self, 'queryExecutor' ):
+            return
+
+        self.queryExecutor.submitDebounced( text, self.maxResultNum )
+
+    def tableResultContextMenu_cb( self, position ):
+        ''' This is callback function of result table widget context menu
+            which finds documents similar to the clicked result
+        '''
+
+        #   Check if query executor is initialized
+        if not hasattr( self, 'queryExecutor' ):
+            return
+
+        item = self.tableResult.itemAt( position )
+        if item is None:
+            return
+
+        #   Get docId from id column of clicked row
+        docId = int( self.tableResult.item( item.row(), 1 ).text() )
+
+        menu = QtWidgets.QMenu( self )
+        actionMoreLikeThis = menu.addAction( 'More Like This' )
+
+        #   Similar documents are only found if index has been built with them
+        with self.indexReloader.acquire() as indexGeneration:
+            actionMoreLikeThis.setEnabled( indexGeneration.indexer.similarityIndex is not None )
+
+        if menu.exec_( self.tableResult.viewport().mapToGlobal( position ) ) == actionMoreLikeThis:
+            self.queryExecutor.submitSimilar( docId, self.maxResultNum )
+
+    def tableResultScroll_cb( self, value ):
+        ''' This is callback function of result table scroll bar which
+            fetches the next page once the last row is scrolled to
+        '''
+
+        #   NOTE -  A table which fits without scrolling is at its maximum
+        #           too, only a scroll bar moved to the bottom asks for more
+        if value > 0 and value == self.tableResult.verticalScrollBar().maximum():
+            self.buttonMoreResult_cb()
+
+    def buttonMoreResult_cb( self ):
+        ''' This is callback function of more result button widget which
+            fetches the next page of shown query results
+        '''
+
+        #   Check if query executor is initialized
+        if not hasattr( self, 'queryExecutor' ):
+            return
+
+        self.queryExecutor.submitNextPage( self.maxResultNum )
+
     def beginQuery( self, queryStr ):
-        ''' This function constructs query thread and runs it
+        ''' This function submits query to query executor, the search
+            button stays enabled so a new query replaces the running one
+        '''
+
+        self.queryExecutor.submit( queryStr, self.maxResultNum )
+
+    def finishQuery( self, resultRowList, isFinal ):
+        ''' This function gets partial or final result rows from query
+            executor and displays result on table widget
         '''
 
-        #   Disable the search button while querying
-        self.buttonSearch.setEnabled(False)
+        if self.isDebug and isFinal:
 
-        #   Construct query thread
-        self.queryThread = QueryThread( self.queryManager, queryStr, self.isDebug )
+            #   Display log message in terminal
+            logResult( self.queryManager, [ ( resultRow[0], resultRow[1] ) for resultRow in resultRowList ] )
 
-        #   Bind query thread signal to finish query function
-        self.queryThread.signal.connect( self.finishQuery )
+        #   Display result on table widget
+        self.displayResultsOnTable( resultRowList )
 
-        #   Run query thread
-        self.queryThread.start()
+        self.buttonMoreResult.setEnabled( isFinal and self.queryExecutor.hasNextPage() )
 
-    def finishQuery( self, docIdToCosineSimilaryTupleList ):
-        ''' This function gets result from query thread and
-            displays result on table widget
+    def finishPage( self, resultRowList ):
+        ''' This function gets result rows of the next page from query
+            executor and appends them to table widget
         '''
 
         if self.isDebug:
-            
+
             #   Display log message in terminal
-            logResult( self.queryManager, docIdToCosineSimilaryTupleList )
+            logResult( self.queryManager, [ ( resultRow[0], resultRow[1] ) for resultRow in resultRowList ] )
 
-        #   Display result on table widget
-        self.displayResultsOnTable( docIdToCosineSimilaryTupleList )
+        #   Append result after shown ones on table widget
+        self.displayResultsOnTable( resultRowList, isAppend=True )
 
-        #   Reenable search button
-        self.buttonSearch.setEnabled(True)
+        self.buttonMoreResult.setEnabled( self.queryExecutor.hasNextPage() )
 
-    def displayResultsOnTable( self, docIdToCosineSimilaryTupleList ):
+    def displayResultsOnTable( self, resultRowList, isAppend=False ):
         ''' This function populates results table widget with given
-            result docId to cosine similiarity tuple list
+            result rows of docId, cosine similiarity, title, size, name and
+            snippet, or appends them after shown rows
         '''
 
         #   If there is no result, clear all result on table
-        if len(docIdToCosineSimilaryTupleList) == 0:
-            self.tableResult.setRowCount(0)
+        if len(resultRowList) == 0:
+            if not isAppend:
+                self.tableResult.setRowCount(0)
             return
 
         #   Limit result with max result number
-        docIdToCosineSimilaryTupleList = docIdToCosineSimilaryTupleList[:self.maxResultNum]
+        resultRowList = resultRowList[:self.maxResultNum]
+
+        #   NOTE -  Sorting while populating moves rows being filled, so it is
+        #           suspended until the table is complete
+        self.tableResult.setSortingEnabled(False)
 
         #   Set table row
-        self.tableResult.setRowCount(len(docIdToCosineSimilaryTupleList))
+        firstRowIndex = self.tableResult.rowCount() if isAppend else 0
+        self.tableResult.setRowCount( firstRowIndex + len(resultRowList) )
 
         #   Populate record on table
-        for resultIndex, docIdToCosineSimilaryTuple in enumerate( docIdToCosineSimilaryTupleList ):
-            self.tableResult.setItem( resultIndex, 0, QtWidgets.QTableWidgetItem( str(docIdToCosineSimilaryTuple[1]) ))
-            self.tableResult.setItem( resultIndex, 1, QtWidgets.QTableWidgetItem( str(docIdToCosineSimilaryTuple[0]) ))
-            self.tableResult.setItem( resultIndex, 2, QtWidgets.QTableWidgetItem( self.indexer.getDocNameById( docIdToCosineSimilaryTuple[0] ) ))
\ No newline at end of file
+        for resultIndex, ( docId, score, title, byteSize, docName, snippet ) in enumerate( resultRowList, firstRowIndex ):
+            self.tableResult.setItem( resultIndex, 0, QtWidgets.QTableWidgetItem( str(score) ))
+            self.tableResult.setItem( resultIndex, 1, QtWidgets.QTableWidgetItem( str(docId) ))
+            self.tableResult.setItem( resultIndex, 2, QtWidgets.QTableWidgetItem( title ))
+            self.tableResult.setItem( resultIndex, 3, QtWidgets.QTableWidgetItem( str(byteSize) ))
+            self.tableResult.setItem( resultIndex, 4, QtWidgets.QTableWidgetItem( docName ))
+            self.tableResult.setItem( resultIndex, 5, QtWidgets.QTableWidgetItem( snippet ))
+
+        self.tableResult.setSortingEnabled(True)
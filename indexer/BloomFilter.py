@@ -0,0 +1,150 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import math
+import struct
+import hashlib
+from typing import Optional, Iterable, Iterator
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   NOTE -  A Bloom filter file is laid out as
+#               header | bit array
+#           Header holds magic, format version, number of hash functions,
+#           number of bits and number of inserted keys. Bit i is bit i%8
+#           of byte i//8.
+BloomFilterMagic = b'BLMF'
+BloomFilterVersion = 1
+BloomFilterHeaderFormat = '<4sIIQQ'
+BloomFilterHeaderSize = struct.calcsize( BloomFilterHeaderFormat )
+
+#   Fraction of absent keys reported as present, about 9.6 bits per key
+#   with 7 hash functions
+FalsePositiveRate = 0.01
+
+#   Bits are addressed by double hashing h1 + i*h2 of a 128 bit digest
+HashByteNum = 16
+HashMask = ( 1 << 64 ) - 1
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getKeyHash( key : str ) -> int:
+    ''' This function hashes a key to 128 random bits, stable across
+        processes and index generations
+    '''
+
+    return int.from_bytes( hashlib.blake2b( key.encode( 'utf-8' ), digest_size=HashByteNum ).digest(), 'little' )
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class BloomFilter(object):
+    ''' This class answers whether a key may be in a set with a compact bit
+        array. Absent keys are rejected without touching the set, except
+        for a small fraction of false positives. Keys present are never
+        rejected.
+    '''
+
+    def __init__( self, numHash : int, numBit : int, numKey : Optional[int] = 0, bitArray : Optional[bytearray] = None ):
+        self.numHash = numHash
+        self.numBit = numBit
+        self.numKey = numKey
+        self.bitArray = bitArray if bitArray is not None else bytearray( ( numBit + 7 )//8 )
+
+    @staticmethod
+    def fromKeys( keyIterable : Iterable[str], numKey : int, falsePositiveRate : Optional[float] = FalsePositiveRate ) -> 'BloomFilter':
+        ''' This function constructs Bloom filter sized for given number of
+            keys and false positive rate, and adds the keys
+        '''
+
+        #   Optimal size and number of hash functions
+        numBit = max( 64, math.ceil( -max( 1, numKey )*math.log( falsePositiveRate )/math.log( 2 )**2 ) )
+        numHash = max( 1, round( numBit/max( 1, numKey )*math.log( 2 ) ) )
+
+        bloomFilter = BloomFilter( numHash, numBit )
+
+        for key in keyIterable:
+            bloomFilter.add( key )
+
+        return bloomFilter
+
+    def __len__( self ) -> int:
+        return self.numKey
+
+    def iterBitIndex( self, key : str ) -> Iterator[int]:
+        ''' This function iterates bit indexes of a key
+        '''
+
+        keyHash = getKeyHash( key )
+        hash1 = keyHash & HashMask
+        hash2 = ( keyHash >> 64 ) | 1
+
+        for i in range( self.numHash ):
+            yield ( hash1 + i*hash2 ) % self.numBit
+
+    def add( self, key : str ):
+        ''' This function sets bits of a key
+        '''
+
+        for bitIndex in self.iterBitIndex( key ):
+            self.bitArray[ bitIndex >> 3 ] |= 1 << ( bitIndex & 7 )
+
+        self.numKey += 1
+
+    def __contains__( self, key : str ) -> bool:
+
+        #   NOTE - Bit indexes are inlined, absent keys mostly stop at the
+        #          first or second bit
+        keyHash = getKeyHash( key )
+        bitIndex = keyHash & HashMask
+        hash2 = ( keyHash >> 64 ) | 1
+        bitArray = self.bitArray
+        numBit = self.numBit
+
+        for _ in range( self.numHash ):
+            bitIndex %= numBit
+            if not bitArray[ bitIndex >> 3 ] & ( 1 << ( bitIndex & 7 ) ):
+                return False
+            bitIndex += hash2
+
+        return True
+
+    def write( self, bloomFilterFilePath : str ):
+        ''' This function writes header and bit array as binary file
+        '''
+
+        with open( bloomFilterFilePath, 'wb' ) as bloomFilterFile:
+            bloomFilterFile.write( struct.pack( BloomFilterHeaderFormat, BloomFilterMagic, BloomFilterVersion, self.numHash, self.numBit, self.numKey ) )
+            bloomFilterFile.write( self.bitArray )
+
+    @staticmethod
+    def read( bloomFilterFilePath : str ) -> 'BloomFilter':
+        ''' This function reads Bloom filter written by write()
+        '''
+
+        if not os.path.exists( bloomFilterFilePath ):
+            raise ValueError( 'BloomFilter - Cannot find Bloom filter file at {}.'.format( bloomFilterFilePath ) )
+
+        with open( bloomFilterFilePath, 'rb' ) as bloomFilterFile:
+            header = bloomFilterFile.read( BloomFilterHeaderSize )
+            bitArray = bytearray( bloomFilterFile.read() )
+
+        #   Parse header
+        if len(header) < BloomFilterHeaderSize:
+            raise ValueError( 'BloomFilter - {} is not a Bloom filter file.'.format( bloomFilterFilePath ) )
+        magic, version, numHash, numBit, numKey = struct.unpack( BloomFilterHeaderFormat, header )
+        if magic != BloomFilterMagic:
+            raise ValueError( 'BloomFilter - {} is not a Bloom filter file.'.format( bloomFilterFilePath ) )
+        if version != BloomFilterVersion:
+            raise ValueError( 'BloomFilter - Unsupported Bloom filter version {} at {}.'.format( version, bloomFilterFilePath ) )
+        if len(bitArray) != ( numBit + 7 )//8:
+            raise ValueError( 'BloomFilter - Bloom filter at {} is truncated.'.format( bloomFilterFilePath ) )
+
+        return BloomFilter( numHash, numBit, numKey=numKey, bitArray=bitArray )
@@ -0,0 +1,186 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import math
+from collections import Counter
+from typing import Optional, List, Dict
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   Swap rounds of a bisection step, and partition size bisection stops at
+BisectionIterationNum = 20
+BisectionMinPartitionSize = 16
+
+#   Highest tf-idf terms a document is sorted by
+DominantTermNum = 4
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getLogGapCost( docFreq : int, partitionSize : int ) -> float:
+    ''' This function estimates bits of the docId gaps of a term occurring
+        in docFreq documents of a partition
+    '''
+
+    return docFreq*math.log2( partitionSize/( docFreq + 1 ) )
+
+def getMoveGainDict( degreeDict : Counter, otherDegreeDict : Counter, partitionSize : int, otherPartitionSize : int ) -> Dict[int, float]:
+    ''' This function computes how much moving one occurrence of each term
+        to the other partition lowers log gap cost
+    '''
+
+    moveGainDict = dict()
+
+    for termId, degree in degreeDict.items():
+        if degree == 0:
+            continue
+        otherDegree = otherDegreeDict.get( termId, 0 )
+        moveGainDict[termId] = getLogGapCost( degree, partitionSize ) + getLogGapCost( otherDegree, otherPartitionSize ) - getLogGapCost( degree - 1, partitionSize ) - getLogGapCost( otherDegree + 1, otherPartitionSize )
+
+    return moveGainDict
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+#   NOTE -  Recursive graph bisection splits documents in two halves and
+#           swaps documents between them while that lowers the estimated
+#           log gap cost of their terms, then recurses into each half, so
+#           documents sharing terms end up with close docIds. Sorting by
+#           dominant terms only groups documents by their highest tf-idf
+#           terms, which is much cheaper and coarser.
+class ReorderMethod(object):
+    BISECTION = 'bisection'
+    DOMINANT_TERM = 'dominantTerm'
+
+ReorderMethodList = [ ReorderMethod.BISECTION, ReorderMethod.DOMINANT_TERM ]
+
+class DocIdReorderer(object):
+    ''' This class finds a docId order in which documents sharing terms
+        are close, so docId gaps of postings are small and compress well.
+        Documents without postings, e.g. left out near duplicates, go last
+        in their current order.
+    '''
+
+    def __init__( self, reorderMethod : Optional[str] = ReorderMethod.BISECTION,
+                        iterationNum : Optional[int] = BisectionIterationNum,
+                        minPartitionSize : Optional[int] = BisectionMinPartitionSize,
+                        dominantTermNum : Optional[int] = DominantTermNum ):
+
+        if reorderMethod not in ReorderMethodList:
+            raise ValueError( 'DocIdReorderer - Unknown reorder method {!r}.'.format( reorderMethod ) )
+
+        self.reorderMethod = reorderMethod
+        self.iterationNum = iterationNum
+        self.minPartitionSize = max( 2, minPartitionSize )
+        self.dominantTermNum = dominantTermNum
+
+    def findDocIdOrder( self, termIdToDocIdToTermFreqDict : Dict, numDoc : int ) -> List[int]:
+        ''' This function finds new docId order from term frequency
+            postings, the i-th docId of the returned list becomes docId i
+        '''
+
+        if self.reorderMethod == ReorderMethod.BISECTION:
+            docIdList = self.orderByBisection( termIdToDocIdToTermFreqDict )
+        else:
+            docIdList = self.orderByDominantTerm( termIdToDocIdToTermFreqDict, numDoc )
+
+        docIdSet = set( docIdList )
+
+        return docIdList + [ docId for docId in range( numDoc ) if docId not in docIdSet ]
+
+    def orderByDominantTerm( self, termIdToDocIdToTermFreqDict : Dict, numDoc : int ) -> List[int]:
+        ''' This function sorts documents by termIds of their highest tf-idf
+            terms, highest first
+        '''
+
+        docIdToWeightedTermIdListDict = dict()
+
+        for termId, docIdToTermFreqDict in termIdToDocIdToTermFreqDict.items():
+            inverseDocFreq = math.log10( numDoc/len(docIdToTermFreqDict) )
+            for docId, termFreq in docIdToTermFreqDict.items():
+                docIdToWeightedTermIdListDict.setdefault( docId, list() ).append( ( -math.log10( 1 + termFreq )*inverseDocFreq, termId ) )
+
+        docIdToSortKeyDict = { docId: tuple( termId for _, termId in sorted( weightedTermIdList )[:self.dominantTermNum] ) for docId, weightedTermIdList in docIdToWeightedTermIdListDict.items() }
+
+        return sorted( docIdToSortKeyDict.keys(), key=lambda docId: ( docIdToSortKeyDict[docId], docId ) )
+
+    def orderByBisection( self, termIdToDocIdToTermFreqDict : Dict ) -> List[int]:
+        ''' This function orders documents by recursive graph bisection
+            NOTE -  A term in a single document has the same gap cost in
+                    any order, such terms are left out of the cost
+        '''
+
+        docIdToTermIdListDict = dict()
+
+        for termId, docIdToTermFreqDict in termIdToDocIdToTermFreqDict.items():
+            if len(docIdToTermFreqDict) < 2:
+                continue
+            for docId in docIdToTermFreqDict.keys():
+                docIdToTermIdListDict.setdefault( docId, list() ).append( termId )
+
+        docIdList = sorted( docIdToTermIdListDict.keys() )
+
+        #   Bisect partitions breadth first, each is a slice of docId list
+        partitionList = [ ( 0, len(docIdList) ) ]
+
+        while len(partitionList) > 0:
+            nextPartitionList = list()
+
+            for partitionBegin, partitionEnd in partitionList:
+                if partitionEnd - partitionBegin <= self.minPartitionSize:
+                    continue
+
+                partitionMiddle = ( partitionBegin + partitionEnd )//2
+                docIdList[ partitionBegin:partitionEnd ] = self.bisectPartition( docIdList[ partitionBegin:partitionMiddle ], docIdList[ partitionMiddle:partitionEnd ], docIdToTermIdListDict )
+
+                nextPartitionList += [ ( partitionBegin, partitionMiddle ), ( partitionMiddle, partitionEnd ) ]
+
+            partitionList = nextPartitionList
+
+        return docIdList
+
+    def bisectPartition( self, leftDocIdList : List[int], rightDocIdList : List[int], docIdToTermIdListDict : Dict[int, List[int]] ) -> List[int]:
+        ''' This function swaps documents between two halves of a partition
+            while swaps lower their log gap cost, returns left half followed
+            by right half
+        '''
+
+        leftDegreeDict = Counter( termId for docId in leftDocIdList for termId in docIdToTermIdListDict[docId] )
+        rightDegreeDict = Counter( termId for docId in rightDocIdList for termId in docIdToTermIdListDict[docId] )
+
+        for _ in range( self.iterationNum ):
+
+            toRightGainDict = getMoveGainDict( leftDegreeDict, rightDegreeDict, len(leftDocIdList), len(rightDocIdList) )
+            toLeftGainDict = getMoveGainDict( rightDegreeDict, leftDegreeDict, len(rightDocIdList), len(leftDocIdList) )
+
+            #   Pair documents most eager to move from each side
+            leftGainList = sorted( ( ( sum( map( toRightGainDict.__getitem__, docIdToTermIdListDict[docId] ) ), docId ) for docId in leftDocIdList ), reverse=True )
+            rightGainList = sorted( ( ( sum( map( toLeftGainDict.__getitem__, docIdToTermIdListDict[docId] ) ), docId ) for docId in rightDocIdList ), reverse=True )
+
+            toRightDocIdSet = set()
+            toLeftDocIdSet = set()
+
+            for ( leftGain, leftDocId ), ( rightGain, rightDocId ) in zip( leftGainList, rightGainList ):
+                if leftGain + rightGain <= 0:
+                    break
+                toRightDocIdSet.add( leftDocId )
+                toLeftDocIdSet.add( rightDocId )
+
+            if len(toRightDocIdSet) == 0:
+                break
+
+            for docId in toRightDocIdSet:
+                leftDegreeDict.subtract( docIdToTermIdListDict[docId] )
+                rightDegreeDict.update( docIdToTermIdListDict[docId] )
+            for docId in toLeftDocIdSet:
+                rightDegreeDict.subtract( docIdToTermIdListDict[docId] )
+                leftDegreeDict.update( docIdToTermIdListDict[docId] )
+
+            leftDocIdList, rightDocIdList = [ docId for docId in leftDocIdList if docId not in toRightDocIdSet ] + sorted( toLeftDocIdSet ), [ docId for docId in rightDocIdList if docId not in toLeftDocIdSet ] + sorted( toRightDocIdSet )
+
+        return leftDocIdList + rightDocIdList
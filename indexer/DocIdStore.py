@@ -0,0 +1,174 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import mmap
+import array
+import struct
+from typing import Optional, Iterable, List, Tuple
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   NOTE -  A docId store file is laid out as
+#               header | name offsets | byte sizes | name blob
+#           Header holds magic, format version and number of documents.
+#           Offsets and byte sizes are native unsigned 64 bit arrays, so
+#           the header is padded to 8 bytes and both can be viewed in
+#           place. Offsets has one more entry than documents, name of
+#           docId i is blob[ offsets[i]:offsets[i+1] ] in utf-8.
+DocIdStoreMagic = b'DOCS'
+DocIdStoreVersion = 1
+DocIdStoreHeaderFormat = '<4sIQ'
+DocIdStoreHeaderSize = struct.calcsize( DocIdStoreHeaderFormat )
+
+ArrayTypeCode = 'Q'
+ArrayItemSize = array.array( ArrayTypeCode ).itemsize
+
+#   Text file names look like <author>___<title>.txt
+AuthorTitleSeparator = '___'
+
+#   Extensions of a text file compressed on its own, e.g. <title>.txt.gz
+CompressedExtensionTuple = ( '.gz', '.bz2' )
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getTitleFromDocName( docName : str ) -> str:
+    ''' This function derives document title from its file name
+    '''
+
+    #   Drop directory, or archive and member directory, and extension
+    title, extension = os.path.splitext( os.path.basename( docName ) )
+    if extension in CompressedExtensionTuple:
+        title = os.path.splitext( title )[0]
+
+    return title.split( AuthorTitleSeparator )[-1]
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class DocIdStore(object):
+    ''' This class maps dense docIds to document names and metadata from a
+        memory-mapped file. Nothing is decoded at load time, a name is only
+        decoded when it is asked for, e.g. for the top results shown.
+    '''
+
+    def __init__( self, docIdStoreFilePath : str ):
+
+        if not os.path.exists( docIdStoreFilePath ):
+            raise ValueError( 'DocIdStore - Cannot find docId store file at {}.'.format( docIdStoreFilePath ) )
+
+        self.docIdStoreFilePath = docIdStoreFilePath
+
+        with open( docIdStoreFilePath, 'rb' ) as docIdStoreFile:
+            self.buffer = mmap.mmap( docIdStoreFile.fileno(), 0, access=mmap.ACCESS_READ )
+
+        #   Parse header
+        magic, version, self.numDoc = struct.unpack_from( DocIdStoreHeaderFormat, self.buffer, 0 )
+        if magic != DocIdStoreMagic:
+            raise ValueError( 'DocIdStore - {} is not a docId store file.'.format( docIdStoreFilePath ) )
+        if version != DocIdStoreVersion:
+            raise ValueError( 'DocIdStore - Unsupported docId store version {} at {}.'.format( version, docIdStoreFilePath ) )
+
+        #   View arrays in place
+        offsetStart = DocIdStoreHeaderSize
+        byteSizeStart = offsetStart + ( self.numDoc + 1 )*ArrayItemSize
+        self.blobStart = byteSizeStart + self.numDoc*ArrayItemSize
+
+        self.offsetView = memoryview( self.buffer )[ offsetStart:byteSizeStart ].cast( ArrayTypeCode )
+        self.byteSizeView = memoryview( self.buffer )[ byteSizeStart:self.blobStart ].cast( ArrayTypeCode )
+
+    def __len__( self ) -> int:
+        return self.numDoc
+
+    def close( self ):
+        ''' This function releases array views and unmaps the file
+        '''
+
+        self.offsetView.release()
+        self.byteSizeView.release()
+        self.buffer.close()
+
+    def checkDocId( self, docId : int ):
+        ''' This function checks if docId is in range
+        '''
+
+        if docId < 0 or docId >= self.numDoc:
+            raise ValueError( 'DocIdStore - DocId {} is out of range.'.format( docId ) )
+
+    def getDocName( self, docId : int ) -> str:
+        ''' This function decodes name of given docId
+        '''
+
+        self.checkDocId( docId )
+
+        return self.buffer[ self.blobStart + self.offsetView[docId]:self.blobStart + self.offsetView[docId+1] ].decode( 'utf-8' )
+
+    def getDocByteSize( self, docId : int ) -> int:
+        ''' This function gets byte size of given docId text file
+        '''
+
+        self.checkDocId( docId )
+
+        return self.byteSizeView[docId]
+
+    def getDocTitle( self, docId : int ) -> str:
+        ''' This function gets title of given docId derived from its name
+        '''
+
+        return getTitleFromDocName( self.getDocName( docId ) )
+
+    def findDocId( self, docName : str ) -> Optional[int]:
+        ''' This function finds docId of a document name by scanning the
+            name blob, or returns None if there is no such document
+        '''
+
+        docNameBytes = docName.encode( 'utf-8' )
+
+        for docId in range( self.numDoc ):
+            nameStart, nameEnd = self.blobStart + self.offsetView[docId], self.blobStart + self.offsetView[docId+1]
+            if nameEnd - nameStart == len(docNameBytes) and self.buffer[ nameStart:nameEnd ] == docNameBytes:
+                return docId
+
+        return None
+
+    def iterDocName( self ) -> Iterable[Tuple[int, str]]:
+        ''' This function iterates docId and name of every document
+        '''
+
+        for docId in range( self.numDoc ):
+            yield docId, self.getDocName( docId )
+
+    @staticmethod
+    def write( docIdStoreFilePath : str, docIdToDocNameTupleList : List[Tuple[int, str]], byteSizeList : Optional[List[int]] = None ):
+        ''' This function writes docId store from docId to document name
+            tuples, docIds must be dense and in order
+        '''
+
+        #   Initialize name offset array with blob beginning
+        offsetArray = array.array( ArrayTypeCode, [ 0 ] )
+        nameBlob = bytearray()
+
+        for i, ( docId, docName ) in enumerate( docIdToDocNameTupleList ):
+            if docId != i:
+                raise ValueError( 'write() - DocId {} is not dense, expect {}.'.format( docId, i ) )
+            nameBlob += docName.encode( 'utf-8' )
+            offsetArray.append( len(nameBlob) )
+
+        numDoc = len(offsetArray) - 1
+
+        if byteSizeList is None:
+            byteSizeList = [ 0 ]*numDoc
+        elif len(byteSizeList) != numDoc:
+            raise ValueError( 'write() - Got {} byte sizes for {} documents.'.format( len(byteSizeList), numDoc ) )
+
+        with open( docIdStoreFilePath, 'wb' ) as docIdStoreFile:
+            docIdStoreFile.write( struct.pack( DocIdStoreHeaderFormat, DocIdStoreMagic, DocIdStoreVersion, numDoc ) )
+            docIdStoreFile.write( offsetArray.tobytes() )
+            docIdStoreFile.write( array.array( ArrayTypeCode, byteSizeList ).tobytes() )
+            docIdStoreFile.write( nameBlob )
@@ -0,0 +1,243 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import re
+import mmap
+import zlib
+import array
+import bisect
+import struct
+from typing import Iterable, List, Set, Tuple
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   NOTE -  A forward index splits every text file into passages of about
+#           passage byte size, cut at ascii white space so a passage is
+#           always valid utf-8 and tokenizes like the whole text does.
+#           For each distinct term of a document, keyed by a stable hash,
+#           it keeps the first few passages the term occurs in. A forward
+#           index file is laid out as
+#               header | doc passage starts | doc term starts |
+#               passage byte offsets | term hashes | term passages
+#           Each document has one more passage offset than passages, the
+#           last one is its size. Term hashes of a document are sorted,
+#           term i has passages [ i*passagePerTermNum, (i+1)*passagePerTermNum )
+#           padded with NoPassage.
+ForwardIndexMagic = b'FWDX'
+ForwardIndexVersion = 1
+ForwardIndexHeaderFormat = '<4sIIIQ'
+ForwardIndexHeaderSize = struct.calcsize( ForwardIndexHeaderFormat )
+
+PassageByteSize = 512
+PassagePerTermNum = 4
+
+OffsetTypeCode = 'Q'
+OffsetItemSize = array.array( OffsetTypeCode ).itemsize
+TermTypeCode = 'I'
+TermItemSize = array.array( TermTypeCode ).itemsize
+
+NoPassage = 0xFFFFFFFF
+
+PassageBoundaryPattern = re.compile( rb'\s' )
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getTermHash( term : str ) -> int:
+    ''' This function hashes term to 32 bits, stable across processes
+        unlike built-in hash
+    '''
+
+    return zlib.crc32( term.encode( 'utf-8' ) )
+
+def splitPassageOffsetList( data : bytes, passageByteSize : int = PassageByteSize ) -> List[int]:
+    ''' This function splits text file content into passages and returns
+        their byte offsets followed by content size
+    '''
+
+    passageOffsetList = [ 0 ]
+    position = passageByteSize
+
+    while position < len(data):
+
+        #   Cut at the next white space, a long word stays in one passage
+        matched = PassageBoundaryPattern.search( data, position )
+        if matched is None:
+            break
+
+        passageOffsetList.append( matched.start() )
+        position = matched.start() + passageByteSize
+
+    passageOffsetList.append( len(data) )
+
+    return passageOffsetList
+
+def encodeTermPassage( passageTermSetList : List[Set[str]], passagePerTermNum : int = PassagePerTermNum ) -> Tuple[List[int], List[int]]:
+    ''' This function maps terms of a document to the first passages they
+        occur in, returns sorted term hashes and their padded passages
+    '''
+
+    termHashToPassageListDict = dict()
+
+    for passageIndex, passageTermSet in enumerate( passageTermSetList ):
+        for term in passageTermSet:
+            passageList = termHashToPassageListDict.setdefault( getTermHash( term ), list() )
+            if len(passageList) < passagePerTermNum:
+                passageList.append( passageIndex )
+
+    termHashList = sorted( termHashToPassageListDict.keys() )
+    termPassageList = list()
+
+    for termHash in termHashList:
+        passageList = termHashToPassageListDict[termHash]
+        termPassageList.extend( passageList + [ NoPassage ]*( passagePerTermNum - len(passageList) ) )
+
+    return termHashList, termPassageList
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class ForwardIndex(object):
+    ''' This class maps dense docIds to passage byte offsets of their text
+        files and the passages each term occurs in from a memory-mapped
+        file, so matching passages are found without reading the text file
+        and only those are read afterwards.
+    '''
+
+    def __init__( self, forwardIndexFilePath : str ):
+
+        if not os.path.exists( forwardIndexFilePath ):
+            raise ValueError( 'ForwardIndex - Cannot find forward index file at {}.'.format( forwardIndexFilePath ) )
+
+        self.forwardIndexFilePath = forwardIndexFilePath
+
+        with open( forwardIndexFilePath, 'rb' ) as forwardIndexFile:
+            self.buffer = mmap.mmap( forwardIndexFile.fileno(), 0, access=mmap.ACCESS_READ )
+
+        #   Parse header
+        magic, version, self.passageByteSize, self.passagePerTermNum, self.numDoc = struct.unpack_from( ForwardIndexHeaderFormat, self.buffer, 0 )
+        if magic != ForwardIndexMagic:
+            raise ValueError( 'ForwardIndex - {} is not a forward index file.'.format( forwardIndexFilePath ) )
+        if version != ForwardIndexVersion:
+            raise ValueError( 'ForwardIndex - Unsupported forward index version {} at {}.'.format( version, forwardIndexFilePath ) )
+
+        #   View arrays in place
+        passageStartStart = ForwardIndexHeaderSize
+        termStartStart = passageStartStart + ( self.numDoc + 1 )*OffsetItemSize
+        passageOffsetStart = termStartStart + ( self.numDoc + 1 )*OffsetItemSize
+
+        self.passageStartView = memoryview( self.buffer )[ passageStartStart:termStartStart ].cast( OffsetTypeCode )
+        self.termStartView = memoryview( self.buffer )[ termStartStart:passageOffsetStart ].cast( OffsetTypeCode )
+
+        termHashStart = passageOffsetStart + self.passageStartView[self.numDoc]*OffsetItemSize
+        termPassageStart = termHashStart + self.termStartView[self.numDoc]*TermItemSize
+        termPassageEnd = termPassageStart + self.termStartView[self.numDoc]*self.passagePerTermNum*TermItemSize
+
+        self.passageOffsetView = memoryview( self.buffer )[ passageOffsetStart:termHashStart ].cast( OffsetTypeCode )
+        self.termHashView = memoryview( self.buffer )[ termHashStart:termPassageStart ].cast( TermTypeCode )
+        self.termPassageView = memoryview( self.buffer )[ termPassageStart:termPassageEnd ].cast( TermTypeCode )
+
+    def __len__( self ) -> int:
+        return self.numDoc
+
+    def close( self ):
+        ''' This function releases array views and unmaps the file
+        '''
+
+        self.passageStartView.release()
+        self.termStartView.release()
+        self.passageOffsetView.release()
+        self.termHashView.release()
+        self.termPassageView.release()
+        self.buffer.close()
+
+    def checkDocId( self, docId : int ):
+        ''' This function checks if docId is in range
+        '''
+
+        if docId < 0 or docId >= self.numDoc:
+            raise ValueError( 'ForwardIndex - DocId {} is out of range.'.format( docId ) )
+
+    def getNumPassage( self, docId : int ) -> int:
+        ''' This function gets number of passages of given docId
+        '''
+
+        self.checkDocId( docId )
+
+        return self.passageStartView[docId+1] - self.passageStartView[docId] - 1
+
+    def getPassageRange( self, docId : int, passageIndex : int ) -> Tuple[int, int]:
+        ''' This function gets begin and end byte offsets of a passage
+        '''
+
+        passageStart = self.passageStartView[docId] + passageIndex
+
+        return self.passageOffsetView[passageStart], self.passageOffsetView[passageStart+1]
+
+    def getDocByteSize( self, docId : int ) -> int:
+        ''' This function gets byte size of given docId text file when the
+            forward index was built
+        '''
+
+        self.checkDocId( docId )
+
+        return self.passageOffsetView[ self.passageStartView[docId+1] - 1 ]
+
+    def getTermPassageList( self, docId : int, term : str ) -> List[int]:
+        ''' This function gets the first passages of given docId the term
+            occurs in, by binary search over its sorted term hashes
+        '''
+
+        self.checkDocId( docId )
+
+        termHash = getTermHash( term )
+        termBegin, termEnd = self.termStartView[docId], self.termStartView[docId+1]
+
+        termIndex = bisect.bisect_left( self.termHashView, termHash, termBegin, termEnd )
+        if termIndex == termEnd or self.termHashView[termIndex] != termHash:
+            return list()
+
+        termPassageBegin = termIndex*self.passagePerTermNum
+
+        return [ passageIndex for passageIndex in self.termPassageView[ termPassageBegin:termPassageBegin + self.passagePerTermNum ] if passageIndex != NoPassage ]
+
+    @staticmethod
+    def write( forwardIndexFilePath : str, forwardRecordIterable : Iterable[Tuple[int, List[int], List[int], List[int]]],
+                    passageByteSize : int = PassageByteSize,
+                    passagePerTermNum : int = PassagePerTermNum ):
+        ''' This function writes forward index from (docId, passage offset
+            list, term hash list, term passage list) records, docIds must be
+            dense and in order
+        '''
+
+        #   Initialize start arrays with array beginning
+        passageStartArray = array.array( OffsetTypeCode, [ 0 ] )
+        termStartArray = array.array( OffsetTypeCode, [ 0 ] )
+        passageOffsetArray = array.array( OffsetTypeCode )
+        termHashArray = array.array( TermTypeCode )
+        termPassageArray = array.array( TermTypeCode )
+
+        for i, ( docId, passageOffsetList, termHashList, termPassageList ) in enumerate( forwardRecordIterable ):
+            if docId != i:
+                raise ValueError( 'write() - DocId {} is not dense, expect {}.'.format( docId, i ) )
+            passageOffsetArray.extend( passageOffsetList )
+            termHashArray.extend( termHashList )
+            termPassageArray.extend( termPassageList )
+            passageStartArray.append( len(passageOffsetArray) )
+            termStartArray.append( len(termHashArray) )
+
+        numDoc = len(passageStartArray) - 1
+
+        with open( forwardIndexFilePath, 'wb' ) as forwardIndexFile:
+            forwardIndexFile.write( struct.pack( ForwardIndexHeaderFormat, ForwardIndexMagic, ForwardIndexVersion, passageByteSize, passagePerTermNum, numDoc ) )
+            forwardIndexFile.write( passageStartArray.tobytes() )
+            forwardIndexFile.write( termStartArray.tobytes() )
+            forwardIndexFile.write( passageOffsetArray.tobytes() )
+            forwardIndexFile.write( termHashArray.tobytes() )
+            forwardIndexFile.write( termPassageArray.tobytes() )
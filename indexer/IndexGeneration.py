@@ -0,0 +1,101 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import threading
+from typing import Optional, List
+
+from .Indexer import Indexer
+from .IndexManifest import IndexManifest
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class IndexGeneration(object):
+    ''' This class holds an indexer loaded from one published index
+        generation and counts its users. Once a newer generation replaces
+        it and the last user releases it, its files are closed and its
+        memory is dropped.
+    '''
+
+    def __init__( self, generationDir : str, indexManifest : IndexManifest, indexer : Indexer ):
+        self.generationDir = generationDir
+        self.generationName = os.path.basename( os.path.normpath( generationDir ) )
+        self.indexManifest = indexManifest
+        self.indexer = indexer
+        self.refCount = 0
+        self.isRetired = False
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def load( generationDir : str, indexManifest : IndexManifest, fileKindList : List[str], numProcess : Optional[int] = 1 ) -> 'IndexGeneration':
+        ''' This function loads given kinds of index files the generation
+            has been built with
+        '''
+
+        indexer = Indexer()
+        indexer.readFromGenerationDir( generationDir, indexManifest, fileKindList, numProcess=numProcess )
+
+        return IndexGeneration( generationDir, indexManifest, indexer )
+
+    def acquire( self ) -> 'IndexGeneration':
+        ''' This function registers a user of this generation
+        '''
+
+        with self.lock:
+            if self.indexer is None:
+                raise ValueError( 'acquire() - Index generation {} has been released.'.format( self.generationName ) )
+            self.refCount += 1
+
+        return self
+
+    def release( self ):
+        ''' This function unregisters a user, the last user of a retired
+            generation frees it
+        '''
+
+        with self.lock:
+            self.refCount -= 1
+            isFree = self.isRetired and self.refCount == 0
+
+        if isFree:
+            self.close()
+
+    def retire( self ):
+        ''' This function marks generation as replaced, it is freed right
+            away if nobody uses it
+        '''
+
+        with self.lock:
+            self.isRetired = True
+            isFree = self.refCount == 0
+
+        if isFree:
+            self.close()
+
+    def close( self ):
+        ''' This function closes memory-mapped files and drops the indexer
+        '''
+
+        with self.lock:
+            indexer = self.indexer
+            self.indexer = None
+
+        if indexer is not None:
+            indexer.close()
+
+    def __enter__( self ) -> 'IndexGeneration':
+        return self
+
+    def __exit__( self, excType, excValue, traceback ):
+        self.release()
@@ -0,0 +1,135 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import json
+from typing import Optional, List, Dict, Tuple
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+JournalVersion = 1
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class IndexJournal(object):
+    ''' This class is an append-only log of completed indexing steps, one
+        json entry per line after a header line holding the key of the
+        build the steps belong to. An entry is on disk before append()
+        returns, so after a crash the journal tells which work survived.
+        A torn last line is ignored.
+    '''
+
+    def __init__( self, journalFilePath : str, buildKey : str ):
+        self.journalFilePath = journalFilePath
+        self.buildKey = buildKey
+        self.journalFile = None
+
+    def readValidEntryList( self ) -> Optional[Tuple[List[Dict], int]]:
+        ''' This function reads entries of this build and byte size of the
+            valid journal prefix, or returns None if there is no journal of
+            this build
+        '''
+
+        if not os.path.exists( self.journalFilePath ):
+            return None
+
+        entryList = list()
+        validByteSize = 0
+
+        with open( self.journalFilePath, 'rb' ) as journalFile:
+            for i, line in enumerate( journalFile ):
+
+                #   Stop at torn line of an interrupted append
+                if not line.endswith( b'\n' ):
+                    break
+                try:
+                    entry = json.loads( line.decode( 'utf-8' ) )
+                except ValueError:
+                    break
+
+                if i == 0:
+                    if entry.get( 'version' ) != JournalVersion or entry.get( 'buildKey' ) != self.buildKey:
+                        return None
+                else:
+                    entryList.append( entry )
+
+                validByteSize += len(line)
+
+        if validByteSize == 0:
+            return None
+
+        return entryList, validByteSize
+
+    def read( self ) -> List[Dict]:
+        ''' This function reads entries of this build, empty if journal
+            belongs to another build or does not exist
+        '''
+
+        result = self.readValidEntryList()
+
+        return result[0] if result is not None else list()
+
+    def open( self, isResume : Optional[bool] = False ) -> List[Dict]:
+        ''' This function opens journal for appending and returns entries
+            kept from a previous run of this build if resuming, otherwise
+            journal is started afresh
+        '''
+
+        result = self.readValidEntryList() if isResume else None
+
+        if result is None:
+            self.journalFile = open( self.journalFilePath, 'wb' )
+            self.writeLine( { 'version': JournalVersion, 'buildKey': self.buildKey } )
+            return list()
+
+        entryList, validByteSize = result
+
+        #   Drop torn tail before appending after it
+        self.journalFile = open( self.journalFilePath, 'r+b' )
+        self.journalFile.truncate( validByteSize )
+        self.journalFile.seek( validByteSize )
+
+        return entryList
+
+    def writeLine( self, entry : Dict ):
+        ''' This function writes one entry line and flushes it to disk
+        '''
+
+        self.journalFile.write( ( json.dumps( entry, sort_keys=True ) + '\n' ).encode( 'utf-8' ) )
+        self.journalFile.flush()
+        os.fsync( self.journalFile.fileno() )
+
+    def append( self, entry : Dict ):
+        ''' This function records a completed step
+        '''
+
+        if self.journalFile is None:
+            raise ValueError( 'append() - Journal {} is not open.'.format( self.journalFilePath ) )
+
+        self.writeLine( entry )
+
+    def close( self ):
+        ''' This function closes journal file
+        '''
+
+        if self.journalFile is not None:
+            self.journalFile.close()
+            self.journalFile = None
+
+    def remove( self ):
+        ''' This function closes and deletes journal once the build is done
+        '''
+
+        self.close()
+
+        if os.path.exists( self.journalFilePath ):
+            os.remove( self.journalFilePath )
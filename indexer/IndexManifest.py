@@ -0,0 +1,336 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+from typing import Optional, Dict, List, Tuple
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   Bumped whenever layout of index files or manifest changes
+ManifestFormatVersion = 2
+
+#   NOTE -  An index directory holds one sub directory per index generation
+#           and a CURRENT file naming the published one:
+#               index/CURRENT
+#               index/gen_000001/manifest.json
+#               index/gen_000001/<segment files>
+#           A generation is built in a staging directory, renamed into
+#           place once complete, then published by atomically replacing
+#           CURRENT. Readers resolve CURRENT once and only ever see a
+#           complete generation.
+ManifestFileName = 'manifest.json'
+CurrentFileName = 'CURRENT'
+GenerationDirNameFormat = 'gen_{:06d}'
+GenerationDirNamePattern = r'^gen_([0-9]+)$'
+StagingDirSuffix = '.staging'
+TemporaryFileSuffix = '.tmp'
+
+#   Number of published generations kept for searchers still using them
+KeepGenerationNum = 2
+
+ChecksumChunkSize = 1 << 20
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def computeFileChecksum( filePath : str ) -> str:
+    ''' This function computes sha256 hex digest of a file
+    '''
+
+    fileChecksum = hashlib.sha256()
+
+    with open( filePath, 'rb' ) as file:
+        for chunk in iter( lambda: file.read( ChecksumChunkSize ), b'' ):
+            fileChecksum.update( chunk )
+
+    return fileChecksum.hexdigest()
+
+def computeDictChecksum( dictionary : Dict ) -> str:
+    ''' This function computes sha256 hex digest of canonical json form of
+        a dictionary
+    '''
+
+    return hashlib.sha256( json.dumps( dictionary, sort_keys=True ).encode( 'utf-8' ) ).hexdigest()
+
+def syncFile( filePath : str ):
+    ''' This function flushes a file, or the entries of a directory, to
+        disk
+    '''
+
+    fileDescriptor = os.open( filePath, os.O_RDONLY )
+    try:
+        os.fsync( fileDescriptor )
+    finally:
+        os.close( fileDescriptor )
+
+def writeFileAtomically( filePath : str, content : str ):
+    ''' This function writes text file under temporary name and renames
+        it into place, so readers see either the old or the new content
+    '''
+
+    temporaryFilePath = filePath + TemporaryFileSuffix
+
+    with open( temporaryFilePath, 'w', encoding='utf-8' ) as temporaryFile:
+        temporaryFile.write( content )
+        temporaryFile.flush()
+        os.fsync( temporaryFile.fileno() )
+
+    os.replace( temporaryFilePath, filePath )
+
+def getGenerationIdList( indexDir : str ) -> List[int]:
+    ''' This function lists ids of complete generations in index directory
+    '''
+
+    generationIdList = list()
+
+    if not os.path.isdir( indexDir ):
+        return generationIdList
+
+    with os.scandir( indexDir ) as entryIterator:
+        for entry in entryIterator:
+            matched = re.match( GenerationDirNamePattern, entry.name )
+            if matched and entry.is_dir():
+                generationIdList.append( int(matched.group(1)) )
+
+    return sorted( generationIdList )
+
+def createStagingDir( indexDir : str, isResume : Optional[bool] = False ) -> Tuple[int, str]:
+    ''' This function creates staging directory for the next generation
+        and returns its generation id and path. If resume flag is set,
+        staging directory of an interrupted build is kept.
+    '''
+
+    os.makedirs( indexDir, exist_ok=True )
+
+    generationId = max( getGenerationIdList( indexDir ), default=0 ) + 1
+    stagingDir = os.path.join( indexDir, GenerationDirNameFormat.format( generationId ) + StagingDirSuffix )
+
+    if isResume and os.path.isdir( stagingDir ):
+        return generationId, stagingDir
+
+    #   Remove leftover of an interrupted build
+    if os.path.exists( stagingDir ):
+        shutil.rmtree( stagingDir )
+
+    os.makedirs( stagingDir )
+
+    return generationId, stagingDir
+
+def publishGeneration( indexDir : str, generationId : int, indexManifest : 'IndexManifest', keepGenerationNum : Optional[int] = KeepGenerationNum ) -> str:
+    ''' This function checksums segment files of staged generation, writes
+        its manifest, moves it into place and points CURRENT to it. Older
+        generations beyond the number kept are removed. Returns published
+        generation directory.
+    '''
+
+    generationDirName = GenerationDirNameFormat.format( generationId )
+    stagingDir = os.path.join( indexDir, generationDirName + StagingDirSuffix )
+    generationDir = os.path.join( indexDir, generationDirName )
+
+    #   Record segment sizes and checksums, and flush segments to disk
+    indexManifest.computeSegmentChecksum( stagingDir )
+    for fileName in indexManifest.getFileNameList():
+        syncFile( os.path.join( stagingDir, fileName ) )
+
+    writeFileAtomically( os.path.join( stagingDir, ManifestFileName ), indexManifest.toJson() )
+    syncFile( stagingDir )
+
+    #   Move complete generation into place, then publish it
+    #   NOTE - Renames only last a crash once the directory holding them is
+    #          flushed, so CURRENT never names a generation lost on disk and
+    #          old generations are pruned only after CURRENT moved away
+    os.rename( stagingDir, generationDir )
+    syncFile( indexDir )
+    writeFileAtomically( os.path.join( indexDir, CurrentFileName ), generationDirName + '\n' )
+    syncFile( indexDir )
+
+    #   Remove generations no longer published
+    for oldGenerationId in getGenerationIdList( indexDir )[:-keepGenerationNum]:
+        shutil.rmtree( os.path.join( indexDir, GenerationDirNameFormat.format( oldGenerationId ) ), ignore_errors=True )
+
+    return generationDir
+
+def getCurrentGenerationDir( indexDir : str ) -> str:
+    ''' This function resolves directory of currently published generation
+    '''
+
+    currentFilePath = os.path.join( indexDir, CurrentFileName )
+
+    if not os.path.exists( currentFilePath ):
+        raise ValueError( 'getCurrentGenerationDir() - No index generation has been published in {}.'.format( indexDir ) )
+
+    with open( currentFilePath, 'r', encoding='utf-8' ) as currentFile:
+        generationDirName = currentFile.read().strip()
+
+    if not re.match( GenerationDirNamePattern, generationDirName ):
+        raise ValueError( 'getCurrentGenerationDir() - {} does not name an index generation.'.format( currentFilePath ) )
+
+    return os.path.join( indexDir, generationDirName )
+
+def readCurrentGeneration( indexDir : str, isVerifyChecksum : Optional[bool] = False ) -> Tuple[str, 'IndexManifest']:
+    ''' This function resolves currently published generation and reads
+        its manifest. Segment sizes are always verified, checksums only on
+        request since they read every segment.
+    '''
+
+    generationDir = getCurrentGenerationDir( indexDir )
+
+    indexManifest = IndexManifest.read( os.path.join( generationDir, ManifestFileName ) )
+    indexManifest.verify( generationDir, isVerifyChecksum=isVerifyChecksum )
+
+    return generationDir, indexManifest
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class IndexFileKind(object):
+    INDEX = 'index'
+    INVERTED_INDEX = 'invertedIndex'
+    DOC_ID_INDEX = 'docIdIndex'
+    DOC_ID_STORE = 'docIdStore'
+    FORWARD_INDEX = 'forwardIndex'
+    TERM_DICTIONARY = 'termDictionary'
+    TIERED_INDEX = 'tieredIndex'
+    IMPACT_ORDERED_INDEX = 'impactOrderedIndex'
+    SIMILARITY_INDEX = 'similarityIndex'
+    VOCABULARY_FILTER = 'vocabularyFilter'
+    TERM_FREQ_INDEX = 'termFreqIndex'
+
+class IndexManifest(object):
+    ''' This class describes an index generation, i.e. everything a
+        searcher needs without touching the raw corpus: text processing
+        options the index was built with, hash of the indexed file list,
+        corpus statistics and segment files with their sizes and
+        checksums. The manifest carries a checksum of its own content.
+    '''
+
+    def __init__( self, numDoc : int,
+                        tokenizerOption : int,
+                        normalizerOption : int,
+                        fileListHash : str,
+                        fileNameDict : Dict[str, str],
+                        statDict : Optional[Dict] = None,
+                        formatVersion : Optional[int] = ManifestFormatVersion,
+                        createdTime : Optional[float] = None ):
+        self.numDoc = numDoc
+        self.tokenizerOption = tokenizerOption
+        self.normalizerOption = normalizerOption
+        self.fileListHash = fileListHash
+        self.statDict = statDict if statDict is not None else dict()
+        self.formatVersion = formatVersion
+        self.createdTime = createdTime if createdTime is not None else time.time()
+
+        #   Segment file kind to file name, byte size and checksum
+        self.segmentDict = { fileKind: { 'fileName': fileName } for fileKind, fileName in fileNameDict.items() }
+
+    def getFileName( self, fileKind : str ) -> Optional[str]:
+        ''' This function gets name of given kind of segment file, or None
+            if the index has not been built with it
+        '''
+
+        segment = self.segmentDict.get( fileKind )
+
+        return segment['fileName'] if segment is not None else None
+
+    def getFileNameList( self ) -> List[str]:
+        ''' This function lists names of all segment files
+        '''
+
+        return [ segment['fileName'] for segment in self.segmentDict.values() ]
+
+    def computeSegmentChecksum( self, generationDir : str ):
+        ''' This function records byte size and checksum of every segment
+            file in given generation directory
+        '''
+
+        for segment in self.segmentDict.values():
+            segmentFilePath = os.path.join( generationDir, segment['fileName'] )
+            segment['byteSize'] = os.path.getsize( segmentFilePath )
+            segment['sha256'] = computeFileChecksum( segmentFilePath )
+
+    def verify( self, generationDir : str, isVerifyChecksum : Optional[bool] = False ):
+        ''' This function checks segment files in given generation directory
+            against manifest
+        '''
+
+        for fileKind, segment in self.segmentDict.items():
+
+            segmentFilePath = os.path.join( generationDir, segment['fileName'] )
+
+            if not os.path.exists( segmentFilePath ):
+                raise ValueError( 'verify() - Cannot find {} segment at {}.'.format( fileKind, segmentFilePath ) )
+
+            if os.path.getsize( segmentFilePath ) != segment.get( 'byteSize' ):
+                raise ValueError( 'verify() - Size of {} segment at {} does not match manifest.'.format( fileKind, segmentFilePath ) )
+
+            if isVerifyChecksum and computeFileChecksum( segmentFilePath ) != segment.get( 'sha256' ):
+                raise ValueError( 'verify() - Checksum of {} segment at {} does not match manifest.'.format( fileKind, segmentFilePath ) )
+
+    def toDict( self ) -> Dict:
+        ''' This function returns manifest as plain dictionary
+        '''
+
+        return { 'formatVersion': self.formatVersion,
+                    'createdTime': self.createdTime,
+                    'numDoc': self.numDoc,
+                    'tokenizerOption': self.tokenizerOption,
+                    'normalizerOption': self.normalizerOption,
+                    'fileListHash': self.fileListHash,
+                    'statDict': self.statDict,
+                    'segmentDict': self.segmentDict }
+
+    def toJson( self ) -> str:
+        ''' This function formats manifest and its checksum as json
+        '''
+
+        manifestDict = self.toDict()
+        manifestDict['manifestChecksum'] = computeDictChecksum( self.toDict() )
+
+        return json.dumps( manifestDict, indent=4, sort_keys=True )
+
+    def write( self, manifestFilePath : str ):
+        ''' This function writes manifest as json file atomically
+        '''
+
+        writeFileAtomically( manifestFilePath, self.toJson() )
+
+    @staticmethod
+    def read( manifestFilePath : str ) -> 'IndexManifest':
+        ''' This function reads manifest written by write() and checks its
+            format version and checksum
+        '''
+
+        if not os.path.exists( manifestFilePath ):
+            raise ValueError( 'read() - Cannot find index manifest at {}.'.format( manifestFilePath ) )
+
+        with open( manifestFilePath, 'r', encoding='utf-8' ) as manifestFile:
+            manifestDict = json.load( manifestFile )
+
+        if manifestDict.get( 'formatVersion' ) != ManifestFormatVersion:
+            raise ValueError( 'read() - Index at {} has format version {}, expect {}. Regenerate the index.'.format( manifestFilePath, manifestDict.get( 'formatVersion' ), ManifestFormatVersion ) )
+
+        manifestChecksum = manifestDict.pop( 'manifestChecksum', None )
+        if manifestChecksum != computeDictChecksum( manifestDict ):
+            raise ValueError( 'read() - Index manifest at {} is corrupted.'.format( manifestFilePath ) )
+
+        indexManifest = IndexManifest( manifestDict['numDoc'],
+                                        manifestDict['tokenizerOption'],
+                                        manifestDict['normalizerOption'],
+                                        manifestDict['fileListHash'],
+                                        dict(),
+                                        statDict=manifestDict['statDict'],
+                                        formatVersion=manifestDict['formatVersion'],
+                                        createdTime=manifestDict['createdTime'] )
+        indexManifest.segmentDict = manifestDict['segmentDict']
+
+        return indexManifest
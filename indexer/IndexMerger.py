@@ -0,0 +1,364 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import gzip
+import math
+import time
+import heapq
+import pickle
+import shutil
+import hashlib
+import itertools
+import contextlib
+from typing import Optional, Iterator, List, Dict, Tuple
+from textprocessor.TextProcessor import writeIntermediateRun, PostingEntryByteSize, RunCompressLevel
+from metrics.Metrics import metrics
+from .PostingFile import formatPostingLine, iterPostingDict
+from .TermDictionary import TermDictionary
+from .Indexer import isPickleFileName
+from .DocIdStore import DocIdStore
+from .BloomFilter import BloomFilter
+from .IndexManifest import IndexManifest, IndexFileKind, TemporaryFileSuffix
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   Bytes of merged postings held before spilling a run sorted by docId
+MergeBufferBudget = 128 << 20
+
+#   NOTE -  Merging goes through two kinds of gzip compressed runs in work
+#           directory. Each source term frequency index, or index if it has
+#           none, is written as one run sorted by term with docIds shifted
+#           by its offset, since its termIds are already in term order.
+#           Merged postings are then spilled as runs sorted by docId, which
+#           are merged into normalized document vectors of inverted index.
+SourceRunFileNameFormat = 'source_run_{sourceId}.txt.gz'
+DocIdRunFileNameFormat = 'docId_run_{runId}.txt.gz'
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def recoverTermFreq( weight : float, inverseDocFreq : float ) -> Optional[int]:
+    ''' This function recovers term frequency of a tf-idf weighted posting,
+        or returns None if inverse document frequency is zero, i.e. the
+        term occurs in every document and all its weights are zero
+    '''
+
+    if inverseDocFreq <= 0:
+        return None
+
+    return max( 1, round( 10**( weight/inverseDocFreq ) - 1 ) )
+
+def writeSourceRun( sourceRunFilePath : str, postingIterator : Iterator[Tuple[int, Dict]], termDictionary : TermDictionary, numIndexedDoc : int, docIdOffset : int, isTermFreq : Optional[bool] = False ) -> int:
+    ''' This function writes termId ordered postings of a source index as
+        term frequencies of shifted docIds, in term order. Postings are
+        either term frequencies or tf-idf weights they are recovered from.
+        Returns number of postings whose term frequency could not be
+        recovered and is taken as one.
+    '''
+
+    numApproximatePosting = 0
+    lastTermId = -1
+
+    temporaryFilePath = sourceRunFilePath + TemporaryFileSuffix
+
+    with gzip.open( temporaryFilePath, 'wt', encoding='utf-8', compresslevel=RunCompressLevel ) as sourceRunFile:
+        for termId, docIdToWeightDict in postingIterator:
+
+            #   TermIds are in term order, so the run is sorted by term
+            if termId <= lastTermId or termId >= len(termDictionary):
+                raise ValueError( 'writeSourceRun() - TermId {} of index is out of order or range.'.format( termId ) )
+            lastTermId = termId
+
+            if not docIdToWeightDict:
+                continue
+
+            term = termDictionary.getTerm( termId )
+
+            if isTermFreq:
+                sourceRunFile.write( formatPostingLine( term, { docId + docIdOffset: termFreq for docId, termFreq in docIdToWeightDict.items() } ) )
+                continue
+
+            inverseDocFreq = math.log10( numIndexedDoc/len(docIdToWeightDict) )
+
+            docIdToTermFreqDict = dict()
+            for docId, weight in docIdToWeightDict.items():
+                termFreq = recoverTermFreq( weight, inverseDocFreq )
+                if termFreq is None:
+                    termFreq = 1
+                    numApproximatePosting += 1
+                docIdToTermFreqDict[ docId + docIdOffset ] = termFreq
+
+            sourceRunFile.write( formatPostingLine( term, docIdToTermFreqDict ) )
+
+    os.replace( temporaryFilePath, sourceRunFilePath )
+
+    return numApproximatePosting
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class IndexMerger(object):
+    ''' This class merges independently built index generations into one,
+        as if their corpora had been indexed together in the given order.
+        DocIds of each source are shifted by the number of documents before
+        it, document frequency and idf are recomputed over all of them, and
+        merged postings are streamed to text posting files. Memory holds
+        the merged term dictionary, a name and vector size per document and
+        at most buffer budget of postings. Sources are streamed term by
+        term, except a pickled index of a source without term frequency
+        index, which is loaded whole while its run is written, so the
+        largest such source index adds to the bound.
+    '''
+
+    def __init__( self, workDir : str, bufferBudget : Optional[int] = MergeBufferBudget ):
+        self.workDir = workDir
+        self.bufferBudget = bufferBudget
+
+    def merge( self, sourceList : List[Tuple[str, IndexManifest]], outputDir : str, fileNameDict : Dict[str, str] ) -> Dict:
+        ''' This function merges (generation directory, manifest) sources
+            into given kinds of index files in output directory, index and
+            inverted index are written as text posting files. Returns merge
+            statistics.
+        '''
+
+        if len(sourceList) == 0:
+            raise ValueError( 'merge() - No index to merge.' )
+
+        for generationDir, indexManifest in sourceList:
+            if ( indexManifest.tokenizerOption, indexManifest.normalizerOption ) != ( sourceList[0][1].tokenizerOption, sourceList[0][1].normalizerOption ):
+                raise ValueError( 'merge() - Index at {} has been built with other text processing options.'.format( generationDir ) )
+            for fileKind in ( IndexFileKind.INDEX, IndexFileKind.DOC_ID_STORE, IndexFileKind.TERM_DICTIONARY ):
+                if indexManifest.getFileName( fileKind ) is None:
+                    raise ValueError( 'merge() - Index at {} has not been built with {}.'.format( generationDir, fileKind ) )
+
+        #   Offset table, docIds of source i start after all documents before it
+        docIdOffsetList = list( itertools.accumulate( [ 0 ] + [ indexManifest.numDoc for _, indexManifest in sourceList[:-1] ] ) )
+        numDoc = sum( indexManifest.numDoc for _, indexManifest in sourceList )
+
+        #   Near duplicates have no postings and do not count towards idf
+        numIndexedDoc = sum( indexManifest.numDoc - indexManifest.statDict.get( 'numDuplicate', 0 ) for _, indexManifest in sourceList )
+
+        if os.path.exists( self.workDir ):
+            shutil.rmtree( self.workDir )
+        os.makedirs( self.workDir )
+
+        try:
+            self.mergeDocIdStore( sourceList, outputDir, fileNameDict )
+
+            numApproximatePosting = 0
+            for sourceId, ( generationDir, indexManifest ) in enumerate( sourceList ):
+                numApproximatePosting += self.writeSourceRun( sourceId, generationDir, indexManifest, docIdOffsetList[sourceId] )
+
+            #   Merged generation keeps term frequencies to be merged again
+            termFreqIndexFilePath = os.path.join( outputDir, fileNameDict[ IndexFileKind.TERM_FREQ_INDEX ] ) if IndexFileKind.TERM_FREQ_INDEX in fileNameDict else None
+
+            termDictionary, docVectorSizeList, numPosting, numDocIdRun = self.mergeSourceRun( len(sourceList), numDoc, numIndexedDoc, os.path.join( outputDir, fileNameDict[ IndexFileKind.INDEX ] ), termFreqIndexFilePath=termFreqIndexFilePath )
+            termDictionary.write( os.path.join( outputDir, fileNameDict[ IndexFileKind.TERM_DICTIONARY ] ) )
+
+            #   Vocabulary filter is rebuilt over merged terms
+            if IndexFileKind.VOCABULARY_FILTER in fileNameDict:
+                BloomFilter.fromKeys( ( term for _, term in termDictionary.iterTerms() ), len(termDictionary) ).write( os.path.join( outputDir, fileNameDict[ IndexFileKind.VOCABULARY_FILTER ] ) )
+
+            self.mergeDocIdRun( numDocIdRun, numDoc, docVectorSizeList, os.path.join( outputDir, fileNameDict[ IndexFileKind.INVERTED_INDEX ] ) )
+
+        finally:
+            shutil.rmtree( self.workDir, ignore_errors=True )
+
+        return { 'numDoc': numDoc,
+                    'numIndexedDoc': numIndexedDoc,
+                    'numTerm': len(termDictionary),
+                    'numPosting': numPosting,
+                    'numApproximatePosting': numApproximatePosting,
+                    'numDocIdRun': numDocIdRun }
+
+    def mergeDocIdStore( self, sourceList : List[Tuple[str, IndexManifest]], outputDir : str, fileNameDict : Dict[str, str] ):
+        ''' This function concatenates document names and byte sizes of
+            sources into docId index and docId store
+        '''
+
+        docIdToDocNameTupleList = list()
+        byteSizeList = list()
+
+        for generationDir, indexManifest in sourceList:
+            docIdStore = DocIdStore( os.path.join( generationDir, indexManifest.getFileName( IndexFileKind.DOC_ID_STORE ) ) )
+            try:
+                for docId, docName in docIdStore.iterDocName():
+                    docIdToDocNameTupleList.append( ( len(docIdToDocNameTupleList), docName ) )
+                    byteSizeList.append( docIdStore.getDocByteSize( docId ) )
+            finally:
+                docIdStore.close()
+
+        with open( os.path.join( outputDir, fileNameDict[ IndexFileKind.DOC_ID_INDEX ] ), 'wb' ) as docIdIndexFile:
+            pickle.dump( docIdToDocNameTupleList, docIdIndexFile )
+
+        DocIdStore.write( os.path.join( outputDir, fileNameDict[ IndexFileKind.DOC_ID_STORE ] ), docIdToDocNameTupleList, byteSizeList )
+
+    def writeSourceRun( self, sourceId : int, generationDir : str, indexManifest : IndexManifest, docIdOffset : int ) -> int:
+        ''' This function writes one source index as a run of term
+            frequencies, returns number of approximate postings. Term
+            frequency index is used if the source has one, otherwise term
+            frequencies are recovered from its index. A text posting index
+            is streamed term by term, a pickled one is loaded whole.
+        '''
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        termDictionary = TermDictionary.read( os.path.join( generationDir, indexManifest.getFileName( IndexFileKind.TERM_DICTIONARY ) ) )
+
+        #   Sources built before term frequency index only have weights
+        isTermFreq = indexManifest.getFileName( IndexFileKind.TERM_FREQ_INDEX ) is not None
+        indexFileName = indexManifest.getFileName( IndexFileKind.TERM_FREQ_INDEX if isTermFreq else IndexFileKind.INDEX )
+        indexFilePath = os.path.join( generationDir, indexFileName )
+        sourceRunFilePath = os.path.join( self.workDir, SourceRunFileNameFormat.format( sourceId=sourceId ) )
+
+        numIndexedDoc = indexManifest.numDoc - indexManifest.statDict.get( 'numDuplicate', 0 )
+
+        try:
+            if isPickleFileName( indexFileName ):
+                with open( indexFilePath, 'rb' ) as indexFile:
+                    index = pickle.load( indexFile )
+                numApproximatePosting = writeSourceRun( sourceRunFilePath, ( ( termId, index[termId] ) for termId in sorted( index.keys() ) ), termDictionary, numIndexedDoc, docIdOffset, isTermFreq=isTermFreq )
+            else:
+                with open( indexFilePath, 'r', encoding='utf-8' ) as indexFile:
+                    numApproximatePosting = writeSourceRun( sourceRunFilePath, iterPostingDict( indexFile, keyType=int, subKeyType=int, valueType=int if isTermFreq else float ), termDictionary, numIndexedDoc, docIdOffset, isTermFreq=isTermFreq )
+        except ( OSError, EOFError, pickle.UnpicklingError, ValueError ) as error:
+            raise ValueError( 'writeSourceRun() - Cannot read index at {}: {}.'.format( indexFilePath, error ) )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'read', startTime )
+            metrics.recordMemory( 'merge' )
+
+        return numApproximatePosting
+
+    def mergeSourceRun( self, numSource : int, numDoc : int, numIndexedDoc : int, indexFilePath : str, termFreqIndexFilePath : Optional[str] = None ) -> Tuple[TermDictionary, List[float], int, int]:
+        ''' This function merges source runs by term, writes tf-idf weighted
+            postings of each term to index file, and term frequencies to
+            term frequency index file if given, as soon as it is complete,
+            and spills them by docId within buffer budget. Returns term
+            dictionary, squared document vector sizes, number of postings
+            and number of docId runs.
+        '''
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        termDictionary = TermDictionary()
+        docVectorSizeList = [ 0.0 ]*numDoc
+        numPosting = 0
+        numDocIdRun = 0
+
+        #   DocId to termId to weight postings waiting to be spilled
+        docIdToTermIdToWeightDict = dict()
+        bufferByteSize = 0
+
+        with contextlib.ExitStack() as exitStack:
+
+            sourceRunIteratorList = [ iterPostingDict( exitStack.enter_context( gzip.open( os.path.join( self.workDir, SourceRunFileNameFormat.format( sourceId=sourceId ) ), 'rt', encoding='utf-8' ) ), keyType=str, subKeyType=int, valueType=int ) for sourceId in range( numSource ) ]
+            indexFile = exitStack.enter_context( open( indexFilePath, 'w', encoding='utf-8' ) )
+            termFreqIndexFile = exitStack.enter_context( open( termFreqIndexFilePath, 'w', encoding='utf-8' ) ) if termFreqIndexFilePath is not None else None
+
+            for term, postingGroup in itertools.groupby( heapq.merge( *sourceRunIteratorList, key=lambda posting: posting[0] ), key=lambda posting: posting[0] ):
+
+                #   Sources hold disjoint docId ranges in order
+                docIdToTermFreqDict = dict()
+                for _, sourceDocIdToTermFreqDict in postingGroup:
+                    docIdToTermFreqDict.update( sourceDocIdToTermFreqDict )
+
+                termId = termDictionary.appendTerm( term )
+
+                #   Weight postings with global document frequency
+                docFreq = numIndexedDoc/len(docIdToTermFreqDict)
+                docIdToWeightDict = { docId: math.log10( 1 + termFreq )*math.log10( docFreq ) for docId, termFreq in docIdToTermFreqDict.items() }
+
+                indexFile.write( formatPostingLine( termId, docIdToWeightDict ) )
+                if termFreqIndexFile is not None:
+                    termFreqIndexFile.write( formatPostingLine( termId, docIdToTermFreqDict ) )
+
+                for docId, weight in docIdToWeightDict.items():
+                    docVectorSizeList[docId] += weight**2
+                    if docId not in docIdToTermIdToWeightDict:
+                        docIdToTermIdToWeightDict[docId] = dict()
+                    docIdToTermIdToWeightDict[docId][termId] = weight
+
+                numPosting += len(docIdToWeightDict)
+                bufferByteSize += len(docIdToWeightDict)*PostingEntryByteSize
+
+                if bufferByteSize >= self.bufferBudget:
+                    writeIntermediateRun( os.path.join( self.workDir, DocIdRunFileNameFormat.format( runId=numDocIdRun ) ), docIdToTermIdToWeightDict )
+                    numDocIdRun += 1
+                    docIdToTermIdToWeightDict = dict()
+                    bufferByteSize = 0
+
+        if len(docIdToTermIdToWeightDict) > 0:
+            writeIntermediateRun( os.path.join( self.workDir, DocIdRunFileNameFormat.format( runId=numDocIdRun ) ), docIdToTermIdToWeightDict )
+            numDocIdRun += 1
+
+        termDictionary.finalize()
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'merge', startTime )
+            metrics.incrementCounter( 'runs_merged', numSource )
+            metrics.incrementCounter( 'terms_merged', len(termDictionary) )
+            metrics.recordMemory( 'merge' )
+
+        return termDictionary, docVectorSizeList, numPosting, numDocIdRun
+
+    def mergeDocIdRun( self, numDocIdRun : int, numDoc : int, docVectorSizeList : List[float], invertedIndexFilePath : str ):
+        ''' This function merges docId runs into normalized document vectors
+            written to inverted index file in docId order, a document
+            without postings gets an empty vector
+        '''
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        with contextlib.ExitStack() as exitStack:
+
+            #   NOTE -  writeIntermediateRun() sorts keys, docIds are ints
+            #           so runs are in numeric docId order
+            docIdRunIteratorList = [ iterPostingDict( exitStack.enter_context( gzip.open( os.path.join( self.workDir, DocIdRunFileNameFormat.format( runId=runId ) ), 'rt', encoding='utf-8' ) ), keyType=int, subKeyType=int, valueType=float ) for runId in range( numDocIdRun ) ]
+            invertedIndexFile = exitStack.enter_context( open( invertedIndexFilePath, 'w', encoding='utf-8' ) )
+
+            docVectorIterator = itertools.groupby( heapq.merge( *docIdRunIteratorList, key=lambda posting: posting[0] ), key=lambda posting: posting[0] )
+            nextDocId, postingGroup = next( docVectorIterator, ( None, None ) )
+
+            for docId in range( numDoc ):
+
+                termIdToWeightDict = dict()
+
+                if docId == nextDocId:
+
+                    #   Runs are spilled in term order, so termIds of a
+                    #   document stay ascending across them
+                    for _, runTermIdToWeightDict in postingGroup:
+                        termIdToWeightDict.update( runTermIdToWeightDict )
+                    nextDocId, postingGroup = next( docVectorIterator, ( None, None ) )
+
+                    #   All weights are zero if every term occurs everywhere
+                    docVectorSize = math.sqrt( docVectorSizeList[docId] )
+                    if docVectorSize > 0:
+                        termIdToWeightDict = { termId: weight/docVectorSize for termId, weight in termIdToWeightDict.items() }
+
+                invertedIndexFile.write( formatPostingLine( docId, termIdToWeightDict ) )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'invert', startTime )
+
+    @staticmethod
+    def computeFileListHash( sourceList : List[Tuple[str, IndexManifest]] ) -> str:
+        ''' This function hashes file list hashes of sources in merge order
+        '''
+
+        fileListHash = hashlib.sha256()
+
+        for _, indexManifest in sourceList:
+            fileListHash.update( '{}\n'.format( indexManifest.fileListHash ).encode( 'utf-8' ) )
+
+        return fileListHash.hexdigest()
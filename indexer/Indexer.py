@@ -4,11 +4,25 @@
 
 import os
 import re
-import ast
+import gzip
 import math
+import time
+import heapq
 import pickle
-from typing import Optional, List, Dict
+import itertools
+import contextlib
+from typing import Optional, Iterator, List, Dict, Set, Tuple
 from textprocessor.TextProcessor import IntermediateIndexFileNameFormat
+from metrics.Metrics import metrics
+from .PostingFile import writePostingDict, iterPostingDict, iterDocIdList, readPostingDictParallel, formatTieredPostingLine, parseTieredPostingLine, formatImpactPostingLine, parseImpactPostingLine, ImpactFileHeaderFormat
+from .TermDictionary import TermDictionary
+from .DocIdStore import DocIdStore
+from .ForwardIndex import ForwardIndex
+from .DocIdReorderer import DocIdReorderer, ReorderMethod
+from .PostingCodec import measurePostingCompression, sampleIntersectionPairList
+from .SimilarityIndex import SimilarityIndex
+from .BloomFilter import BloomFilter
+from .IndexManifest import IndexManifest, IndexFileKind
 
 ##########################################################################
 #   GLOBAL
@@ -16,29 +30,110 @@ from textprocessor.TextProcessor import IntermediateIndexFileNameFormat
 
 IndexFileNameFormat = 'index.txt'
 
+#   Index files are pickled, unless written as text posting files, e.g. by
+#   index merger which streams them
+TextPostingFileExtension = '.txt'
+
+#   Number of highest weighted postings per term kept in top tier
+TopTierSize = 64
+
+#   Number of quantized impact levels, so an impact fits in a byte
+ImpactLevelNum = 255
+
 ##########################################################################
 #   HELPER
 ##########################################################################
 
-def mergeIntermediateIndex( intermediateIndexList : List ) -> Dict:
-    ''' This function merges intermediate indices into one intermediate index
+def mergeIntermediateRun( intermediateRunIteratorList : List[Iterator[Tuple[str, Dict]]], excludedDocIdSet : Optional[Set[int]] = None ) -> Tuple[TermDictionary, Dict]:
+    ''' This function merges intermediate runs sorted by term in a single
+        pass. Terms come out in sorted order, so each one is appended to
+        term dictionary right away and keyed by its termId. Postings of
+        excluded docIds are dropped, along with terms left without any.
     '''
 
-    assert(len(intermediateIndexList)>0)
+    termDictionary = TermDictionary()
+    termIdToDocIdToTermFreqDict = dict()
 
-    #   Get first intermediate index from list
-    mergedIntermediateIndex = intermediateIndexList[0]
+    mergedRunIterator = heapq.merge( *intermediateRunIteratorList, key=lambda posting: posting[0] )
 
-    #   Merge the left intermediate indices in list
-    for intermediateIndex in intermediateIndexList[1:]:
+    for term, postingGroup in itertools.groupby( mergedRunIterator, key=lambda posting: posting[0] ):
 
-        for term, docIdToTermFreqDict in intermediateIndex.items():
-            if term not in mergedIntermediateIndex:
-                mergedIntermediateIndex[term] = docIdToTermFreqDict
-            else:
-                mergedIntermediateIndex[term].update(docIdToTermFreqDict)
+        #   Runs hold disjoint documents of a term
+        docIdToTermFreqDict = dict()
+        for _, runDocIdToTermFreqDict in postingGroup:
+            docIdToTermFreqDict.update( runDocIdToTermFreqDict )
+
+        if excludedDocIdSet:
+            docIdToTermFreqDict = { docId: termFreq for docId, termFreq in docIdToTermFreqDict.items() if docId not in excludedDocIdSet }
+            if len(docIdToTermFreqDict) == 0:
+                continue
+
+        termIdToDocIdToTermFreqDict[ termDictionary.appendTerm( term ) ] = docIdToTermFreqDict
+
+    termDictionary.finalize()
+
+    return termDictionary, termIdToDocIdToTermFreqDict
+
+def isPickleFileName( fileName : str ) -> bool:
+    ''' This function tells pickled index file from text posting file by
+        its extension
+    '''
+
+    return os.path.splitext( fileName )[1] != TextPostingFileExtension
+
+def splitPostingTier( docIdToWeightDict : Dict, topTierSize : int, pruneWeightThreshold : float ) -> Tuple[List[Tuple[int, float]], Dict, float]:
+    ''' This function sorts postings of a term by weight, prunes those not
+        above threshold and splits them into top tier list and tail dictionary
+    '''
+
+    #   Sort postings by impact, drop negligible ones
+    postingList = sorted( [ (docId, weight) for docId, weight in docIdToWeightDict.items() if weight > pruneWeightThreshold ], key=lambda x: x[1], reverse=True )
+
+    topTierList = postingList[:topTierSize]
+    tailDict = dict( postingList[topTierSize:] )
+
+    #   Tail postings are in weight order, the first is the largest
+    tailMaxWeight = postingList[topTierSize][1] if len(postingList) > topTierSize else 0.0
+
+    return topTierList, tailDict, tailMaxWeight
+
+def transposeInvertedIndex( invertedIndex : Dict ) -> Dict:
+    ''' This function transposes normalized document vectors back into
+        termId to docId to weight postings
+    '''
+
+    termIdToDocIdToWeightDict = dict()
+
+    for docId, termIdToWeightDict in invertedIndex.items():
+        for termId, weight in termIdToWeightDict.items():
+            if termId not in termIdToDocIdToWeightDict:
+                termIdToDocIdToWeightDict[termId] = dict()
+            termIdToDocIdToWeightDict[termId][docId] = weight
+
+    return termIdToDocIdToWeightDict
+
+def quantizePostingImpact( docIdToWeightDict : Dict, impactScale : float ) -> List[Tuple[int, List[int]]]:
+    ''' This function quantizes weights of a term postings into integer
+        impacts and groups docIds by impact, highest impact first
+    '''
 
-    return mergedIntermediateIndex
+    #   Initialize impact to docId list dictionary
+    impactToDocIdListDict = dict()
+
+    for docId, weight in docIdToWeightDict.items():
+
+        #   Zero weight posting never changes a score
+        if weight <= 0:
+            continue
+
+        #   Any positive weight keeps at least the lowest impact
+        impact = max( 1, round( weight/impactScale ) )
+
+        if impact not in impactToDocIdListDict:
+            impactToDocIdListDict[impact] = list()
+        impactToDocIdListDict[impact].append( docId )
+
+    return [ ( impact, sorted( impactToDocIdListDict[impact] ) ) for impact in sorted( impactToDocIdListDict.keys(), reverse=True ) ]
 
 def normalizeInvertedIndex( invertedIndex : Dict ) -> Dict:
     ''' This function normalizes each document vector in tf-idf weighted
@@ -65,6 +160,14 @@ class Indexer(object):
         self.index = None
         self.invertedIndex = None
         self.docIdIndex = None
+        self.docIdStore = None
+        self.forwardIndex = None
+        self.termDictionary = None
+        self.tieredIndex = None
+        self.impactOrderedIndex = None
+        self.impactScale = None
+        self.similarityIndex = None
+        self.vocabularyFilter = None
 
     def readFromDocIdIndexDir( self, docIdIndexDir : str, docIdIndexFileName : str, isUsePickle : Optional[bool] = True ):
         ''' This function reads docId index from index directory
@@ -77,6 +180,9 @@ class Indexer(object):
         if not os.path.exists( docIdIndexFilePath ):
             raise ValueError('readFromDocIdIndexDir() - Cannot find docId index file at {}.'.format(docIdIndexFilePath))
 
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
         if isUsePickle:
 
             #   Read index file
@@ -87,12 +193,43 @@ class Indexer(object):
 
             #   Read index file
             with open( docIdIndexFilePath, 'r', encoding='utf-8' ) as docIdIndexFile:
-                serializedDocIdIndexStr = docIdIndexFile.read()
-                self.docIdIndex = dict(ast.literal_eval( serializedDocIdIndexStr ))
+                self.docIdIndex = dict(iterDocIdList( docIdIndexFile ))
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'read', startTime )
+
+    def readFromDocIdStoreDir( self, docIdStoreDir : str, docIdStoreFileName : str ):
+        ''' This function memory-maps docId store from index directory,
+            document names are decoded only when they are looked up
+        '''
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        self.docIdStore = DocIdStore( os.path.join( docIdStoreDir, docIdStoreFileName ) )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'read', startTime )
 
-    def readFromIntermediateIndexDir( self, intermediateIndexDir : str, intermediateIndexFileNameFormat : Optional[str] = IntermediateIndexFileNameFormat ):
-        ''' This function reads intermediate index from given directory and file name format then
-            merges them (if there're more than one) together
+    def readFromForwardIndexDir( self, forwardIndexDir : str, forwardIndexFileName : str ):
+        ''' This function memory-maps forward index of passages from index
+            directory for snippet generation
+        '''
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        self.forwardIndex = ForwardIndex( os.path.join( forwardIndexDir, forwardIndexFileName ) )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'read', startTime )
+
+    def readFromIntermediateIndexDir( self, intermediateIndexDir : str, intermediateIndexFileNameFormat : Optional[str] = IntermediateIndexFileNameFormat,
+                                            excludedDocIdSet : Optional[Set[int]] = None ):
+        ''' This function reads intermediate runs from given directory and file name format then
+            merges them together while streaming through them, so only the merged index is held
+            in memory. Merged index is keyed by termId of newly constructed term dictionary.
+            Postings of excluded docIds, e.g. near duplicates, are left out.
         '''
 
         #   Check if intermediate index directory exists
@@ -102,29 +239,55 @@ class Indexer(object):
         #   List all file inside intermediate index directory
         fileNameList = os.listdir( intermediateIndexDir )
 
-        #   Get only intermediate index file name from list
-        intermediateIndexFileNameList = [ fileName for fileName in fileNameList if re.match( intermediateIndexFileNameFormat.format( **{'id':'([0-9]+)'} ), fileName ) ]
+        #   Get only intermediate run file name from list, in worker and run
+        #   order so merged postings of a term are in docId order
+        #   NOTE - Anchored, so a run still being written under temporary name is left out
+        intermediateIndexFileNamePattern = '^{}$'.format( intermediateIndexFileNameFormat.format( **{'id':'([0-9]+)', 'runId':'([0-9]+)'} ) )
+        intermediateIndexFileNameList = [ fileName for fileName in fileNameList if re.match( intermediateIndexFileNamePattern, fileName ) ]
+        intermediateIndexFileNameList.sort( key=lambda fileName: tuple( int(group) for group in re.match( intermediateIndexFileNamePattern, fileName ).groups() ) )
 
-        #   Initialzie intermediate index data list
-        intermediateIndexList = list()
+        if len(intermediateIndexFileNameList) == 0:
+            raise ValueError('readIntermediateIndex() - No intermediate run in {}.'.format(intermediateIndexDir))
 
-        for intermediateIndexFileName in intermediateIndexFileNameList:
-            
-            #   Read intermediate index file
-            with open(os.path.join(intermediateIndexDir, intermediateIndexFileName), 'r', encoding='utf-8') as intermediateIndexFile:
-                serializedIntermediateIndexStr = intermediateIndexFile.read()
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
 
-            #   Parse read serialized string as dictionary
-            intermediateIndex = ast.literal_eval( serializedIntermediateIndexStr )
+        with contextlib.ExitStack() as exitStack:
+
+            #   Open every run at once, each is read incrementally
+            intermediateRunIteratorList = [ iterPostingDict( exitStack.enter_context( gzip.open( os.path.join( intermediateIndexDir, intermediateIndexFileName ), 'rt', encoding='utf-8' ) ), keyType=str, subKeyType=int, valueType=int ) for intermediateIndexFileName in intermediateIndexFileNameList ]
+
+            #   Merge runs and intern terms as termIds
+            self.termDictionary, self.index = mergeIntermediateRun( intermediateRunIteratorList, excludedDocIdSet=excludedDocIdSet )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'merge', startTime )
+            metrics.incrementCounter( 'runs_merged', len(intermediateIndexFileNameList) )
+            metrics.incrementCounter( 'terms_merged', len(self.index) )
+            metrics.recordMemory( 'merge' )
+
+    def readFromTermDictionaryDir( self, termDictionaryDir : str, termDictionaryFileName : str ):
+        ''' This function reads term dictionary from index directory
+        '''
 
-            #   Add intermediate index to list
-            intermediateIndexList.append( intermediateIndex )
+        #   Construct term dictionary file path
+        termDictionaryFilePath = os.path.join( termDictionaryDir, termDictionaryFileName )
 
-        #   Merge intermediate indices
-        self.index = mergeIntermediateIndex( intermediateIndexList )
+        #   Check if term dictionary file path exists
+        if not os.path.exists( termDictionaryFilePath ):
+            raise ValueError('readFromTermDictionaryDir() - Cannot find term dictionary file at {}.'.format(termDictionaryFilePath))
 
-    def readFromIndexDir( self, indexDir : str, indexFileName : str, isUsePickle : Optional[bool] = True ):
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        self.termDictionary = TermDictionary.read( termDictionaryFilePath )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'read', startTime )
+
+    def readFromIndexDir( self, indexDir : str, indexFileName : str, isUsePickle : Optional[bool] = True, numProcess : Optional[int] = 1 ):
         ''' This function reads index from index directory
+            NOTE - Text index is decoded with given number of processes
         '''
 
         #   Construct index file path
@@ -134,6 +297,9 @@ class Indexer(object):
         if not os.path.exists( indexFilePath ):
             raise ValueError('readFromIndexDir() - Cannot find index file at {}.'.format(indexFilePath))
 
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
         if isUsePickle:
 
             #   Read index file
@@ -143,12 +309,14 @@ class Indexer(object):
         else:
 
             #   Read index file
-            with open( indexFilePath, 'r', encoding='utf-8' ) as indexFile:
-                serializedIndexStr = indexFile.read()
-                self.index = ast.literal_eval( serializedIndexStr )
+            self.index = readPostingDictParallel( indexFilePath, keyType=int, subKeyType=int, valueType=float, numProcess=numProcess )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'read', startTime )
 
-    def readFromInvertedIndexDir( self, invertedIndexDir : str, invertedIndexFileName : str, isUsePickle : Optional[bool] = True ):
+    def readFromInvertedIndexDir( self, invertedIndexDir : str, invertedIndexFileName : str, isUsePickle : Optional[bool] = True, numProcess : Optional[int] = 1 ):
         ''' This function reads inverted index from index directory
+            NOTE - Text inverted index is decoded with given number of processes
         '''
 
         #   Construct inverted index file path
@@ -158,6 +326,9 @@ class Indexer(object):
         if not os.path.exists( invertedIndexFilePath ):
             raise ValueError('readFromIndexDir() - Cannot find inverted index file at {}.'.format(invertedIndexFilePath))
 
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
         if isUsePickle:
 
             #   Read inverted index file
@@ -167,9 +338,58 @@ class Indexer(object):
         else:
 
             #   Read inverted index file
-            with open( invertedIndexFilePath, 'r', encoding='utf-8' ) as invertedIndexFile:
-                serializedInvertedIndexStr = invertedIndexFile.read()
-                self.invertedIndex = ast.literal_eval( serializedInvertedIndexStr )
+            self.invertedIndex = readPostingDictParallel( invertedIndexFilePath, keyType=int, subKeyType=int, valueType=float, numProcess=numProcess )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'read', startTime )
+            metrics.recordMemory( 'load' )
+
+    def reorderDocId( self, numDoc : int, reorderMethod : Optional[str] = ReorderMethod.BISECTION ) -> Tuple[List[int], Dict]:
+        ''' This function reassigns docIds of term frequency index so that
+            documents sharing terms get close docIds, then remaps postings
+            to them. Returns new docId order, where the i-th docId becomes
+            docId i, and gap compressed postings sizes and intersection time
+            of sampled term pairs before and after.
+        '''
+
+        assert( self.index != None )
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        intersectionPairList = sampleIntersectionPairList( self.index )
+        compressionStatDict = measurePostingCompression( self.index, intersectionPairList )
+
+        docIdOrder = DocIdReorderer( reorderMethod ).findDocIdOrder( self.index, numDoc )
+        self.remapDocId( docIdOrder )
+
+        reorderedCompressionStatDict = measurePostingCompression( self.index, intersectionPairList )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'reorder', startTime )
+
+        return docIdOrder, { 'compressedByteSize': compressionStatDict['compressedByteSize'],
+                                'reorderedCompressedByteSize': reorderedCompressionStatDict['compressedByteSize'],
+                                'gammaByteSize': compressionStatDict['gammaByteSize'],
+                                'reorderedGammaByteSize': reorderedCompressionStatDict['gammaByteSize'],
+                                'intersectionTime': compressionStatDict['intersectionTime'],
+                                'reorderedIntersectionTime': reorderedCompressionStatDict['intersectionTime'],
+                                'numIntersection': len(intersectionPairList) }
+
+    def remapDocId( self, docIdOrder : List[int] ):
+        ''' This function renames docIds of index postings by given order,
+            postings of each term are kept in ascending docId order
+        '''
+
+        assert( self.index != None )
+
+        #   Old docId to new docId
+        newDocIdList = [ 0 ]*len(docIdOrder)
+        for newDocId, docId in enumerate( docIdOrder ):
+            newDocIdList[docId] = newDocId
+
+        for termId, docIdToValueDict in self.index.items():
+            self.index[termId] = dict( sorted( ( newDocIdList[docId], value ) for docId, value in docIdToValueDict.items() ) )
 
     def convertIndexToTfIdf( self, numDoc : int ):
         ''' This function converts index in form of just term frequency to
@@ -178,14 +398,20 @@ class Indexer(object):
 
         assert( self.index != None )
 
-        for term, docIdToTermFreqDict in self.index.items():
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        for termId, docIdToTermFreqDict in self.index.items():
             
             #   Compute document frequency
             docFreq = numDoc/len(docIdToTermFreqDict)
 
             #   Compute td-idf weight for each term and document
             for docId, termFreq in docIdToTermFreqDict.items():
-                self.index[term][docId] = math.log10( 1 + termFreq )*math.log10( docFreq )
+                self.index[termId][docId] = math.log10( 1 + termFreq )*math.log10( docFreq )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'tfidf', startTime )
 
     def constructInvertedIndexTfIdf( self, docIdList : List[int] ):
         ''' This function constructs inverted index of the index
@@ -193,13 +419,20 @@ class Indexer(object):
 
         assert( self.index != None )
 
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
         #   Initialize inverted index
         self.invertedIndex = { docId : dict() for docId in docIdList }
 
-        #   Invert term and docId indexing structure
-        for term, docIdToWeightedTfIdfDict in self.index.items():
+        #   Invert termId and docId indexing structure
+        for termId, docIdToWeightedTfIdfDict in self.index.items():
             for docId, weightedTfIdf in docIdToWeightedTfIdfDict.items():
-                self.invertedIndex[docId][term] = weightedTfIdf
+                self.invertedIndex[docId][termId] = weightedTfIdf
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'invert', startTime )
+            metrics.recordMemory( 'invert' )
 
     def normalizeInvertedIndexTfIdf( self ):
         ''' This function normalizes inverted index
@@ -218,6 +451,9 @@ class Indexer(object):
         #   Construct index file path
         indexFilePath = os.path.join( indexDir, indexFileName )
 
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
         if isUsePickle:
 
             #   Write index file
@@ -228,7 +464,10 @@ class Indexer(object):
 
             #   Write index file
             with open( indexFilePath, 'w', encoding='utf-8' ) as indexFile:
-                indexFile.write( repr(self.index) )
+                writePostingDict( indexFile, self.index )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'write', startTime )
 
     def writeInvertedIndex( self, invertedIndexDir : str, invertedIndexFileName : str, isUsePickle : Optional[bool] = True ):
         ''' This function writes inverted index file at given path
@@ -239,6 +478,9 @@ class Indexer(object):
         #   Construct inverted index file path
         invertedIndexFilePath = os.path.join( invertedIndexDir, invertedIndexFileName )
 
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
         if isUsePickle:
 
             #   Write index file
@@ -249,12 +491,331 @@ class Indexer(object):
 
             #   Write index file
             with open( invertedIndexFilePath, 'w', encoding='utf-8' ) as invertedIndexFile:
-                invertedIndexFile.write( repr(self.invertedIndex) )
+                writePostingDict( invertedIndexFile, self.invertedIndex )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'write', startTime )
+
+    def constructTieredIndex( self, topTierSize : Optional[int] = TopTierSize, pruneWeightThreshold : Optional[float] = 0.0 ) -> Dict:
+        ''' This function constructs impact tiered index from normalized
+            inverted index. Each term maps to its top tier postings in weight
+            order, its tail postings and the largest tail weight.
+            Postings whose weight is not above threshold are pruned, zero
+            weight postings are always pruned. Returns build statistics.
+        '''
+
+        assert( self.invertedIndex != None )
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        #   Transpose normalized document vectors back into postings
+        termIdToDocIdToWeightDict = transposeInvertedIndex( self.invertedIndex )
+
+        numPosting = sum( len(docIdToWeightDict) for docIdToWeightDict in termIdToDocIdToWeightDict.values() )
+
+        #   Split each postings into tiers
+        self.tieredIndex = { termId: splitPostingTier( docIdToWeightDict, topTierSize, pruneWeightThreshold ) for termId, docIdToWeightDict in termIdToDocIdToWeightDict.items() }
+
+        numTopTierPosting = sum( len(topTierList) for topTierList, _, _ in self.tieredIndex.values() )
+        numTailPosting = sum( len(tailDict) for _, tailDict, _ in self.tieredIndex.values() )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'tier', startTime )
+
+        return { 'numPosting': numPosting,
+                    'numTopTierPosting': numTopTierPosting,
+                    'numTailPosting': numTailPosting,
+                    'numPrunedPosting': numPosting - numTopTierPosting - numTailPosting }
+
+    def writeTieredIndex( self, tieredIndexDir : str, tieredIndexFileName : str, isUsePickle : Optional[bool] = True ):
+        ''' This function writes tiered index file at given path
+        '''
+
+        assert( self.tieredIndex != None )
+
+        #   Construct tiered index file path
+        tieredIndexFilePath = os.path.join( tieredIndexDir, tieredIndexFileName )
+
+        if isUsePickle:
+
+            #   Write tiered index file
+            with open( tieredIndexFilePath, 'wb' ) as tieredIndexFile:
+                pickle.dump( self.tieredIndex, tieredIndexFile )
+
+        else:
+
+            #   Write tiered index file, one term per line
+            with open( tieredIndexFilePath, 'w', encoding='utf-8' ) as tieredIndexFile:
+                for termId, ( topTierList, tailDict, _ ) in self.tieredIndex.items():
+                    tieredIndexFile.write( formatTieredPostingLine( termId, topTierList, tailDict ) )
+
+    def readFromTieredIndexDir( self, tieredIndexDir : str, tieredIndexFileName : str, isUsePickle : Optional[bool] = True ):
+        ''' This function reads tiered index from index directory
+        '''
+
+        #   Construct tiered index file path
+        tieredIndexFilePath = os.path.join( tieredIndexDir, tieredIndexFileName )
+
+        #   Check if tiered index file path exists
+        if not os.path.exists( tieredIndexFilePath ):
+            raise ValueError('readFromTieredIndexDir() - Cannot find tiered index file at {}.'.format(tieredIndexFilePath))
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        if isUsePickle:
+
+            #   Read tiered index file
+            with open( tieredIndexFilePath, 'rb' ) as tieredIndexFile:
+                self.tieredIndex = pickle.load( tieredIndexFile )
+
+        else:
+
+            #   Read tiered index file line by line
+            self.tieredIndex = dict()
+            with open( tieredIndexFilePath, 'r', encoding='utf-8' ) as tieredIndexFile:
+                for line in tieredIndexFile:
+                    termId, topTierList, tailDict = parseTieredPostingLine( line )
+                    self.tieredIndex[termId] = ( topTierList, tailDict, max( tailDict.values(), default=0.0 ) )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'read', startTime )
+
+    def constructImpactOrderedIndex( self, numImpactLevel : Optional[int] = ImpactLevelNum ) -> Dict:
+        ''' This function constructs impact ordered index from normalized
+            inverted index. Weights are quantized into integer impacts with
+            a single scale, and each term maps to its impact segments in
+            decreasing impact order, each holding docIds in ascending order.
+            Returns build statistics.
+        '''
+
+        assert( self.invertedIndex != None )
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        #   Transpose normalized document vectors back into postings
+        termIdToDocIdToWeightDict = transposeInvertedIndex( self.invertedIndex )
+
+        #   Highest weight maps to highest impact level
+        maxWeight = max( [ max( docIdToWeightDict.values() ) for docIdToWeightDict in termIdToDocIdToWeightDict.values() ], default=0.0 )
+        self.impactScale = maxWeight/numImpactLevel if maxWeight > 0 else 1.0
+
+        self.impactOrderedIndex = { termId: quantizePostingImpact( docIdToWeightDict, self.impactScale ) for termId, docIdToWeightDict in termIdToDocIdToWeightDict.items() }
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'impact', startTime )
+
+        return { 'numPosting': sum( len(docIdToWeightDict) for docIdToWeightDict in termIdToDocIdToWeightDict.values() ),
+                    'numImpactPosting': sum( len(docIdList) for impactSegmentList in self.impactOrderedIndex.values() for _, docIdList in impactSegmentList ),
+                    'numImpactSegment': sum( len(impactSegmentList) for impactSegmentList in self.impactOrderedIndex.values() ) }
+
+    def writeImpactOrderedIndex( self, impactOrderedIndexDir : str, impactOrderedIndexFileName : str, isUsePickle : Optional[bool] = True ):
+        ''' This function writes impact ordered index file at given path
+        '''
+
+        assert( self.impactOrderedIndex != None )
+
+        #   Construct impact ordered index file path
+        impactOrderedIndexFilePath = os.path.join( impactOrderedIndexDir, impactOrderedIndexFileName )
+
+        if isUsePickle:
+
+            #   Write impact scale along with impact ordered index
+            with open( impactOrderedIndexFilePath, 'wb' ) as impactOrderedIndexFile:
+                pickle.dump( ( self.impactScale, self.impactOrderedIndex ), impactOrderedIndexFile )
+
+        else:
+
+            #   Write impact ordered index file, impact scale header then one term per line
+            with open( impactOrderedIndexFilePath, 'w', encoding='utf-8' ) as impactOrderedIndexFile:
+                impactOrderedIndexFile.write( ImpactFileHeaderFormat.format( impactScale=repr(self.impactScale) ) )
+                for termId, impactSegmentList in self.impactOrderedIndex.items():
+                    impactOrderedIndexFile.write( formatImpactPostingLine( termId, impactSegmentList ) )
+
+    def readFromImpactOrderedIndexDir( self, impactOrderedIndexDir : str, impactOrderedIndexFileName : str, isUsePickle : Optional[bool] = True ):
+        ''' This function reads impact ordered index from index directory
+        '''
+
+        #   Construct impact ordered index file path
+        impactOrderedIndexFilePath = os.path.join( impactOrderedIndexDir, impactOrderedIndexFileName )
+
+        #   Check if impact ordered index file path exists
+        if not os.path.exists( impactOrderedIndexFilePath ):
+            raise ValueError('readFromImpactOrderedIndexDir() - Cannot find impact ordered index file at {}.'.format(impactOrderedIndexFilePath))
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        if isUsePickle:
+
+            #   Read impact ordered index file
+            with open( impactOrderedIndexFilePath, 'rb' ) as impactOrderedIndexFile:
+                self.impactScale, self.impactOrderedIndex = pickle.load( impactOrderedIndexFile )
+
+        else:
+
+            #   Read impact ordered index file line by line
+            self.impactOrderedIndex = dict()
+            with open( impactOrderedIndexFilePath, 'r', encoding='utf-8' ) as impactOrderedIndexFile:
+
+                #   Parse header
+                header = impactOrderedIndexFile.readline()
+                if not header.startswith( '#impactOrderedIndex' ):
+                    raise ValueError( 'readFromImpactOrderedIndexDir() - {} is not an impact ordered index file.'.format( impactOrderedIndexFilePath ) )
+                self.impactScale = float( header.split('=')[1] )
+
+                for line in impactOrderedIndexFile:
+                    termId, impactSegmentList = parseImpactPostingLine( line )
+                    self.impactOrderedIndex[termId] = impactSegmentList
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'read', startTime )
+
+    def constructSimilarityIndex( self ) -> Dict:
+        ''' This function sketches normalized document vectors of inverted
+            index for finding similar documents. Returns build statistics.
+        '''
+
+        assert( self.invertedIndex != None )
+        assert( self.termDictionary != None )
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        self.similarityIndex = SimilarityIndex.build( self.invertedIndex, self.termDictionary )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'sketch', startTime )
+
+        return { 'numSketch': len(self.similarityIndex),
+                    'numBucket': len(self.similarityIndex.bucketDict) }
+
+    def writeSimilarityIndex( self, similarityIndexDir : str, similarityIndexFileName : str ):
+        ''' This function writes similarity index file at given path
+        '''
+
+        assert( self.similarityIndex != None )
+
+        self.similarityIndex.write( os.path.join( similarityIndexDir, similarityIndexFileName ) )
+
+    def readFromSimilarityIndexDir( self, similarityIndexDir : str, similarityIndexFileName : str ):
+        ''' This function reads document sketches from index directory and
+            buckets them
+        '''
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        self.similarityIndex = SimilarityIndex.read( os.path.join( similarityIndexDir, similarityIndexFileName ) )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'read', startTime )
+
+    def readFromGenerationDir( self, generationDir : str, indexManifest : IndexManifest, fileKindList : List[str], numProcess : Optional[int] = 1 ):
+        ''' This function reads given kinds of index files listed in manifest
+            of an index generation, kinds it has not been built with are
+            skipped
+        '''
+
+        for fileKind in fileKindList:
+
+            fileName = indexManifest.getFileName( fileKind )
+
+            if fileName is None:
+                continue
+
+            if fileKind == IndexFileKind.DOC_ID_STORE:
+                self.readFromDocIdStoreDir( generationDir, fileName )
+            elif fileKind == IndexFileKind.FORWARD_INDEX:
+                self.readFromForwardIndexDir( generationDir, fileName )
+            elif fileKind == IndexFileKind.DOC_ID_INDEX:
+                self.readFromDocIdIndexDir( generationDir, fileName )
+            elif fileKind == IndexFileKind.TERM_DICTIONARY:
+                self.readFromTermDictionaryDir( generationDir, fileName )
+            elif fileKind == IndexFileKind.INDEX:
+                self.readFromIndexDir( generationDir, fileName, isUsePickle=isPickleFileName( fileName ), numProcess=numProcess )
+            elif fileKind == IndexFileKind.INVERTED_INDEX:
+                self.readFromInvertedIndexDir( generationDir, fileName, isUsePickle=isPickleFileName( fileName ), numProcess=numProcess )
+            elif fileKind == IndexFileKind.TIERED_INDEX:
+                self.readFromTieredIndexDir( generationDir, fileName )
+            elif fileKind == IndexFileKind.IMPACT_ORDERED_INDEX:
+                self.readFromImpactOrderedIndexDir( generationDir, fileName )
+            elif fileKind == IndexFileKind.SIMILARITY_INDEX:
+                self.readFromSimilarityIndexDir( generationDir, fileName )
+            elif fileKind == IndexFileKind.VOCABULARY_FILTER:
+                self.readFromVocabularyFilterDir( generationDir, fileName )
+            else:
+                raise ValueError( 'readFromGenerationDir() - Unknown index file kind {!r}.'.format( fileKind ) )
+
+    def close( self ):
+        ''' This function closes memory-mapped files of this indexer
+        '''
+
+        if self.docIdStore is not None:
+            self.docIdStore.close()
+            self.docIdStore = None
+
+        if self.forwardIndex is not None:
+            self.forwardIndex.close()
+            self.forwardIndex = None
+
+    def writeTermDictionary( self, termDictionaryDir : str, termDictionaryFileName : str ):
+        ''' This function writes term dictionary file at given path
+        '''
+
+        assert( self.termDictionary != None )
+
+        self.termDictionary.write( os.path.join( termDictionaryDir, termDictionaryFileName ) )
+
+    def writeVocabularyFilter( self, vocabularyFilterDir : str, vocabularyFilterFileName : str ):
+        ''' This function writes Bloom filter over terms of term dictionary
+            at given path
+        '''
+
+        assert( self.termDictionary != None )
+
+        self.vocabularyFilter = BloomFilter.fromKeys( ( term for _, term in self.termDictionary.iterTerms() ), len(self.termDictionary) )
+        self.vocabularyFilter.write( os.path.join( vocabularyFilterDir, vocabularyFilterFileName ) )
+
+    def readFromVocabularyFilterDir( self, vocabularyFilterDir : str, vocabularyFilterFileName : str ):
+        ''' This function reads Bloom filter over indexed terms, which is
+            consulted before term dictionary
+        '''
+
+        self.vocabularyFilter = BloomFilter.read( os.path.join( vocabularyFilterDir, vocabularyFilterFileName ) )
+
+    def mayContainTerm( self, term : str ) -> bool:
+        ''' This function checks if term may be indexed, it is False only
+            if the term is surely not, or True without vocabulary filter
+        '''
+
+        return self.vocabularyFilter is None or term in self.vocabularyFilter
+
+    def getTermId( self, term : str ) -> Optional[int]:
+        ''' This function maps term to termId or None if the term is not
+            indexed
+        '''
+
+        #   Skip dictionary probe for terms vocabulary filter rejects
+        if not self.mayContainTerm( term ):
+            if metrics.isEnabled:
+                metrics.incrementCounter( 'vocabulary_filter_rejections' )
+            return None
+
+        assert( self.termDictionary != None )
+
+        return self.termDictionary.getTermId( term )
 
     def getDocNameById( self, docId : int ) -> str:
-        ''' This function maps docId for document name
+        ''' This function maps docId for document name, from docId store
+            if it is loaded
         '''
 
+        if self.docIdStore is not None:
+            return self.docIdStore.getDocName( docId )
+
         assert( self.docIdIndex != None )
 
         return self.docIdIndex[ docId ]
\ No newline at end of file
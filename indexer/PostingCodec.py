@@ -0,0 +1,193 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import time
+import random
+from typing import Iterable, List, Dict, Tuple
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   NOTE -  A compressed posting list holds docIds in ascending order as
+#           variable byte encoded gaps, cut into blocks of posting block
+#           size. Gaps of a block start from the last docId of the block
+#           before, so each block decodes on its own, and the last docId of
+#           every block is kept uncompressed as a skip list. Intersection
+#           decodes only blocks whose docId ranges overlap, so the closer
+#           matching docIds are the fewer blocks it touches.
+PostingBlockSize = 128
+
+#   Frequent terms query pairs are drawn from, and number of pairs
+IntersectionSampleTermNum = 1024
+IntersectionSamplePairNum = 1000
+IntersectionSampleSeed = 0x1d5
+
+#   Intersection time is the best of repeated rounds, less noisy
+IntersectionRepeatNum = 3
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def encodeVByte( valueList : Iterable[int] ) -> bytes:
+    ''' This function encodes non-negative integers 7 bits per byte, low
+        bits first, high bit set on every byte but the last of a value
+    '''
+
+    data = bytearray()
+
+    for value in valueList:
+        while value >= 0x80:
+            data.append( ( value & 0x7f ) | 0x80 )
+            value >>= 7
+        data.append( value )
+
+    return bytes( data )
+
+def decodeVByte( data : bytes ) -> List[int]:
+    ''' This function decodes integers encoded by encodeVByte()
+    '''
+
+    valueList = list()
+    value = 0
+    shift = 0
+
+    for byte in data:
+        value |= ( byte & 0x7f ) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            valueList.append( value )
+            value = 0
+            shift = 0
+
+    return valueList
+
+def getEliasGammaBitSize( docIdList : List[int] ) -> int:
+    ''' This function counts bits of ascending docIds as Elias gamma coded
+        gaps, which unlike variable bytes tell small gaps apart by their
+        size, e.g. a gap of 1 takes 1 bit and a gap of 100 takes 13
+    '''
+
+    #   First gap is from -1, so docId 0 is a gap of 1
+    return sum( 2*( docId - previousDocId ).bit_length() - 1 for previousDocId, docId in zip( [ -1 ] + docIdList[:-1], docIdList ) )
+
+def encodePostingBlockList( docIdList : List[int], postingBlockSize : int = PostingBlockSize ) -> Tuple[List[int], List[bytes]]:
+    ''' This function compresses ascending docIds into gap encoded blocks,
+        returns last docId of each block and the blocks
+    '''
+
+    blockLastDocIdList = list()
+    blockList = list()
+    previousDocId = 0
+
+    for blockBegin in range( 0, len(docIdList), postingBlockSize ):
+        blockDocIdList = docIdList[ blockBegin:blockBegin + postingBlockSize ]
+        blockList.append( encodeVByte( docId - gapBaseDocId for gapBaseDocId, docId in zip( [ previousDocId ] + blockDocIdList[:-1], blockDocIdList ) ) )
+        previousDocId = blockDocIdList[-1]
+        blockLastDocIdList.append( previousDocId )
+
+    return blockLastDocIdList, blockList
+
+def decodePostingBlock( blockLastDocIdList : List[int], blockList : List[bytes], blockIndex : int ) -> List[int]:
+    ''' This function decodes docIds of one block
+    '''
+
+    docId = blockLastDocIdList[ blockIndex - 1 ] if blockIndex > 0 else 0
+    docIdList = list()
+
+    for gap in decodeVByte( blockList[blockIndex] ):
+        docId += gap
+        docIdList.append( docId )
+
+    return docIdList
+
+def intersectPostingBlockList( postingBlockList : Tuple[List[int], List[bytes]], otherPostingBlockList : Tuple[List[int], List[bytes]] ) -> List[int]:
+    ''' This function intersects two compressed posting lists, skipping
+        blocks which cannot hold a common docId without decoding them
+    '''
+
+    blockLastDocIdList, blockList = postingBlockList
+    otherBlockLastDocIdList, otherBlockList = otherPostingBlockList
+
+    docIdList = list()
+    i, j = 0, 0
+    decodedIndex, decodedDocIdList = -1, None
+    otherDecodedIndex, otherDecodedDocIdSet = -1, None
+
+    while i < len(blockList) and j < len(otherBlockList):
+
+        #   Block i holds docIds after the last one of block i - 1, skip a
+        #   block ending before the other one begins
+        if j > 0 and blockLastDocIdList[i] <= otherBlockLastDocIdList[ j - 1 ]:
+            i += 1
+            continue
+        if i > 0 and otherBlockLastDocIdList[j] <= blockLastDocIdList[ i - 1 ]:
+            j += 1
+            continue
+
+        if decodedIndex != i:
+            decodedIndex, decodedDocIdList = i, decodePostingBlock( blockLastDocIdList, blockList, i )
+        if otherDecodedIndex != j:
+            otherDecodedIndex, otherDecodedDocIdSet = j, set( decodePostingBlock( otherBlockLastDocIdList, otherBlockList, j ) )
+
+        docIdList.extend( docId for docId in decodedDocIdList if docId in otherDecodedDocIdSet )
+
+        #   Move on from the block which ends first
+        if blockLastDocIdList[i] <= otherBlockLastDocIdList[j]:
+            i += 1
+        else:
+            j += 1
+
+    return docIdList
+
+def sampleIntersectionPairList( termIdToDocIdDict : Dict, sampleTermNum : int = IntersectionSampleTermNum,
+                                    samplePairNum : int = IntersectionSamplePairNum,
+                                    seed : int = IntersectionSampleSeed ) -> List[Tuple[int, int]]:
+    ''' This function draws termId pairs among the most frequent terms as
+        conjunctive queries, the same ones for the same postings
+    '''
+
+    termIdList = sorted( termIdToDocIdDict.keys(), key=lambda termId: ( -len(termIdToDocIdDict[termId]), termId ) )[:sampleTermNum]
+
+    if len(termIdList) < 2:
+        return list()
+
+    randomGenerator = random.Random( seed )
+
+    return [ tuple( randomGenerator.sample( termIdList, 2 ) ) for _ in range( samplePairNum ) ]
+
+def measurePostingCompression( termIdToDocIdDict : Dict, intersectionPairList : List[Tuple[int, int]], postingBlockSize : int = PostingBlockSize ) -> Dict:
+    ''' This function compresses postings of every term and times
+        intersection of sampled term pairs, returns variable byte and Elias
+        gamma byte sizes of docId gaps and intersection seconds
+    '''
+
+    termIdToPostingBlockListDict = dict()
+    gammaBitSize = 0
+
+    for termId, docIdDict in termIdToDocIdDict.items():
+        docIdList = sorted( docIdDict.keys() )
+        termIdToPostingBlockListDict[termId] = encodePostingBlockList( docIdList, postingBlockSize )
+        gammaBitSize += getEliasGammaBitSize( docIdList )
+
+    compressedByteSize = sum( len(block) for _, blockList in termIdToPostingBlockListDict.values() for block in blockList )
+
+    intersectionTime = None
+
+    for _ in range( IntersectionRepeatNum ):
+        startTime = time.perf_counter()
+        for termId, otherTermId in intersectionPairList:
+            intersectPostingBlockList( termIdToPostingBlockListDict[termId], termIdToPostingBlockListDict[otherTermId] )
+        deltaTime = time.perf_counter() - startTime
+        intersectionTime = deltaTime if intersectionTime is None else min( intersectionTime, deltaTime )
+
+    return { 'compressedByteSize': compressedByteSize,
+                'gammaByteSize': ( gammaBitSize + 7 )//8,
+                'intersectionTime': intersectionTime }
+
+##########################################################################
+#   CLASS
+##########################################################################
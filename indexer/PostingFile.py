@@ -0,0 +1,234 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import multiprocessing
+from typing import Callable, Dict, Iterator, List, Tuple, TextIO
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   NOTE -  A posting file is a line-oriented text file, one key per line:
+#               <key>\t<subKey>:<value> <subKey>:<value> ...
+#           Terms never contain white spaces since the tokenizer splits on
+#           them, so tab and space are safe separators. Sub key and value
+#           are split at the last colon, so a term sub key may contain one.
+KeySeparator = '\t'
+PostingSeparator = ' '
+ValueSeparator = ':'
+
+#   NOTE -  Tiered posting line holds high-impact postings in weight order
+#           followed by a lone separator and the tail postings
+TierSeparator = '|'
+
+#   NOTE -  Impact posting line holds impact segments in decreasing impact
+#           order, each as <impact>:<docId>,<docId>,...
+DocIdSeparator = ','
+
+ImpactFileHeaderFormat = '#impactOrderedIndex impactScale={impactScale}\n'
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def formatPostingLine( key, subKeyToValueDict : Dict ) -> str:
+    ''' This function formats a key and its postings as a single line
+    '''
+
+    return '{}{}{}\n'.format( key, KeySeparator, PostingSeparator.join( [ '{}{}{}'.format( subKey, ValueSeparator, value ) for subKey, value in subKeyToValueDict.items() ] ) )
+
+def parsePostingLine( line : str, keyType : Callable = str, subKeyType : Callable = int, valueType : Callable = int ) -> Tuple:
+    ''' This function parses a single posting line into key and
+        sub key to value dictionary
+    '''
+
+    key, _, postingStr = line.rstrip('\n').partition( KeySeparator )
+
+    #   Initialize sub key to value dictionary
+    subKeyToValueDict = dict()
+
+    if postingStr:
+        for posting in postingStr.split( PostingSeparator ):
+            subKey, _, value = posting.rpartition( ValueSeparator )
+            subKeyToValueDict[ subKeyType(subKey) ] = valueType(value)
+
+    return keyType(key), subKeyToValueDict
+
+def writePostingDict( postingFile : TextIO, postingDict : Dict ):
+    ''' This function writes key to sub key to value dictionary into an
+        opened text file, one key per line
+    '''
+
+    for key, subKeyToValueDict in postingDict.items():
+        postingFile.write( formatPostingLine( key, subKeyToValueDict ) )
+
+def iterPostingDict( postingFile : TextIO, keyType : Callable = str, subKeyType : Callable = int, valueType : Callable = int ) -> Iterator[Tuple]:
+    ''' This function incrementally reads key and its postings from an
+        opened posting file without loading the whole file
+    '''
+
+    for line in postingFile:
+
+        #   Skip empty line
+        if line == '\n':
+            continue
+
+        yield parsePostingLine( line, keyType=keyType, subKeyType=subKeyType, valueType=valueType )
+
+def readPostingDict( postingFile : TextIO, keyType : Callable = str, subKeyType : Callable = int, valueType : Callable = int ) -> Dict:
+    ''' This function reads a whole posting file into key to sub key
+        to value dictionary
+    '''
+
+    return dict( iterPostingDict( postingFile, keyType=keyType, subKeyType=subKeyType, valueType=valueType ) )
+
+def formatTieredPostingLine( key, topTierList : List[Tuple], tailDict : Dict ) -> str:
+    ''' This function formats a key, its ordered top tier postings and its
+        tail postings as a single line
+    '''
+
+    postingList = [ '{}{}{}'.format( subKey, ValueSeparator, value ) for subKey, value in topTierList ]
+    postingList.append( TierSeparator )
+    postingList += [ '{}{}{}'.format( subKey, ValueSeparator, value ) for subKey, value in tailDict.items() ]
+
+    return '{}{}{}\n'.format( key, KeySeparator, PostingSeparator.join( postingList ) )
+
+def parseTieredPostingLine( line : str, keyType : Callable = int, subKeyType : Callable = int, valueType : Callable = float ) -> Tuple:
+    ''' This function parses a tiered posting line into key, top tier
+        list and tail dictionary
+    '''
+
+    key, _, postingStr = line.rstrip('\n').partition( KeySeparator )
+
+    topTierStr, _, tailStr = postingStr.partition( TierSeparator )
+
+    topTierList = list()
+    for posting in topTierStr.split():
+        subKey, _, value = posting.rpartition( ValueSeparator )
+        topTierList.append( ( subKeyType(subKey), valueType(value) ) )
+
+    tailDict = dict()
+    for posting in tailStr.split():
+        subKey, _, value = posting.rpartition( ValueSeparator )
+        tailDict[ subKeyType(subKey) ] = valueType(value)
+
+    return keyType(key), topTierList, tailDict
+
+def formatImpactPostingLine( key, impactSegmentList : List[Tuple[int, List[int]]] ) -> str:
+    ''' This function formats a key and its impact segments as a single line
+    '''
+
+    return '{}{}{}\n'.format( key, KeySeparator, PostingSeparator.join( [ '{}{}{}'.format( impact, ValueSeparator, DocIdSeparator.join( map( str, docIdList ) ) ) for impact, docIdList in impactSegmentList ] ) )
+
+def parseImpactPostingLine( line : str, keyType : Callable = int ) -> Tuple:
+    ''' This function parses an impact posting line into key and impact
+        segment list
+    '''
+
+    key, _, postingStr = line.rstrip('\n').partition( KeySeparator )
+
+    impactSegmentList = list()
+    for posting in postingStr.split():
+        impact, _, docIdListStr = posting.partition( ValueSeparator )
+        impactSegmentList.append( ( int(impact), [ int(docId) for docId in docIdListStr.split( DocIdSeparator ) ] ) )
+
+    return keyType(key), impactSegmentList
+
+def writeDocIdList( docIdFile : TextIO, docIdToDocNameTupleList ):
+    ''' This function writes docId to document name tuples, one per line
+    '''
+
+    for docId, docName in docIdToDocNameTupleList:
+        docIdFile.write( '{}{}{}\n'.format( docId, KeySeparator, docName ) )
+
+def iterDocIdList( docIdFile : TextIO ) -> Iterator[Tuple[int, str]]:
+    ''' This function incrementally reads docId to document name tuples
+    '''
+
+    for line in docIdFile:
+
+        #   Skip empty line
+        if line == '\n':
+            continue
+
+        docId, _, docName = line.rstrip('\n').partition( KeySeparator )
+
+        yield int(docId), docName
+
+def splitPostingFile( postingFilePath : str, numChunk : int ) -> List[Tuple[int, int]]:
+    ''' This function splits a posting file into at most given number of
+        byte ranges, each of which starts and ends at a line boundary
+    '''
+
+    #   Get posting file size
+    fileSize = os.path.getsize( postingFilePath )
+
+    #   Initialize chunk boundary list with file beginning
+    boundaryList = [ 0 ]
+
+    with open( postingFilePath, 'rb' ) as postingFile:
+        for i in range( 1, numChunk ):
+
+            #   Seek to approximate boundary and move on to next line
+            postingFile.seek( max( fileSize*i//numChunk, boundaryList[-1] ) )
+            postingFile.readline()
+
+            boundaryList.append( min( postingFile.tell(), fileSize ) )
+
+    boundaryList.append( fileSize )
+
+    #   Drop empty chunks
+    return [ (startOffset, endOffset) for startOffset, endOffset in zip( boundaryList[:-1], boundaryList[1:] ) if startOffset < endOffset ]
+
+def readPostingChunk( postingFilePath : str, startOffset : int, endOffset : int, keyType : Callable = str, subKeyType : Callable = int, valueType : Callable = int ) -> Dict:
+    ''' This function reads key and its postings from given byte range of
+        a posting file
+    '''
+
+    #   Initialize key to sub key to value dictionary
+    postingDict = dict()
+
+    with open( postingFilePath, 'rb' ) as postingFile:
+        postingFile.seek( startOffset )
+
+        while postingFile.tell() < endOffset:
+            line = postingFile.readline().decode( 'utf-8' )
+
+            #   Skip empty line
+            if line == '\n':
+                continue
+
+            key, subKeyToValueDict = parsePostingLine( line, keyType=keyType, subKeyType=subKeyType, valueType=valueType )
+            postingDict[key] = subKeyToValueDict
+
+    return postingDict
+
+def readPostingDictParallel( postingFilePath : str, keyType : Callable = str, subKeyType : Callable = int, valueType : Callable = int, numProcess : int = 1 ) -> Dict:
+    ''' This function reads a whole posting file by splitting it into key
+        ranges and decoding them concurrently in a process pool
+        NOTE -  Decoding is CPU bound, so threads would be serialized by
+                the GIL, and python dictionaries cannot live in shared
+                memory. Each process returns its decoded range which is
+                then merged by reference into the first one.
+    '''
+
+    #   Split posting file into byte ranges
+    chunkList = splitPostingFile( postingFilePath, numProcess )
+
+    #   Read sequentially if there is nothing to parallelize
+    if len(chunkList) <= 1:
+        with open( postingFilePath, 'r', encoding='utf-8' ) as postingFile:
+            return readPostingDict( postingFile, keyType=keyType, subKeyType=subKeyType, valueType=valueType )
+
+    #   Decode each range concurrently
+    with multiprocessing.Pool( len(chunkList) ) as pool:
+        postingDictList = pool.starmap( readPostingChunk, [ ( postingFilePath, startOffset, endOffset, keyType, subKeyType, valueType ) for startOffset, endOffset in chunkList ] )
+
+    #   Assemble decoded ranges, keys are disjoint
+    postingDict = postingDictList[0]
+    for chunkPostingDict in postingDictList[1:]:
+        postingDict.update( chunkPostingDict )
+
+    return postingDict
@@ -0,0 +1,179 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import pickle
+import hashlib
+from typing import Optional, List, Dict, Tuple
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   NOTE -  A document sketch is a SimHash of its normalized tf-idf vector,
+#           i.e. a random projection where bit i is the sign of the vector
+#           dotted with a random +-1 vector taken from bit i of each term
+#           hash. Two documents at angle a agree on a bit with probability
+#           1 - a/pi. Every sketch byte is an LSH band, documents agreeing
+#           on a whole byte share a bucket. About 70% of documents at
+#           cosine similarity 0.5 share a bucket, 15% at 0.05.
+SketchByteNum = 32
+SketchBitNum = SketchByteNum*8
+
+#   Bucket candidates re-ranked exactly, at least this many and at least
+#   this many times the number of results asked for
+MinCandidateNum = 64
+CandidateFactor = 8
+
+#   Byte values whose bit i is set, for each bit
+BitValueListList = [ [ value for value in range( 256 ) if value & ( 1 << bit ) ] for bit in range( 8 ) ]
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getTermHashBytes( term : str ) -> bytes:
+    ''' This function hashes a term to sketch size random bits, stable
+        across processes and index generations
+    '''
+
+    return hashlib.blake2b( term.encode( 'utf-8' ), digest_size=SketchByteNum ).digest()
+
+def computeSketch( termIdToWeightDict : Dict[int, float], termIdToHashBytesList : List[bytes] ) -> Optional[int]:
+    ''' This function computes SimHash sketch of a document vector as an
+        integer, or returns None for an empty vector
+        NOTE -  Weights are summed per byte value of each hash byte, and
+                bit sums are taken from those 256 sums, rather than adding
+                a weight for every bit of every term
+    '''
+
+    if len(termIdToWeightDict) == 0:
+        return None
+
+    byteValueWeightListList = [ [ 0.0 ]*256 for _ in range( SketchByteNum ) ]
+
+    for termId, weight in termIdToWeightDict.items():
+        for byteValueWeightList, byteValue in zip( byteValueWeightListList, termIdToHashBytesList[termId] ):
+            byteValueWeightList[byteValue] += weight
+
+    totalWeight = sum( termIdToWeightDict.values() )
+    sketch = 0
+
+    for byteIndex, byteValueWeightList in enumerate( byteValueWeightListList ):
+        for bit, bitValueList in enumerate( BitValueListList ):
+
+            #   Projection on +-1 vector is weight of set bits minus the rest
+            if 2*sum( map( byteValueWeightList.__getitem__, bitValueList ) ) > totalWeight:
+                sketch |= 1 << ( byteIndex*8 + bit )
+
+    return sketch
+
+def computeDotProduct( vector : Dict, otherVector : Dict ) -> float:
+    ''' This function computes dot product of two sparse vectors, iterating
+        the smaller one
+    '''
+
+    if len(vector) > len(otherVector):
+        vector, otherVector = otherVector, vector
+
+    return sum( weight*otherVector.get( termId, 0.0 ) for termId, weight in vector.items() )
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class SimilarityIndex(object):
+    ''' This class finds documents similar to a given one without
+        comparing it to the whole corpus. Documents in the same bucket of
+        any sketch byte are candidates, the ones with closest sketches by
+        Hamming distance are re-ranked by exact cosine similarity of their
+        normalized tf-idf vectors.
+    '''
+
+    def __init__( self, docIdToSketchDict : Dict[int, int] ):
+        self.docIdToSketchDict = docIdToSketchDict
+
+        #   Byte index and byte value to docIds
+        self.bucketDict = dict()
+
+        for docId, sketch in docIdToSketchDict.items():
+            for byteIndex, byteValue in enumerate( sketch.to_bytes( SketchByteNum, 'little' ) ):
+                self.bucketDict.setdefault( ( byteIndex, byteValue ), list() ).append( docId )
+
+    def __len__( self ) -> int:
+        return len(self.docIdToSketchDict)
+
+    @staticmethod
+    def build( invertedIndex : Dict, termDictionary ) -> 'SimilarityIndex':
+        ''' This function sketches every document vector of normalized
+            inverted index, documents without terms are left out
+        '''
+
+        termIdToHashBytesList = [ getTermHashBytes( term ) for _, term in termDictionary.iterTerms() ]
+
+        docIdToSketchDict = dict()
+
+        for docId, termIdToWeightDict in invertedIndex.items():
+            sketch = computeSketch( termIdToWeightDict, termIdToHashBytesList )
+            if sketch is not None:
+                docIdToSketchDict[docId] = sketch
+
+        return SimilarityIndex( docIdToSketchDict )
+
+    def findCandidateList( self, docId : int, candidateNum : int ) -> List[int]:
+        ''' This function gets docIds sharing a bucket with given docId,
+            closest sketches first, at most candidate number of them
+        '''
+
+        sketch = self.docIdToSketchDict.get( docId )
+
+        if sketch is None:
+            return list()
+
+        candidateDocIdSet = set()
+        for byteIndex, byteValue in enumerate( sketch.to_bytes( SketchByteNum, 'little' ) ):
+            candidateDocIdSet.update( self.bucketDict[ ( byteIndex, byteValue ) ] )
+        candidateDocIdSet.discard( docId )
+
+        return sorted( candidateDocIdSet, key=lambda candidateDocId: ( ( sketch ^ self.docIdToSketchDict[candidateDocId] ).bit_count(), candidateDocId ) )[:candidateNum]
+
+    def findSimilar( self, docId : int, maxResultNum : int, invertedIndex : Dict ) -> Tuple[List[Tuple[int, float]], int]:
+        ''' This function finds documents most similar to given docId by
+            exact cosine similarity among its candidates, returns results
+            and number of candidates
+        '''
+
+        candidateDocIdList = self.findCandidateList( docId, max( MinCandidateNum, CandidateFactor*maxResultNum ) )
+
+        #   Document vectors are unit vectors
+        docVector = invertedIndex[docId]
+        docIdToCosineSimilarityTupleList = [ ( candidateDocId, computeDotProduct( docVector, invertedIndex[candidateDocId] ) ) for candidateDocId in candidateDocIdList ]
+        #   Ties by docId, as ranked results are paged through
+        docIdToCosineSimilarityTupleList.sort( key=lambda x: ( -x[1], x[0] ) )
+
+        return docIdToCosineSimilarityTupleList[:maxResultNum], len(candidateDocIdList)
+
+    def write( self, similarityIndexFilePath : str ):
+        ''' This function writes document sketches, buckets are rebuilt on
+            reading
+        '''
+
+        with open( similarityIndexFilePath, 'wb' ) as similarityIndexFile:
+            pickle.dump( ( SketchBitNum, self.docIdToSketchDict ), similarityIndexFile )
+
+    @staticmethod
+    def read( similarityIndexFilePath : str ) -> 'SimilarityIndex':
+        ''' This function reads document sketches written by write()
+        '''
+
+        if not os.path.exists( similarityIndexFilePath ):
+            raise ValueError( 'SimilarityIndex - Cannot find similarity index file at {}.'.format( similarityIndexFilePath ) )
+
+        with open( similarityIndexFilePath, 'rb' ) as similarityIndexFile:
+            sketchBitNum, docIdToSketchDict = pickle.load( similarityIndexFile )
+
+        if sketchBitNum != SketchBitNum:
+            raise ValueError( 'SimilarityIndex - Unsupported sketch size of {} bits at {}.'.format( sketchBitNum, similarityIndexFilePath ) )
+
+        return SimilarityIndex( docIdToSketchDict )
@@ -0,0 +1,245 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import bisect
+from typing import Optional, Iterable, Iterator, List, Tuple
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   Number of terms per front-coded block, the first one is stored in full
+BlockSize = 16
+
+#   Longest shared prefix recorded, so it fits in a byte
+MaxPrefixLength = 255
+
+#   NOTE -  Terms never contain white spaces since the tokenizer splits on
+#           them, so suffixes of a block are joined with newline in memory
+SuffixSeparator = '\n'
+
+TermDictionaryFileHeaderFormat = '#termDictionary blockSize={blockSize} numTerm={numTerm}\n'
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getSharedPrefixLength( term1 : str, term2 : str ) -> int:
+    ''' This function gets length of common prefix of two terms
+    '''
+
+    maxLength = min( len(term1), len(term2), MaxPrefixLength )
+
+    for i in range( maxLength ):
+        if term1[i] != term2[i]:
+            return i
+
+    return maxLength
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class TermDictionary(object):
+    ''' This class maps terms to dense integer termIds in sorted term order.
+        Terms are kept front-coded in blocks, and looked up by binary
+        search over block head terms followed by a scan of one block.
+    '''
+
+    def __init__( self, blockSize : Optional[int] = BlockSize ):
+        self.blockSize = blockSize
+        self.numTerm = 0
+        self.blockHeadList = list()
+        self.blockPrefixLengthList = list()
+        self.blockSuffixList = list()
+        self.lastTerm = None
+        self.lastDecodedBlock = ( None, None )
+
+    @staticmethod
+    def fromTerms( termIterable : Iterable[str], blockSize : Optional[int] = BlockSize ) -> 'TermDictionary':
+        ''' This function constructs term dictionary from unsorted terms
+        '''
+
+        termDictionary = TermDictionary( blockSize=blockSize )
+
+        for term in sorted( set( termIterable ) ):
+            termDictionary.appendTerm( term )
+
+        termDictionary.finalize()
+
+        return termDictionary
+
+    def __len__( self ) -> int:
+        return self.numTerm
+
+    def appendTerm( self, term : str, prefixLength : Optional[int] = None ) -> int:
+        ''' This function appends a term greater than all previous terms
+            and returns its termId
+        '''
+
+        if self.lastTerm is not None and term <= self.lastTerm:
+            raise ValueError( 'appendTerm() - Term {!r} is not greater than previous term {!r}.'.format( term, self.lastTerm ) )
+
+        termId = self.numTerm
+
+        if termId % self.blockSize == 0:
+
+            #   Start new block with full term
+            self.blockHeadList.append( term )
+            self.blockPrefixLengthList.append( bytearray() )
+            self.blockSuffixList.append( list() )
+
+        else:
+
+            #   Store only suffix not shared with previous term
+            if prefixLength is None:
+                prefixLength = getSharedPrefixLength( self.lastTerm, term )
+
+            self.blockPrefixLengthList[-1].append( prefixLength )
+            self.blockSuffixList[-1].append( term[prefixLength:] )
+
+        self.lastTerm = term
+        self.numTerm += 1
+
+        return termId
+
+    def finalize( self ):
+        ''' This function packs each block suffix list into single string,
+            no term can be appended afterwards
+        '''
+
+        self.blockPrefixLengthList = [ bytes( prefixLength ) for prefixLength in self.blockPrefixLengthList ]
+        self.blockSuffixList = [ suffix if isinstance( suffix, str ) else SuffixSeparator.join( suffix ) for suffix in self.blockSuffixList ]
+
+    def decodeBlock( self, blockId : int ) -> List[str]:
+        ''' This function decodes all terms of given block, the last decoded
+            block is kept since lookups often hit the same block again
+        '''
+
+        lastBlockId, lastTermList = self.lastDecodedBlock
+        if lastBlockId == blockId:
+            return lastTermList
+
+        term = self.blockHeadList[ blockId ]
+        termList = [ term ]
+
+        prefixLengthList = self.blockPrefixLengthList[ blockId ]
+        suffixList = self.blockSuffixList[ blockId ]
+
+        #   Block may be still open or already packed
+        if isinstance( suffixList, str ):
+            suffixList = suffixList.split( SuffixSeparator ) if prefixLengthList else list()
+
+        for prefixLength, suffix in zip( prefixLengthList, suffixList ):
+            term = term[:prefixLength] + suffix
+            termList.append( term )
+
+        #   NOTE - Only packed block is immutable and safe to keep
+        if isinstance( self.blockSuffixList[ blockId ], str ):
+            self.lastDecodedBlock = ( blockId, termList )
+
+        return termList
+
+    def getTermId( self, term : str ) -> Optional[int]:
+        ''' This function maps term to its termId or None if the term
+            is not in dictionary
+        '''
+
+        blockId = bisect.bisect_right( self.blockHeadList, term ) - 1
+
+        if blockId < 0:
+            return None
+
+        termList = self.decodeBlock( blockId )
+
+        #   Binary search within block
+        i = bisect.bisect_left( termList, term )
+
+        if i < len(termList) and termList[i] == term:
+            return blockId*self.blockSize + i
+
+        return None
+
+    def getTerm( self, termId : int ) -> str:
+        ''' This function maps termId to its term
+        '''
+
+        if termId < 0 or termId >= self.numTerm:
+            raise ValueError( 'getTerm() - TermId {} is out of range.'.format( termId ) )
+
+        return self.decodeBlock( termId//self.blockSize )[ termId%self.blockSize ]
+
+    def getLowerBoundTermId( self, term : str ) -> int:
+        ''' This function gets termId of the first term which is not less
+            than given term, or number of terms if there is none
+        '''
+
+        blockId = max( 0, bisect.bisect_right( self.blockHeadList, term ) - 1 )
+
+        if blockId >= len(self.blockHeadList):
+            return self.numTerm
+
+        termList = self.decodeBlock( blockId )
+
+        return blockId*self.blockSize + bisect.bisect_left( termList, term )
+
+    def iterTerms( self, startTermId : Optional[int] = 0 ) -> Iterator[Tuple[int, str]]:
+        ''' This function iterates termId and term in sorted order starting
+            from given termId
+        '''
+
+        for blockId in range( startTermId//self.blockSize, len(self.blockHeadList) ):
+            for i, term in enumerate( self.decodeBlock( blockId ) ):
+                termId = blockId*self.blockSize + i
+                if termId >= startTermId:
+                    yield termId, term
+
+    def write( self, termDictionaryFilePath : str ):
+        ''' This function writes front-coded term dictionary as text file,
+            one prefix length and suffix per line
+        '''
+
+        with open( termDictionaryFilePath, 'w', encoding='utf-8' ) as termDictionaryFile:
+            termDictionaryFile.write( TermDictionaryFileHeaderFormat.format( blockSize=self.blockSize, numTerm=self.numTerm ) )
+
+            for blockId, blockHead in enumerate( self.blockHeadList ):
+                termDictionaryFile.write( '0\t{}\n'.format( blockHead ) )
+
+                prefixLengthList = self.blockPrefixLengthList[ blockId ]
+                suffixList = self.blockSuffixList[ blockId ]
+                if isinstance( suffixList, str ):
+                    suffixList = suffixList.split( SuffixSeparator ) if prefixLengthList else list()
+
+                for prefixLength, suffix in zip( prefixLengthList, suffixList ):
+                    termDictionaryFile.write( '{}\t{}\n'.format( prefixLength, suffix ) )
+
+    @staticmethod
+    def read( termDictionaryFilePath : str ) -> 'TermDictionary':
+        ''' This function reads term dictionary written by write()
+        '''
+
+        with open( termDictionaryFilePath, 'r', encoding='utf-8' ) as termDictionaryFile:
+
+            #   Parse header
+            header = termDictionaryFile.readline()
+            if not header.startswith( '#termDictionary' ):
+                raise ValueError( 'read() - {} is not a term dictionary file.'.format( termDictionaryFilePath ) )
+            headerDict = dict( field.split('=') for field in header.split()[1:] )
+
+            termDictionary = TermDictionary( blockSize=int(headerDict['blockSize']) )
+
+            #   Rebuild terms from prefix lengths and suffixes
+            term = ''
+            for line in termDictionaryFile:
+                prefixLength, _, suffix = line.rstrip('\n').partition('\t')
+                prefixLength = int(prefixLength)
+                term = term[:prefixLength] + suffix
+                termDictionary.appendTerm( term, prefixLength=prefixLength )
+
+        termDictionary.finalize()
+
+        if termDictionary.numTerm != int(headerDict['numTerm']):
+            raise ValueError( 'read() - Term dictionary at {} is truncated.'.format( termDictionaryFilePath ) )
+
+        return termDictionary
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import sys
+from optparse import OptionParser
+
+from indexer.IndexMerger import IndexMerger, MergeBufferBudget
+from indexer.IndexManifest import IndexManifest, IndexFileKind, readCurrentGeneration, createStagingDir, publishGeneration
+from metrics.Metrics import metrics
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+MinNumRequiredArgs = 1
+
+IndexDir = 'index'
+MergeWorkDir = 'merge_run'
+
+#   Merged index files are streamed as text posting files
+IndexFileName = 'index.txt'
+InvertedIndexFileName = 'inverted_index.txt'
+DocIdIndexFileName = 'docId_index.pickle'
+DocIdStoreFileName = 'docId_store.bin'
+TermDictionaryFileName = 'term_dictionary.txt'
+VocabularyFilterFileName = 'vocabulary_filter.bin'
+TermFreqIndexFileName = 'term_freq_index.txt'
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+##########################################################################
+#   MAIN
+##########################################################################
+
+def main():
+
+    parser = OptionParser(usage='usage: %prog [options] <SOURCE_INDEX_DIR> [<SOURCE_INDEX_DIR> ...]',
+                            version='%prog 0.0')
+    parser.add_option( '--indexDir',
+                        action='store',
+                        dest='indexDir',
+                        default=IndexDir,
+                        help='index directory merged generation is published to (default = {!r})'.format(IndexDir) )
+    parser.add_option( '--workDir',
+                        action='store',
+                        dest='workDir',
+                        default=MergeWorkDir,
+                        help='directory holding merge runs, removed afterwards (default = {!r})'.format(MergeWorkDir) )
+    parser.add_option( '--bufferBudget',
+                        action='store',
+                        type='int',
+                        dest='bufferBudget',
+                        default=MergeBufferBudget >> 20,
+                        help='megabytes of merged postings held before spilling a run (default = {!r})'.format(MergeBufferBudget >> 20) )
+    parser.add_option( '--metrics',
+                        action='store',
+                        dest='metricsFilePath',
+                        default=None,
+                        help='collect stage metrics into given file, prometheus text if it ends with .prom or json otherwise' )
+    parser.add_option( '--profile',
+                        action='store',
+                        dest='profileFilePath',
+                        default=None,
+                        help='capture cProfile statistics into given file' )
+    parser.add_option( '--traceMemory',
+                        action='store_true',
+                        dest='isTraceMemory',
+                        default=False,
+                        help='measure memory high-water marks with tracemalloc' )
+
+    (options, args) = parser.parse_args()
+
+    if len(args) < MinNumRequiredArgs:
+        parser.error('Incorrect number of arguments')
+        sys.exit(-1)
+
+    #   Enable metrics and profiling capture
+    if options.metricsFilePath is not None or options.profileFilePath is not None:
+        metrics.enable( isProfile=options.profileFilePath is not None, isTraceMemory=options.isTraceMemory )
+
+    #   Merge published generation of each source, in given order
+    try:
+        sourceList = [ readCurrentGeneration( sourceIndexDir ) for sourceIndexDir in args ]
+    except ValueError as error:
+        print('merge_index_dir - {}'.format(error))
+        sys.exit(-1)
+
+    for generationDir, indexManifest in sourceList:
+        skippedFileKindList = [ fileKind for fileKind in indexManifest.segmentDict.keys() if fileKind not in ( IndexFileKind.INDEX, IndexFileKind.INVERTED_INDEX, IndexFileKind.DOC_ID_INDEX, IndexFileKind.DOC_ID_STORE, IndexFileKind.TERM_DICTIONARY, IndexFileKind.VOCABULARY_FILTER, IndexFileKind.TERM_FREQ_INDEX ) ]
+        if len(skippedFileKindList) > 0:
+            print('merge_index_dir - {} of {} are not merged.'.format(', '.join(skippedFileKindList), generationDir))
+
+    #   Initialize index file name dictionary of manifest
+    fileNameDict = { IndexFileKind.INDEX: IndexFileName,
+                        IndexFileKind.INVERTED_INDEX: InvertedIndexFileName,
+                        IndexFileKind.DOC_ID_INDEX: DocIdIndexFileName,
+                        IndexFileKind.DOC_ID_STORE: DocIdStoreFileName,
+                        IndexFileKind.TERM_DICTIONARY: TermDictionaryFileName,
+                        IndexFileKind.VOCABULARY_FILTER: VocabularyFilterFileName,
+                        IndexFileKind.TERM_FREQ_INDEX: TermFreqIndexFileName }
+
+    #   Build merged generation aside from the published one
+    generationId, stagingDir = createStagingDir( options.indexDir )
+
+    indexMerger = IndexMerger( options.workDir, bufferBudget=options.bufferBudget << 20 )
+
+    try:
+        mergeStatDict = indexMerger.merge( sourceList, stagingDir, fileNameDict )
+    except ValueError as error:
+        print('merge_index_dir - {}'.format(error))
+        sys.exit(-1)
+
+    print('merge_index_dir - Merged {} indexes: {numDoc} documents, {numTerm} terms, {numPosting} postings through {numDocIdRun} docId runs.'.format(len(sourceList), **mergeStatDict))
+
+    if mergeStatDict['numApproximatePosting'] > 0:
+        print('merge_index_dir - {numApproximatePosting} postings of terms occurring in every document of a source built without term frequency index have zero weight, their term frequency is taken as one.'.format(**mergeStatDict))
+
+    #   Snippets can be read from a common text file directory only
+    textFileDirSet = { indexManifest.statDict.get( 'textFileDir' ) for _, indexManifest in sourceList }
+
+    #   Collect corpus statistics
+    statDict = { 'numTerm': mergeStatDict['numTerm'],
+                    'numPosting': mergeStatDict['numPosting'],
+                    'totalByteSize': sum( indexManifest.statDict.get( 'totalByteSize', 0 ) for _, indexManifest in sourceList ),
+                    'numDuplicate': mergeStatDict['numDoc'] - mergeStatDict['numIndexedDoc'],
+                    'reorderStat': None,
+                    'textFileDir': textFileDirSet.pop() if len(textFileDirSet) == 1 else None,
+                    'mergedGenerationDirList': [ os.path.abspath( generationDir ) for generationDir, _ in sourceList ] }
+
+    #   Publish generation atomically, searchers never see a partial index
+    indexManifest = IndexManifest( mergeStatDict['numDoc'],
+                                    sourceList[0][1].tokenizerOption,
+                                    sourceList[0][1].normalizerOption,
+                                    IndexMerger.computeFileListHash( sourceList ),
+                                    fileNameDict,
+                                    statDict=statDict )
+    generationDir = publishGeneration( options.indexDir, generationId, indexManifest )
+
+    print('merge_index_dir - Published index generation at {}.'.format(generationDir))
+
+    #   Dump metrics and profiling capture
+    if options.profileFilePath is not None:
+        metrics.writeProfile( options.profileFilePath )
+    if options.metricsFilePath is not None:
+        metrics.writeMetrics( options.metricsFilePath )
+
+##########################################################################
+#   RUN
+##########################################################################
+
+if __name__ == '__main__':
+    main()
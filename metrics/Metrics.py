@@ -0,0 +1,201 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import json
+import time
+import cProfile
+import tracemalloc
+from typing import Optional, Dict
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+PrometheusPrefix = 'lltse'
+
+PrometheusFileExtension = '.prom'
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getMemoryHighWater() -> Optional[int]:
+    ''' This function gets memory high-water mark in bytes, from tracemalloc
+        if it is tracing or from process maximum resident set size otherwise
+    '''
+
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+
+    if resource is None:
+        return None
+
+    #   NOTE - ru_maxrss is in kilobytes on linux
+    return resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss*1024
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class Metrics(object):
+    ''' This class collects per-stage timers, counters and memory high-water
+        marks. Hot paths must check isEnabled before calling any method,
+        so disabled metrics only cost an attribute lookup.
+    '''
+
+    def __init__( self ):
+        self.isEnabled = False
+        self.profiler = None
+        self.reset()
+
+    def reset( self ):
+        ''' This function clears all collected values
+        '''
+
+        #   Stage name to [ number of calls, total seconds, max seconds ]
+        self.timerDict = dict()
+        self.counterDict = dict()
+        self.memoryHighWaterDict = dict()
+
+    def enable( self, isProfile : Optional[bool] = False, isTraceMemory : Optional[bool] = False ):
+        ''' This function enables metrics collection and optionally
+            starts cProfile and tracemalloc capture
+        '''
+
+        self.isEnabled = True
+
+        if isTraceMemory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        if isProfile and self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def disable( self ):
+        ''' This function disables metrics collection and stops capture
+        '''
+
+        self.isEnabled = False
+
+        if self.profiler is not None:
+            self.profiler.disable()
+
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def addTime( self, stageName : str, seconds : float ):
+        ''' This function accumulates elapsed seconds of given stage
+        '''
+
+        timer = self.timerDict.get( stageName )
+
+        if timer is None:
+            self.timerDict[ stageName ] = [ 1, seconds, seconds ]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max( timer[2], seconds )
+
+    def addTimeSince( self, stageName : str, startTime : float ) -> float:
+        ''' This function accumulates seconds elapsed since given
+            perf_counter start time and returns current time
+        '''
+
+        currentTime = time.perf_counter()
+
+        self.addTime( stageName, currentTime - startTime )
+
+        return currentTime
+
+    def incrementCounter( self, counterName : str, value : Optional[int] = 1 ):
+        ''' This function increments given counter
+        '''
+
+        self.counterDict[ counterName ] = self.counterDict.get( counterName, 0 ) + value
+
+    def recordMemory( self, pointName : str ):
+        ''' This function records memory high-water mark at given point
+        '''
+
+        memoryHighWater = getMemoryHighWater()
+
+        if memoryHighWater is not None:
+            self.memoryHighWaterDict[ pointName ] = max( self.memoryHighWaterDict.get( pointName, 0 ), memoryHighWater )
+
+    def getSnapshot( self ) -> Dict:
+        ''' This function returns collected values as plain dictionary
+        '''
+
+        return { 'timer': { stageName: { 'count': timer[0], 'seconds': timer[1], 'maxSeconds': timer[2] } for stageName, timer in self.timerDict.items() },
+                    'counter': dict( self.counterDict ),
+                    'memoryHighWater': dict( self.memoryHighWaterDict ) }
+
+    def mergeSnapshot( self, snapshot : Dict ):
+        ''' This function merges snapshot collected elsewhere, e.g. in
+            worker process, into this metrics
+        '''
+
+        for stageName, timer in snapshot['timer'].items():
+            if stageName not in self.timerDict:
+                self.timerDict[ stageName ] = [ 0, 0.0, 0.0 ]
+            self.timerDict[ stageName ][0] += timer['count']
+            self.timerDict[ stageName ][1] += timer['seconds']
+            self.timerDict[ stageName ][2] = max( self.timerDict[ stageName ][2], timer['maxSeconds'] )
+
+        for counterName, value in snapshot['counter'].items():
+            self.incrementCounter( counterName, value )
+
+        for pointName, memoryHighWater in snapshot['memoryHighWater'].items():
+            self.memoryHighWaterDict[ pointName ] = max( self.memoryHighWaterDict.get( pointName, 0 ), memoryHighWater )
+
+    def formatPrometheus( self ) -> str:
+        ''' This function formats collected values in prometheus text
+            exposition format
+        '''
+
+        lineList = [ '# TYPE {}_stage_seconds_total counter'.format( PrometheusPrefix ) ]
+        lineList += [ '{}_stage_seconds_total{{stage="{}"}} {}'.format( PrometheusPrefix, stageName, timer[1] ) for stageName, timer in sorted( self.timerDict.items() ) ]
+
+        lineList += [ '# TYPE {}_stage_calls_total counter'.format( PrometheusPrefix ) ]
+        lineList += [ '{}_stage_calls_total{{stage="{}"}} {}'.format( PrometheusPrefix, stageName, timer[0] ) for stageName, timer in sorted( self.timerDict.items() ) ]
+
+        lineList += [ '# TYPE {}_stage_max_seconds gauge'.format( PrometheusPrefix ) ]
+        lineList += [ '{}_stage_max_seconds{{stage="{}"}} {}'.format( PrometheusPrefix, stageName, timer[2] ) for stageName, timer in sorted( self.timerDict.items() ) ]
+
+        lineList += [ '# TYPE {}_events_total counter'.format( PrometheusPrefix ) ]
+        lineList += [ '{}_events_total{{name="{}"}} {}'.format( PrometheusPrefix, counterName, value ) for counterName, value in sorted( self.counterDict.items() ) ]
+
+        lineList += [ '# TYPE {}_memory_high_water_bytes gauge'.format( PrometheusPrefix ) ]
+        lineList += [ '{}_memory_high_water_bytes{{point="{}"}} {}'.format( PrometheusPrefix, pointName, value ) for pointName, value in sorted( self.memoryHighWaterDict.items() ) ]
+
+        return '\n'.join( lineList ) + '\n'
+
+    def writeMetrics( self, metricsFilePath : str ):
+        ''' This function writes collected values to file, in prometheus
+            text format if file name ends with .prom or as json otherwise
+        '''
+
+        with open( metricsFilePath, 'w', encoding='utf-8' ) as metricsFile:
+            if metricsFilePath.endswith( PrometheusFileExtension ):
+                metricsFile.write( self.formatPrometheus() )
+            else:
+                json.dump( self.getSnapshot(), metricsFile, indent=4, sort_keys=True )
+
+    def writeProfile( self, profileFilePath : str ):
+        ''' This function writes captured cProfile statistics readable by
+            pstats module
+        '''
+
+        if self.profiler is None:
+            raise ValueError( 'writeProfile() - Profiling is not enabled.' )
+
+        self.profiler.dump_stats( profileFilePath )
+
+#   NOTE - Process wide metrics shared by all modules
+metrics = Metrics()
@@ -0,0 +1,152 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import threading
+import traceback
+from typing import Optional, Callable, List
+
+from indexer.IndexManifest import getCurrentGenerationDir, readCurrentGeneration
+from indexer.IndexGeneration import IndexGeneration
+from .QueryManager import QueryManager
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   Seconds between two checks for a newly published generation
+PollInterval = 5.0
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class IndexReloader(object):
+    ''' This class keeps a query manager on the latest published index
+        generation. A watcher thread polls index directory, loads a new
+        generation in the background and swaps it in atomically, while
+        queries holding the previous generation finish on it.
+    '''
+
+    def __init__( self, indexDir : str, fileKindList : List[str],
+                        numProcess : Optional[int] = 1,
+                        pollInterval : Optional[float] = PollInterval ):
+        self.indexDir = indexDir
+        self.fileKindList = fileKindList
+        self.numProcess = numProcess
+        self.pollInterval = pollInterval
+        self.lock = threading.Lock()
+        self.currentGeneration = None
+        self.queryManager = None
+        self.failedGenerationDir = None
+        self.swapCallbackList = list()
+        self.stopEvent = threading.Event()
+        self.thread = threading.Thread( target=self.run, daemon=True )
+
+    def loadGeneration( self ) -> IndexGeneration:
+        ''' This function loads currently published generation
+        '''
+
+        generationDir, indexManifest = readCurrentGeneration( self.indexDir )
+
+        return IndexGeneration.load( generationDir, indexManifest, self.fileKindList, numProcess=self.numProcess )
+
+    def load( self ):
+        ''' This function loads currently published generation in foreground
+            and constructs query manager on it
+        '''
+
+        self.swap( self.loadGeneration() )
+
+    def addSwapCallback( self, swapCallback : Callable ):
+        ''' This function registers function called with the new generation
+            after every swap, from watcher thread
+        '''
+
+        self.swapCallbackList.append( swapCallback )
+
+    def acquire( self ) -> IndexGeneration:
+        ''' This function gets current generation and registers caller as
+            its user, caller must release it, e.g. by using it as context
+            manager
+        '''
+
+        with self.lock:
+            return self.currentGeneration.acquire()
+
+    def swap( self, generation : IndexGeneration ):
+        ''' This function makes given generation current, previous one is
+            freed once its last user releases it
+        '''
+
+        with self.lock:
+            previousGeneration = self.currentGeneration
+            self.currentGeneration = generation
+
+            #   Query with text processing options of the new generation
+            if self.queryManager is None:
+                self.queryManager = QueryManager( generation.indexer,
+                                                    generation.indexManifest.tokenizerOption,
+                                                    generation.indexManifest.normalizerOption )
+            else:
+                self.queryManager.indexer = generation.indexer
+                self.queryManager.tokenizerOption = generation.indexManifest.tokenizerOption
+                self.queryManager.normalizerOption = generation.indexManifest.normalizerOption
+
+        if previousGeneration is not None:
+            previousGeneration.retire()
+
+        for swapCallback in self.swapCallbackList:
+            swapCallback( generation )
+
+    def checkForNewGeneration( self ) -> bool:
+        ''' This function loads and swaps in a newly published generation,
+            returns whether there was one
+        '''
+
+        try:
+            generationDir = getCurrentGenerationDir( self.indexDir )
+        except ValueError:
+            return False
+
+        if generationDir == self.currentGeneration.generationDir or generationDir == self.failedGenerationDir:
+            return False
+
+        try:
+            generation = self.loadGeneration()
+        except Exception:
+
+            #   Keep serving current generation, do not retry a broken one
+            traceback.print_exc()
+            self.failedGenerationDir = generationDir
+            return False
+
+        self.swap( generation )
+
+        return True
+
+    def start( self ):
+        ''' This function starts watcher thread
+        '''
+
+        self.thread.start()
+
+    def stop( self ):
+        ''' This function stops watcher thread
+        '''
+
+        self.stopEvent.set()
+
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def run( self ):
+        ''' This function is watcher thread loop
+        '''
+
+        while not self.stopEvent.wait( self.pollInterval ):
+            self.checkForNewGeneration()
@@ -2,25 +2,69 @@
 #   IMPORT
 ##########################################################################
 
+import re
 import math
-from typing import Optional, List, Dict
+import time
+import heapq
+import base64
+import struct
+import binascii
+import itertools
+from typing import Optional, Iterator, List, Dict, Set, Tuple
 from textprocessor.Tokenizer import Tokenizer, TokenizerOption
 from textprocessor.Normalizer import Normalizer, NormalizerOption
+from metrics.Metrics import metrics
+from .TermExpander import TermExpander, WildcardCharSet, DefaultMaxExpansionNum, DefaultMaxEditDistance
+from .RankedResultCache import RankedResultCache, getRankKey
 
 ##########################################################################
 #   GLOBAL
 ##########################################################################
 
+#   Query term operators, e.g. `whal*` or `wh?le` for wildcard and `whael~`
+#   or `whael~1` for fuzzy matching. Operators only apply within backquotes,
+#   so punctuation of natural language queries, e.g. moby dick?, is not
+#   taken for them.
+OperatorQuoteChar = '`'
+WildcardSplitPattern = r'([*?])'
+FuzzyOperatorPattern = r'^(.+?)~([0-9]*)$'
+
+#   Number of leading characters a fuzzy match must share with query term
+FuzzyPrefixLength = 1
+
+#   Number of postings scored between two budget checks, so a large low
+#   impact segment cannot overrun time budget
+ImpactChunkSize = 1024
+
+#   Number of documents scored between two partial top results
+PartialResultChunkSize = 2048
+
+#   Page cursor holds score and docId of the last result of a page
+CursorFormat = '<dQ'
+
 ##########################################################################
 #   HELPER
 ##########################################################################
 
-def constructQueryVector( queryTermList : List ) -> Dict:
-    ''' This function constructs unit query vector as term to nomralized
-        weight td-idf dictionary
+def constructQueryVector( queryTermIdListList : List[List[int]] ) -> Dict:
+    ''' This function constructs unit query vector as termId to nomralized
+        weight td-idf dictionary. Each query term gets the same weight which
+        is shared among termIds it expands to.
     '''
 
-    return { queryTerm: 1/math.sqrt(len(queryTermList)) for queryTerm in queryTermList }
+    #   Initialize termId to weight dictionary
+    queryVector = dict()
+
+    if len(queryTermIdListList) == 0:
+        return queryVector
+
+    queryTermWeight = 1/math.sqrt(len(queryTermIdListList))
+
+    for queryTermIdList in queryTermIdListList:
+        for termId in queryTermIdList:
+            queryVector[termId] = max( queryVector.get( termId, 0 ), queryTermWeight/math.sqrt(len(queryTermIdList)) )
+
+    return queryVector
 
 def computeCosineSimilarity( queryVector : Dict, docVector : Dict ) -> float:
     ''' This function computes cosine similarity between query vector and
@@ -36,37 +80,497 @@ def computeCosineSimilarity( queryVector : Dict, docVector : Dict ) -> float:
 
     return cosineSimilarity
 
+def encodeCursor( score : float, docId : int ) -> str:
+    ''' This function encodes position of a result in ranking as opaque
+        page cursor
+    '''
+
+    return base64.urlsafe_b64encode( struct.pack( CursorFormat, score, docId ) ).decode( 'ascii' )
+
+def decodeCursor( cursor : str ) -> Tuple[float, int]:
+    ''' This function decodes page cursor into rank key of the result it
+        points at
+    '''
+
+    try:
+        score, docId = struct.unpack( CursorFormat, base64.urlsafe_b64decode( cursor.encode( 'ascii' ) ) )
+    except ( binascii.Error, struct.error, UnicodeEncodeError ):
+        raise ValueError( 'decodeCursor() - Invalid cursor {!r}.'.format( cursor ) )
+
+    return getRankKey( ( docId, score ) )
+
 ##########################################################################
 #   CLASS
 ##########################################################################
 
+class QueryTermKind(object):
+    EXACT = 0
+    WILDCARD = 1
+    FUZZY = 2
+
 class QueryManager(object):
 
     def __init__(self, indexer,
                         tokenizerOption : Optional[int] = TokenizerOption.NONE,
-                        normalizerOption : Optional[int] = NormalizerOption.NONE):
+                        normalizerOption : Optional[int] = NormalizerOption.NONE,
+                        maxExpansionNum : Optional[int] = DefaultMaxExpansionNum):
         self.indexer = indexer
         self.tokenizerOption = tokenizerOption
         self.normalizerOption = normalizerOption
+        self.maxExpansionNum = maxExpansionNum
+
+        #   Ranked results of recent queries for paging through them
+        self.rankedResultCache = RankedResultCache()
+
+    def normalizeQueryText( self, text : str ) -> str:
+        ''' This function normalizes part of a query term, or returns empty
+            string if nothing is left
+        '''
+
+        try:
+            return Normalizer.normalize( text, isRemovePunctuation=self.normalizerOption & NormalizerOption.REMOVE_PUNCTUATION,
+                                                isCaseFolding=self.normalizerOption & NormalizerOption.CASE_FOLDING )
+        except ValueError:
+            return ''
+
+    def parseQueryTokenList( self, tokenList : List[str] ) -> List[Tuple]:
+        ''' This function parses query tokens into (kind, text, parameter)
+            query terms. Operators are detected in backquoted tokens before
+            normalization since punctuation removal would strip them.
+        '''
+
+        queryTermList = list()
+
+        for token in tokenList:
+
+            isOperatorToken = len(token) > 2 and token[0] == OperatorQuoteChar and token[-1] == OperatorQuoteChar
+            if isOperatorToken:
+                token = token[1:-1]
+
+            matched = re.match( FuzzyOperatorPattern, token ) if isOperatorToken else None
+
+            if matched:
+
+                #   Fuzzy term with optional maximum edit distance
+                text = self.normalizeQueryText( matched.group(1) )
+                maxEditDistance = int(matched.group(2)) if matched.group(2) else DefaultMaxEditDistance
+                queryTerm = ( QueryTermKind.FUZZY, text, maxEditDistance )
+
+            elif isOperatorToken and any( char in WildcardCharSet for char in token ):
+
+                #   Normalize literal parts between wildcards
+                text = ''.join( piece if piece in WildcardCharSet else self.normalizeQueryText( piece ) for piece in re.split( WildcardSplitPattern, token ) if piece )
+
+                #   Skip pattern with no literal part which would match every term
+                if all( char in WildcardCharSet for char in text ):
+                    continue
+
+                queryTerm = ( QueryTermKind.WILDCARD, text, None )
+
+            else:
+                text = self.normalizeQueryText( token )
+                queryTerm = ( QueryTermKind.EXACT, text, None )
+
+            #   Skip query term which normalized to nothing
+            if text == '':
+                continue
+
+            queryTermList.append( queryTerm )
+
+        return queryTermList
+
+    def expandQueryTerm( self, queryTerm : Tuple, indexer ) -> List[int]:
+        ''' This function maps query term to termIds of matching index terms
+        '''
 
-    def query( self, queryStr : str ):
-        ''' This function queries string from loaded index
+        kind, text, parameter = queryTerm
+
+        if kind == QueryTermKind.EXACT:
+            termId = indexer.getTermId( text )
+            return [ termId ] if termId is not None else list()
+
+        termExpander = TermExpander( indexer.termDictionary, maxExpansionNum=self.maxExpansionNum )
+
+        if kind == QueryTermKind.WILDCARD:
+            return termExpander.expandWildcard( text )
+
+        return termExpander.expandFuzzy( text, maxEditDistance=parameter, prefixLength=FuzzyPrefixLength )
+
+    def constructQueryVectorFromStr( self, queryStr : str, indexer ) -> Dict:
+        ''' This function preprocesses query string and constructs termId
+            to weight query vector
         '''
 
-        assert(self.indexer != None)
+        isMetricsEnabled = metrics.isEnabled
+        if isMetricsEnabled:
+            startTime = time.perf_counter()
 
         #   Preprocess query string
-        queryTermList = Tokenizer.tokenize( queryStr, isRemoveStopWord=self.tokenizerOption & TokenizerOption.REMOVE_STOP_WORDS )
-        queryTermList = Normalizer.normalizeTokenList( queryTermList, isRemovePunctuation=self.normalizerOption & NormalizerOption.REMOVE_PUNCTUATION,
-                                                                        isCaseFolding=self.normalizerOption & NormalizerOption.CASE_FOLDING )
+        queryTokenList = Tokenizer.tokenize( queryStr, isRemoveStopWord=self.tokenizerOption & TokenizerOption.REMOVE_STOP_WORDS )
+
+        if isMetricsEnabled:
+            startTime = metrics.addTimeSince( 'query_tokenize', startTime )
+
+        queryTermList = self.parseQueryTokenList( queryTokenList )
+
+        if isMetricsEnabled:
+            startTime = metrics.addTimeSince( 'query_normalize', startTime )
+
+        #   Map query terms to termIds, terms not in index never match
+        queryTermIdListList = [ self.expandQueryTerm( queryTerm, indexer ) for queryTerm in queryTermList ]
+
+        if isMetricsEnabled:
+            metrics.addTimeSince( 'query_expand', startTime )
+            metrics.incrementCounter( 'terms_expanded', sum( len(queryTermIdList) for queryTermIdList in queryTermIdListList ) )
 
         #   Construct query vector
-        queryVector = constructQueryVector( queryTermList )
+        return constructQueryVector( queryTermIdListList )
+
+    def getQueryTermSetList( self, queryStr : str, indexer = None ) -> List[Set[str]]:
+        ''' This function preprocesses query string and gets index terms
+            each query term matches, e.g. for highlighting them
+        '''
+
+        indexer = indexer if indexer is not None else self.indexer
+
+        queryTokenList = Tokenizer.tokenize( queryStr, isRemoveStopWord=self.tokenizerOption & TokenizerOption.REMOVE_STOP_WORDS )
+
+        return [ { indexer.termDictionary.getTerm( termId ) for termId in self.expandQueryTerm( queryTerm, indexer ) } for queryTerm in self.parseQueryTokenList( queryTokenList ) ]
+
+    def query( self, queryStr : str, indexer = None ):
+        ''' This function queries string from loaded index, or from given
+            indexer, e.g. one of an index generation held by the caller
+        '''
+
+        #   Query a single indexer throughout, even if it is swapped meanwhile
+        indexer = indexer if indexer is not None else self.indexer
+
+        assert(indexer != None)
+
+        #   Construct query vector
+        queryVector = self.constructQueryVectorFromStr( queryStr, indexer )
+
+        isMetricsEnabled = metrics.isEnabled
+        if isMetricsEnabled:
+            startTime = time.perf_counter()
 
         #   Compute cosine similarity with all document vectors
-        docIdToConsineSimilarityTupleList = [ (docId, computeCosineSimilarity( queryVector, self.indexer.invertedIndex[docId] )) for docId in self.indexer.invertedIndex.keys() ]
+        docIdToConsineSimilarityTupleList = [ (docId, computeCosineSimilarity( queryVector, indexer.invertedIndex[docId] )) for docId in indexer.invertedIndex.keys() ]
+
+        if isMetricsEnabled:
+            startTime = metrics.addTimeSince( 'score', startTime )
 
         #   Sort result by cosine similarity
         docIdToConsineSimilarityTupleList.sort( key=lambda x: x[1], reverse=True )
 
+        if isMetricsEnabled:
+            metrics.addTimeSince( 'sort', startTime )
+            metrics.incrementCounter( 'queries' )
+            metrics.incrementCounter( 'docs_scored', len(docIdToConsineSimilarityTupleList) )
+            metrics.incrementCounter( 'postings_scanned', len(docIdToConsineSimilarityTupleList)*len(queryVector) )
+
         return docIdToConsineSimilarityTupleList
+
+    def iterQueryTopResult( self, queryStr : str, maxResultNum : int, chunkSize : Optional[int] = PartialResultChunkSize, indexer = None ) -> Iterator[List[Tuple[int, float]]]:
+        ''' This function queries string from loaded index chunk by chunk
+            and yields top results among documents scored so far, the last
+            one is the exact top results. Consumer cancels the query by
+            not asking for the next one.
+        '''
+
+        indexer = indexer if indexer is not None else self.indexer
+
+        assert(indexer != None)
+
+        #   Construct query vector
+        queryVector = self.constructQueryVectorFromStr( queryStr, indexer )
+
+        isMetricsEnabled = metrics.isEnabled
+        if isMetricsEnabled:
+            startTime = time.perf_counter()
+
+        numDoc = len(indexer.invertedIndex)
+        docIdIterator = iter( indexer.invertedIndex.keys() )
+        topResultList = list()
+
+        #   NOTE - Empty index still yields one empty result
+        for chunkStart in range( 0, max( numDoc, 1 ), chunkSize ):
+
+            #   Score next chunk of documents and merge it into top results so far
+            chunkResultList = [ (docId, computeCosineSimilarity( queryVector, indexer.invertedIndex[docId] )) for docId in itertools.islice( docIdIterator, chunkSize ) ]
+            topResultList = heapq.nsmallest( maxResultNum, topResultList + chunkResultList, key=getRankKey )
+
+            if isMetricsEnabled and chunkStart + chunkSize >= numDoc:
+                metrics.addTimeSince( 'score', startTime )
+                metrics.incrementCounter( 'queries' )
+                metrics.incrementCounter( 'docs_scored', numDoc )
+
+            yield topResultList
+
+    def queryPage( self, queryStr : str, pageSize : int, cursor : Optional[str] = None, indexer = None ) -> Tuple[List[Tuple[int, float]], Optional[str]]:
+        ''' This function queries a page of matching documents ranked after
+            given cursor, or the first page without one, and returns the
+            page with cursor of the next one, or None if it is the last.
+            Ranked results are cached a window at a time, so a page within
+            the window is sliced without scoring, and a page past it scores
+            the corpus once and keeps only a window of results after the
+            cursor, which costs the same as the first page.
+        '''
+
+        indexer = indexer if indexer is not None else self.indexer
+
+        assert(indexer != None)
+
+        afterRankKey = decodeCursor( cursor ) if cursor is not None else None
+
+        cachedPage = self.rankedResultCache.getPage( queryStr, indexer, afterRankKey, pageSize )
+
+        if cachedPage is not None:
+
+            if metrics.isEnabled:
+                metrics.incrementCounter( 'queries' )
+                metrics.incrementCounter( 'page_cache_hits' )
+
+            docIdToConsineSimilarityTupleList, isMore = cachedPage
+
+        else:
+
+            #   Construct query vector
+            queryVector = self.constructQueryVectorFromStr( queryStr, indexer )
+
+            isMetricsEnabled = metrics.isEnabled
+            if isMetricsEnabled:
+                startTime = time.perf_counter()
+
+            #   Only documents matching some query term are ranked, one
+            #   result more than window tells whether it is the last one
+            windowSize = max( self.rankedResultCache.windowSize, pageSize )
+            resultIterator = ( ( docId, computeCosineSimilarity( queryVector, docVector ) ) for docId, docVector in indexer.invertedIndex.items() )
+            matchedResultIterator = ( result for result in resultIterator if result[1] > 0 and ( afterRankKey is None or getRankKey( result ) > afterRankKey ) )
+            windowList = heapq.nsmallest( windowSize + 1, matchedResultIterator, key=getRankKey )
+
+            isLast = len(windowList) <= windowSize
+            windowList = windowList[:windowSize]
+            self.rankedResultCache.putWindow( queryStr, indexer, afterRankKey, windowList, isLast )
+
+            docIdToConsineSimilarityTupleList = windowList[:pageSize]
+            isMore = len(windowList) > pageSize or not isLast
+
+            if isMetricsEnabled:
+                metrics.addTimeSince( 'score', startTime )
+                metrics.incrementCounter( 'queries' )
+                metrics.incrementCounter( 'docs_scored', len(indexer.invertedIndex) )
+
+        nextCursor = encodeCursor( docIdToConsineSimilarityTupleList[-1][1], docIdToConsineSimilarityTupleList[-1][0] ) if isMore and len(docIdToConsineSimilarityTupleList) > 0 else None
+
+        return docIdToConsineSimilarityTupleList, nextCursor
+
+    def querySimilar( self, docId : int, maxResultNum : int, indexer = None ) -> List[Tuple[int, float]]:
+        ''' This function finds documents most similar to given docId,
+            i.e. more like this, from loaded similarity index. Candidates
+            sharing a sketch bucket are re-ranked by exact cosine similarity
+            with loaded inverted index.
+        '''
+
+        indexer = indexer if indexer is not None else self.indexer
+
+        assert(indexer != None)
+        assert(indexer.similarityIndex != None)
+        assert(indexer.invertedIndex != None)
+
+        if docId not in indexer.invertedIndex:
+            raise ValueError( 'querySimilar() - DocId {} is not indexed.'.format( docId ) )
+
+        isMetricsEnabled = metrics.isEnabled
+        if isMetricsEnabled:
+            startTime = time.perf_counter()
+
+        docIdToConsineSimilarityTupleList, numCandidate = indexer.similarityIndex.findSimilar( docId, maxResultNum, indexer.invertedIndex )
+
+        if isMetricsEnabled:
+            metrics.addTimeSince( 'score', startTime )
+            metrics.incrementCounter( 'queries' )
+            metrics.incrementCounter( 'docs_scored', numCandidate )
+
+        return docIdToConsineSimilarityTupleList
+
+    def queryTiered( self, queryStr : str, maxResultNum : int, indexer = None ) -> List[Tuple[int, float]]:
+        ''' This function queries string from loaded tiered index and returns
+            top results. Top tier postings are scored first, and tail postings
+            are only scored when the top results are not yet safe, i.e. some
+            other document could still outscore them using its tail weights.
+        '''
+
+        indexer = indexer if indexer is not None else self.indexer
+
+        assert(indexer != None)
+        assert(indexer.tieredIndex != None)
+
+        #   Construct query vector
+        queryVector = self.constructQueryVectorFromStr( queryStr, indexer )
+
+        isMetricsEnabled = metrics.isEnabled
+        if isMetricsEnabled:
+            startTime = time.perf_counter()
+
+        #   Get tiered postings of query terms
+        queryTierList = [ ( queryWeight, ) + indexer.tieredIndex[termId] for termId, queryWeight in queryVector.items() if termId in indexer.tieredIndex ]
+
+        #   Accumulate top tier scores and tail bound of terms each document was seen in
+        docIdToScoreDict = dict()
+        docIdToSeenTailBoundDict = dict()
+        for queryWeight, topTierList, _, tailMaxWeight in queryTierList:
+            for docId, weight in topTierList:
+                docIdToScoreDict[docId] = docIdToScoreDict.get( docId, 0.0 ) + queryWeight*weight
+                docIdToSeenTailBoundDict[docId] = docIdToSeenTailBoundDict.get( docId, 0.0 ) + queryWeight*tailMaxWeight
+
+        #   Largest score any document could still gain from tails
+        totalTailBound = sum( queryWeight*tailMaxWeight for queryWeight, _, _, tailMaxWeight in queryTierList )
+
+        #   Rank by score known so far, ties by docId as paging cursors do
+        candidateList = sorted( docIdToScoreDict.items(), key=getRankKey )
+        topResultList = candidateList[:maxResultNum]
+
+        #   Check if no other document can reach the lowest top result
+        if len(topResultList) < maxResultNum:
+            isSafe = totalTailBound == 0
+        else:
+            maxOtherScoreBound = max( [ totalTailBound ] + [ score + totalTailBound - docIdToSeenTailBoundDict[docId] for docId, score in candidateList[maxResultNum:] ] )
+
+            #   NOTE -  A document merely tying the lowest top result may
+            #           have a lower docId and rank before it
+            isSafe = totalTailBound == 0 or topResultList[-1][1] > maxOtherScoreBound
+
+        if isSafe:
+
+            #   Complete scores of top results only, tiers are disjoint
+            docIdToConsineSimilarityTupleList = [ ( docId, score + sum( queryWeight*tailDict.get( docId, 0.0 ) for queryWeight, _, tailDict, _ in queryTierList ) ) for docId, score in topResultList ]
+
+        else:
+
+            #   Fall back to scoring tail postings of all documents
+            for queryWeight, _, tailDict, _ in queryTierList:
+                for docId, weight in tailDict.items():
+                    docIdToScoreDict[docId] = docIdToScoreDict.get( docId, 0.0 ) + queryWeight*weight
+
+            docIdToConsineSimilarityTupleList = list( docIdToScoreDict.items() )
+
+            if isMetricsEnabled:
+                metrics.incrementCounter( 'tier_fallbacks' )
+
+        #   Sort result by cosine similarity
+        docIdToConsineSimilarityTupleList.sort( key=getRankKey )
+
+        if isMetricsEnabled:
+            metrics.addTimeSince( 'score', startTime )
+            metrics.incrementCounter( 'queries' )
+            metrics.incrementCounter( 'postings_scanned', sum( len(topTierList) + ( 0 if isSafe else len(tailDict) ) for _, topTierList, tailDict, _ in queryTierList ) )
+
+        return docIdToConsineSimilarityTupleList[:maxResultNum]
+
+    def queryImpactOrdered( self, queryStr : str, maxResultNum : int,
+                                postingBudget : Optional[int] = None,
+                                timeBudget : Optional[float] = None,
+                                indexer = None ) -> Tuple[List[Tuple[int, float]], bool]:
+        ''' This function queries string from loaded impact ordered index
+            score-at-a-time. Impact segments of all query terms are scored
+            from highest to lowest score contribution, until all of them are
+            scored or posting budget or time budget in seconds runs out.
+            Documents which may be among top results despite quantization
+            are re-ranked by exact cosine similarity if inverted index is
+            loaded. Returns top results and whether they are exact, i.e. all
+            postings were scored and re-ranked, or approximate.
+        '''
+
+        indexer = indexer if indexer is not None else self.indexer
+
+        assert(indexer != None)
+        assert(indexer.impactOrderedIndex != None)
+
+        #   Construct query vector
+        queryVector = self.constructQueryVectorFromStr( queryStr, indexer )
+
+        isMetricsEnabled = metrics.isEnabled
+        startTime = time.perf_counter()
+        deadline = startTime + timeBudget if timeBudget is not None else None
+
+        #   Get impact segments of query terms
+        queryImpactList = [ ( queryWeight, indexer.impactOrderedIndex[termId] ) for termId, queryWeight in queryVector.items() if termId in indexer.impactOrderedIndex ]
+
+        #   Initialize max heap of the next segment contribution of each term
+        segmentHeap = [ ( -queryWeight*impactSegmentList[0][0], termIndex, 0 ) for termIndex, ( queryWeight, impactSegmentList ) in enumerate( queryImpactList ) if impactSegmentList ]
+        heapq.heapify( segmentHeap )
+
+        #   Accumulate scores in quantized impact unit
+        docIdToScoreDict = dict()
+        numPostingScanned = 0
+        isBudgetExhausted = False
+
+        while segmentHeap and not isBudgetExhausted:
+
+            negativeContribution, termIndex, segmentIndex = heapq.heappop( segmentHeap )
+            contribution = -negativeContribution
+
+            impactSegmentList = queryImpactList[termIndex][1]
+            docIdList = impactSegmentList[segmentIndex][1]
+
+            for chunkStart in range( 0, len(docIdList), ImpactChunkSize ):
+
+                #   Stop once either budget runs out
+                if ( postingBudget is not None and numPostingScanned >= postingBudget ) or ( deadline is not None and time.perf_counter() >= deadline ):
+                    isBudgetExhausted = True
+                    break
+
+                chunkEnd = min( chunkStart + ImpactChunkSize, len(docIdList) )
+                if postingBudget is not None:
+                    chunkEnd = min( chunkEnd, chunkStart + postingBudget - numPostingScanned )
+
+                for docId in docIdList[chunkStart:chunkEnd]:
+                    docIdToScoreDict[docId] = docIdToScoreDict.get( docId, 0.0 ) + contribution
+
+                numPostingScanned += chunkEnd - chunkStart
+
+                #   Budget ran out in the middle of the segment
+                if chunkEnd < len(docIdList) and chunkEnd - chunkStart < ImpactChunkSize:
+                    isBudgetExhausted = True
+                    break
+
+            #   Queue next segment of the same term
+            if not isBudgetExhausted and segmentIndex + 1 < len(impactSegmentList):
+                queryWeight = queryImpactList[termIndex][0]
+                heapq.heappush( segmentHeap, ( -queryWeight*impactSegmentList[segmentIndex+1][0], termIndex, segmentIndex + 1 ) )
+
+        isReranked = indexer.invertedIndex is not None
+
+        if isReranked:
+
+            #   NOTE -  A posting impact is off its weight by less than one
+            #           impact unit, so a score is off by less than the sum
+            #           of query weights. Every true top result scores at
+            #           least the k-th best quantized score less twice that.
+            topResultList = heapq.nlargest( maxResultNum, docIdToScoreDict.items(), key=lambda x: x[1] )
+            scoreThreshold = topResultList[-1][1] - 2*sum( queryWeight for queryWeight, _ in queryImpactList ) if len(topResultList) == maxResultNum else -math.inf
+
+            candidateList = [ ( docId, computeCosineSimilarity( queryVector, indexer.invertedIndex[docId] ) ) for docId, score in docIdToScoreDict.items() if score >= scoreThreshold ]
+            docIdToConsineSimilarityTupleList = heapq.nsmallest( maxResultNum, candidateList, key=getRankKey )
+
+        else:
+
+            #   Select top results and scale scores back to cosine similarity
+            topResultList = heapq.nsmallest( maxResultNum, docIdToScoreDict.items(), key=getRankKey )
+            docIdToConsineSimilarityTupleList = [ ( docId, score*indexer.impactScale ) for docId, score in topResultList ]
+
+        #   Answer is exact only if nothing is left unscored and quantized
+        #   scores are re-ranked
+        isExact = len(segmentHeap) == 0 and not isBudgetExhausted and isReranked
+
+        if isMetricsEnabled:
+            metrics.addTimeSince( 'score', startTime )
+            metrics.incrementCounter( 'queries' )
+            metrics.incrementCounter( 'postings_scanned', numPostingScanned )
+            if isReranked:
+                metrics.incrementCounter( 'docs_reranked', len(candidateList) )
+            if isBudgetExhausted:
+                metrics.incrementCounter( 'budget_exhausted' )
+
+        return docIdToConsineSimilarityTupleList, isExact
@@ -0,0 +1,103 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import bisect
+import weakref
+from collections import OrderedDict
+from typing import Optional, List, Tuple
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   Number of queries whose ranked results are kept
+DefaultCacheSize = 32
+
+#   Number of ranked results kept per query, pages beyond them rank the
+#   next window after the cursor
+DefaultWindowSize = 1024
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getRankKey( docIdToCosineSimilarityTuple : Tuple[int, float] ) -> Tuple[float, int]:
+    ''' This function gets sort key of a result, higher score first and
+        lower docId first among equal scores, so every result has a
+        distinct position a cursor can point at
+    '''
+
+    docId, score = docIdToCosineSimilarityTuple
+
+    return ( -score, docId )
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class RankedResultCache(object):
+    ''' This class keeps a window of ranked results of recent queries, so
+        successive pages are sliced from it instead of scoring the corpus
+        again. A window holds results ranked after the cursor it was
+        ranked from, up to window size of them, and is only valid for the
+        indexer it was ranked on. Least recently used query is evicted.
+    '''
+
+    def __init__( self, cacheSize : Optional[int] = DefaultCacheSize,
+                        windowSize : Optional[int] = DefaultWindowSize ):
+        self.cacheSize = cacheSize
+        self.windowSize = windowSize
+
+        #   Query string to indexer reference, rank key the window starts
+        #   after, rank keys and results of the window, and whether it ends
+        #   with the last result
+        self.windowDict = OrderedDict()
+
+    def __len__( self ) -> int:
+        return len(self.windowDict)
+
+    def getPage( self, queryStr : str, indexer, afterRankKey : Optional[Tuple[float, int]], pageSize : int ) -> Optional[Tuple[List[Tuple[int, float]], bool]]:
+        ''' This function slices results ranked after given rank key from
+            cached window, returns page and whether more results follow, or
+            None if the window does not cover the whole page
+        '''
+
+        if queryStr not in self.windowDict:
+            return None
+
+        indexerRef, startRankKey, rankKeyList, resultList, isLast = self.windowDict[queryStr]
+
+        #   Window of another index generation
+        if indexerRef() is not indexer:
+            del self.windowDict[queryStr]
+            return None
+
+        #   Cursor before the window
+        if startRankKey is not None and ( afterRankKey is None or afterRankKey < startRankKey ):
+            return None
+
+        pageBegin = bisect.bisect_right( rankKeyList, afterRankKey ) if afterRankKey is not None else 0
+        pageEnd = pageBegin + pageSize
+
+        #   Page runs past the window
+        if pageEnd > len(resultList) and not isLast:
+            return None
+
+        self.windowDict.move_to_end( queryStr )
+
+        return resultList[pageBegin:pageEnd], pageEnd < len(resultList) or not isLast
+
+    def putWindow( self, queryStr : str, indexer, afterRankKey : Optional[Tuple[float, int]], resultList : List[Tuple[int, float]], isLast : bool ):
+        ''' This function keeps ranked results following given rank key,
+            replacing the window of the same query
+        '''
+
+        self.windowDict[queryStr] = ( weakref.ref( indexer ), afterRankKey, [ getRankKey( result ) for result in resultList ], resultList, isLast )
+        self.windowDict.move_to_end( queryStr )
+
+        if len(self.windowDict) > self.cacheSize:
+            self.windowDict.popitem( last=False )
+
+    def clear( self ):
+        self.windowDict.clear()
@@ -0,0 +1,180 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import time
+from typing import Optional, List, Set, Tuple
+
+from textprocessor.Normalizer import Normalizer, NormalizerOption
+from textprocessor.DocumentSource import DocumentSource, DocumentErrorTuple
+from metrics.Metrics import metrics
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   Number of passages picked from forward index which are read and checked
+CandidatePassageNum = 3
+
+#   Number of words shown in a snippet
+SnippetWordNum = 32
+
+HighlightFormat = '[{}]'
+SnippetEllipsis = '...'
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def findBestPassageIndexList( passageListList : List[List[int]], maxPassageNum : int ) -> List[int]:
+    ''' This function finds passages matching most query terms given the
+        passages each query term occurs in, earlier passages first on ties
+    '''
+
+    #   Passage index to number of query terms it matches
+    passageToMatchNumDict = dict()
+
+    for passageList in passageListList:
+        for passageIndex in set( passageList ):
+            passageToMatchNumDict[passageIndex] = passageToMatchNumDict.get( passageIndex, 0 ) + 1
+
+    #   Fall back to beginning of document
+    if len(passageToMatchNumDict) == 0:
+        return [ 0 ]
+
+    return sorted( passageToMatchNumDict.keys(), key=lambda passageIndex: ( -passageToMatchNumDict[passageIndex], passageIndex ) )[:maxPassageNum]
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class SnippetGenerator(object):
+    ''' This class shows why a document matched as a short snippet of its
+        best matching passage with query terms highlighted. Candidate
+        passages are picked from the first passages forward index keeps for
+        each query term, then only those few hundred bytes are read from the
+        text file, so cost per result does not grow with book size.
+    '''
+
+    def __init__( self, textFileDir : str,
+                        normalizerOption : Optional[int] = NormalizerOption.NONE,
+                        candidatePassageNum : Optional[int] = CandidatePassageNum,
+                        snippetWordNum : Optional[int] = SnippetWordNum ):
+        self.textFileDir = textFileDir
+        self.documentSource = DocumentSource( textFileDir )
+        self.normalizerOption = normalizerOption
+        self.candidatePassageNum = candidatePassageNum
+        self.snippetWordNum = snippetWordNum
+
+    def close( self ):
+        ''' This function closes archives opened for reading passages
+        '''
+
+        self.documentSource.close()
+
+    def normalizeWord( self, word : str ) -> Optional[str]:
+        ''' This function normalizes a passage word like index terms, or
+            returns None if nothing is left
+        '''
+
+        try:
+            return Normalizer.normalize( word, isRemovePunctuation=self.normalizerOption & NormalizerOption.REMOVE_PUNCTUATION,
+                                                isCaseFolding=self.normalizerOption & NormalizerOption.CASE_FOLDING )
+        except ValueError:
+            return None
+
+    def matchPassage( self, wordList : List[str], queryTermSetList : List[Set[str]] ) -> Tuple[int, List[int]]:
+        ''' This function gets number of query terms a passage matches and
+            indices of its matching words
+        '''
+
+        matchedQueryTermSet = set()
+        hitIndexList = list()
+
+        for wordIndex, word in enumerate( wordList ):
+            term = self.normalizeWord( word )
+            for queryTermIndex, queryTermSet in enumerate( queryTermSetList ):
+                if term in queryTermSet:
+                    matchedQueryTermSet.add( queryTermIndex )
+                    hitIndexList.append( wordIndex )
+                    break
+
+        return len(matchedQueryTermSet), hitIndexList
+
+    def formatSnippet( self, wordList : List[str], hitIndexList : List[int], isHeadCut : bool, isTailCut : bool ) -> str:
+        ''' This function formats words around the first hit of a passage
+            with hits highlighted
+        '''
+
+        #   Begin a little before first hit
+        beginIndex = 0
+        if len(hitIndexList) > 0:
+            beginIndex = max( 0, min( hitIndexList[0] - self.snippetWordNum//4, len(wordList) - self.snippetWordNum ) )
+        endIndex = min( beginIndex + self.snippetWordNum, len(wordList) )
+
+        hitIndexSet = set( hitIndexList )
+        snippetWordList = [ HighlightFormat.format( wordList[i] ) if i in hitIndexSet else wordList[i] for i in range( beginIndex, endIndex ) ]
+
+        if isHeadCut or beginIndex > 0:
+            snippetWordList.insert( 0, SnippetEllipsis )
+        if isTailCut or endIndex < len(wordList):
+            snippetWordList.append( SnippetEllipsis )
+
+        return ' '.join( snippetWordList )
+
+    def generateSnippet( self, indexer, docId : int, queryTermSetList : List[Set[str]] ) -> Optional[str]:
+        ''' This function generates snippet of given docId for index terms
+            matched by each query term, see QueryManager.getQueryTermSetList().
+            Returns None if the text file is gone or has changed since the
+            forward index was built. Passages of a compressed text file are
+            read by decompressing up to them.
+        '''
+
+        if indexer.forwardIndex is None:
+            raise ValueError( 'generateSnippet() - Forward index is not loaded.' )
+
+        isMetricsEnabled = metrics.isEnabled
+        if isMetricsEnabled:
+            startTime = time.perf_counter()
+
+        forwardIndex = indexer.forwardIndex
+
+        #   Pick candidate passages from passages of each query term
+        passageListList = [ [ passageIndex for term in queryTermSet for passageIndex in forwardIndex.getTermPassageList( docId, term ) ] for queryTermSet in queryTermSetList ]
+
+        passageIndexList = findBestPassageIndexList( passageListList, self.candidatePassageNum )
+
+        docName = indexer.getDocNameById( docId )
+        docByteSize = forwardIndex.getDocByteSize( docId )
+
+        #   Read and check candidate passages only
+        bestMatch = None
+        try:
+            currentDocByteSize = self.documentSource.getDocByteSize( docName )
+            if currentDocByteSize is not None and currentDocByteSize != docByteSize:
+                return None
+
+            with self.documentSource.open( docName ) as textFile:
+                for passageIndex in passageIndexList:
+                    passageBegin, passageEnd = forwardIndex.getPassageRange( docId, passageIndex )
+                    textFile.seek( passageBegin )
+                    wordList = textFile.read( passageEnd - passageBegin ).decode( 'utf-8', errors='replace' ).split()
+                    numMatchedQueryTerm, hitIndexList = self.matchPassage( wordList, queryTermSetList )
+
+                    if bestMatch is None or ( numMatchedQueryTerm, len(hitIndexList) ) > bestMatch[0]:
+                        bestMatch = ( ( numMatchedQueryTerm, len(hitIndexList) ), wordList, hitIndexList, passageBegin > 0, passageEnd < docByteSize )
+
+        except DocumentErrorTuple:
+            return None
+
+        if bestMatch is None:
+            return None
+
+        _, wordList, hitIndexList, isHeadCut, isTailCut = bestMatch
+        snippet = self.formatSnippet( wordList, hitIndexList, isHeadCut, isTailCut )
+
+        if isMetricsEnabled:
+            metrics.addTimeSince( 'snippet', startTime )
+            metrics.incrementCounter( 'snippets_generated' )
+
+        return snippet
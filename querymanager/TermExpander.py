@@ -0,0 +1,193 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import re
+import bisect
+from typing import Optional, List
+
+from indexer.TermDictionary import TermDictionary
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+MultiCharWildcard = '*'
+SingleCharWildcard = '?'
+WildcardCharSet = { MultiCharWildcard, SingleCharWildcard }
+
+DefaultMaxExpansionNum = 50
+DefaultMaxEditDistance = 2
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getLiteralPrefix( pattern : str ) -> str:
+    ''' This function gets part of wildcard pattern before first wildcard
+    '''
+
+    for i, char in enumerate( pattern ):
+        if char in WildcardCharSet:
+            return pattern[:i]
+
+    return pattern
+
+def compileWildcardPattern( pattern : str ):
+    ''' This function compiles wildcard pattern into anchored regular
+        expression
+    '''
+
+    regexStr = ''.join( '.*' if char == MultiCharWildcard else '.' if char == SingleCharWildcard else re.escape( char ) for char in pattern )
+
+    return re.compile( regexStr + r'\Z', re.DOTALL )
+
+def getPrefixSuccessor( prefix : str ) -> str:
+    ''' This function gets the smallest string greater than all strings
+        starting with given prefix
+    '''
+
+    return prefix[:-1] + chr( ord( prefix[-1] ) + 1 )
+
+def computeNextEditDistanceRow( previousRow : List[int], term : str, char : str ) -> List[int]:
+    ''' This function computes next row of Levenshtein distance table
+        between given term and a candidate extended by one character
+    '''
+
+    row = [ previousRow[0] + 1 ]
+
+    for i, termChar in enumerate( term ):
+        row.append( min( row[i] + 1, previousRow[i+1] + 1, previousRow[i] + ( termChar != char ) ) )
+
+    return row
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class TermExpander(object):
+    ''' This class expands prefix, wildcard and fuzzy query terms into
+        termIds of matching terms in sorted term dictionary
+    '''
+
+    def __init__( self, termDictionary : TermDictionary, maxExpansionNum : Optional[int] = DefaultMaxExpansionNum ):
+        self.termDictionary = termDictionary
+        self.maxExpansionNum = maxExpansionNum
+
+    def expandPrefix( self, prefix : str ) -> List[int]:
+        ''' This function gets termIds of terms starting with given prefix
+        '''
+
+        termIdList = list()
+
+        for termId, term in self.termDictionary.iterTerms( self.termDictionary.getLowerBoundTermId( prefix ) ):
+            if not term.startswith( prefix ) or len(termIdList) == self.maxExpansionNum:
+                break
+            termIdList.append( termId )
+
+        return termIdList
+
+    def expandWildcard( self, pattern : str ) -> List[int]:
+        ''' This function gets termIds of terms matching wildcard pattern,
+            only terms sharing pattern literal prefix are scanned
+        '''
+
+        literalPrefix = getLiteralPrefix( pattern )
+
+        #   Plain prefix pattern does not need regular expression
+        if pattern == literalPrefix + MultiCharWildcard:
+            return self.expandPrefix( literalPrefix )
+
+        regex = compileWildcardPattern( pattern )
+
+        termIdList = list()
+
+        for termId, term in self.termDictionary.iterTerms( self.termDictionary.getLowerBoundTermId( literalPrefix ) ):
+            if not term.startswith( literalPrefix ) or len(termIdList) == self.maxExpansionNum:
+                break
+            if regex.match( term ):
+                termIdList.append( termId )
+
+        return termIdList
+
+    def expandFuzzy( self, term : str, maxEditDistance : Optional[int] = DefaultMaxEditDistance, prefixLength : Optional[int] = 0 ) -> List[int]:
+        ''' This function gets termIds of terms within given Levenshtein
+            distance, closest first. Terms are walked in sorted order so
+            distance rows of shared prefixes are reused, and every term
+            under a prefix which cannot match any more is skipped.
+        '''
+
+        requiredPrefix = term[:prefixLength]
+
+        #   Distance rows for each character of current candidate prefix
+        rowList = [ list( range( len(term) + 1 ) ) ]
+        previousCandidate = ''
+
+        distanceToTermIdTupleList = list()
+
+        blockSize = self.termDictionary.blockSize
+        numBlock = len( self.termDictionary.blockHeadList )
+
+        blockId, i = divmod( self.termDictionary.getLowerBoundTermId( requiredPrefix ), blockSize )
+
+        while blockId < numBlock:
+
+            termList = self.termDictionary.decodeBlock( blockId )
+            nextTermId = None
+
+            while i < len(termList):
+
+                candidate = termList[i]
+
+                if not candidate.startswith( requiredPrefix ):
+                    return self.selectClosestTermId( distanceToTermIdTupleList )
+
+                #   Reuse rows of prefix shared with previous candidate
+                sharedLength = 0
+                maxSharedLength = min( len(candidate), len(previousCandidate) )
+                while sharedLength < maxSharedLength and candidate[sharedLength] == previousCandidate[sharedLength]:
+                    sharedLength += 1
+                del rowList[ sharedLength+1: ]
+
+                isDeadPrefix = False
+
+                for charIndex in range( sharedLength, len(candidate) ):
+                    rowList.append( computeNextEditDistanceRow( rowList[-1], term, candidate[charIndex] ) )
+
+                    #   No extension of this prefix can be close enough
+                    if min( rowList[-1] ) > maxEditDistance:
+                        isDeadPrefix = True
+                        break
+
+                previousCandidate = candidate[ :len(rowList)-1 ]
+
+                if not isDeadPrefix:
+                    if rowList[-1][-1] <= maxEditDistance:
+                        distanceToTermIdTupleList.append( ( rowList[-1][-1], blockId*blockSize + i ) )
+                    i += 1
+                    continue
+
+                #   Skip every term under dead prefix, within current block if possible
+                prefixSuccessor = getPrefixSuccessor( previousCandidate )
+                if prefixSuccessor <= termList[-1]:
+                    i = bisect.bisect_left( termList, prefixSuccessor, i+1 )
+                else:
+                    nextTermId = self.termDictionary.getLowerBoundTermId( prefixSuccessor )
+                    break
+
+            #   Move on to next block or block holding skip target
+            if nextTermId is None:
+                blockId, i = blockId + 1, 0
+            else:
+                blockId, i = divmod( nextTermId, blockSize )
+
+        return self.selectClosestTermId( distanceToTermIdTupleList )
+
+    def selectClosestTermId( self, distanceToTermIdTupleList : List ) -> List[int]:
+        ''' This function gets termIds of closest matches up to maximum
+            number of expansion
+        '''
+
+        distanceToTermIdTupleList.sort()
+
+        return [ termId for _, termId in distanceToTermIdTupleList[ :self.maxExpansionNum ] ]
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import sys
+import json
+from optparse import OptionParser
+
+from textprocessor.TextProcessor import NumProcess
+from indexer.Indexer import TopTierSize
+from benchmarks.CorpusGenerator import CorpusGenerator, DocSizeDistribution
+from benchmarks.Benchmark import Benchmark
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+NumRequiredArgs = 0
+
+WorkDir = 'benchmark_work'
+NumDoc = 1000
+VocabularySize = 50000
+MeanDocSize = 2000
+ZipfExponent = 1.0
+Seed = 0
+NumQuery = 200
+NumQueryRepeat = 3
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+##########################################################################
+#   MAIN
+##########################################################################
+
+def main():
+
+    parser = OptionParser(usage='usage: %prog [options]',
+                            version='%prog 0.0')
+    parser.add_option( '--workDir',
+                        action='store',
+                        dest='workDir',
+                        default=WorkDir,
+                        help='directory holding generated corpus and indices (default = {!r})'.format(WorkDir) )
+    parser.add_option( '--output',
+                        action='store',
+                        dest='outputFilePath',
+                        default=None,
+                        help='json result file path (default = print to stdout)' )
+    parser.add_option( '--numDoc',
+                        action='store',
+                        type='int',
+                        dest='numDoc',
+                        default=NumDoc,
+                        help='number of generated documents (default = {!r})'.format(NumDoc) )
+    parser.add_option( '--vocabularySize',
+                        action='store',
+                        type='int',
+                        dest='vocabularySize',
+                        default=VocabularySize,
+                        help='number of distinct generated words (default = {!r})'.format(VocabularySize) )
+    parser.add_option( '--meanDocSize',
+                        action='store',
+                        type='int',
+                        dest='meanDocSize',
+                        default=MeanDocSize,
+                        help='mean number of words per document (default = {!r})'.format(MeanDocSize) )
+    parser.add_option( '--docSizeDistribution',
+                        action='store',
+                        type='choice',
+                        choices=[ DocSizeDistribution.UNIFORM, DocSizeDistribution.LOGNORMAL ],
+                        dest='docSizeDistribution',
+                        default=DocSizeDistribution.LOGNORMAL,
+                        help='document size distribution (default = {!r})'.format(DocSizeDistribution.LOGNORMAL) )
+    parser.add_option( '--zipfExponent',
+                        action='store',
+                        type='float',
+                        dest='zipfExponent',
+                        default=ZipfExponent,
+                        help='zipfian vocabulary exponent (default = {!r})'.format(ZipfExponent) )
+    parser.add_option( '--seed',
+                        action='store',
+                        type='int',
+                        dest='seed',
+                        default=Seed,
+                        help='corpus random seed (default = {!r})'.format(Seed) )
+    parser.add_option( '--numQuery',
+                        action='store',
+                        type='int',
+                        dest='numQuery',
+                        default=NumQuery,
+                        help='number of queries in query log (default = {!r})'.format(NumQuery) )
+    parser.add_option( '--numQueryRepeat',
+                        action='store',
+                        type='int',
+                        dest='numQueryRepeat',
+                        default=NumQueryRepeat,
+                        help='number of times query log is replayed (default = {!r})'.format(NumQueryRepeat) )
+    parser.add_option( '--numProcess',
+                        action='store',
+                        type='int',
+                        dest='numProcess',
+                        default=NumProcess,
+                        help='number of indexing processes (default = {!r})'.format(NumProcess) )
+    parser.add_option( '--topTierSize',
+                        action='store',
+                        type='int',
+                        dest='topTierSize',
+                        default=TopTierSize,
+                        help='number of postings per term in tiered index top tier (default = {!r})'.format(TopTierSize) )
+    parser.add_option( '--pruneThreshold',
+                        action='store',
+                        type='float',
+                        dest='pruneThreshold',
+                        default=0.0,
+                        help='tiered index prune weight threshold (default = 0.0)' )
+    parser.add_option( '--postingBudget',
+                        action='store',
+                        type='int',
+                        dest='postingBudget',
+                        default=None,
+                        help='impact ordered query posting budget (default = unlimited)' )
+    parser.add_option( '--bytesAnalyzer',
+                        action='store_true',
+                        dest='isBytesAnalyzer',
+                        default=False,
+                        help='index with bytes analyzer' )
+
+    (options, args) = parser.parse_args()
+
+    if len(args) != NumRequiredArgs:
+        parser.error('Incorrect number of arguments')
+        sys.exit(-1)
+
+    #   Create work directory
+    os.makedirs( options.workDir, exist_ok=True )
+
+    #   Construct deterministic corpus generator
+    corpusGenerator = CorpusGenerator( options.numDoc,
+                                        vocabularySize=options.vocabularySize,
+                                        meanDocSize=options.meanDocSize,
+                                        docSizeDistribution=options.docSizeDistribution,
+                                        zipfExponent=options.zipfExponent,
+                                        seed=options.seed )
+
+    #   Run benchmark
+    benchmark = Benchmark( options.workDir, corpusGenerator,
+                            numQuery=options.numQuery,
+                            numQueryRepeat=options.numQueryRepeat,
+                            numProcess=options.numProcess,
+                            topTierSize=options.topTierSize,
+                            pruneWeightThreshold=options.pruneThreshold,
+                            postingBudget=options.postingBudget,
+                            isBytesAnalyzer=options.isBytesAnalyzer )
+    result = benchmark.run()
+
+    #   Emit result
+    if options.outputFilePath is None:
+        print( json.dumps( result, indent=4, sort_keys=True ) )
+    else:
+        benchmark.writeResult( options.outputFilePath )
+
+##########################################################################
+#   RUN
+##########################################################################
+
+if __name__ == '__main__':
+    main()
@@ -6,29 +6,39 @@
 
 import sys
 from optparse import OptionParser
-from indexer.Indexer import Indexer
+from indexer.Indexer import Indexer, isPickleFileName
+from indexer.IndexManifest import IndexFileKind, readCurrentGeneration
+from metrics.Metrics import metrics
 from querymanager.QueryManager import QueryManager
-from textprocessor.Tokenizer import TokenizerOption
-from textprocessor.Normalizer import NormalizerOption
-from textprocessor.TextProcessor import TextProcessor
+from querymanager.SnippetGenerator import SnippetGenerator
 
 ##########################################################################
 #   GLOBAL
 ##########################################################################
 
-#TextFileDir = '../dataset/Gutenberg/txt'
-TextFileDir = '../dataset/Gutenberg/sample'
-
 NumRequiredArgs = 1
 IndexDir = 'index'
-IndexFileName = 'index.pickle'
-DocIdIndexFileName = 'docId_index.pickle'
-InvertedIndexFileName = 'inverted_index.pickle'
+DefaultMaxResultNum = 10
 
 ##########################################################################
 #   HELPER
 ##########################################################################
 
+def printResultList( indexer, resultList, snippetGenerator = None, queryTermSetList = None ):
+    ''' This function prints names and scores of shown results, and their
+        best matching passages if snippet generator is given
+    '''
+
+    #   Resolve names of shown results only
+    resultDict = { indexer.getDocNameById(x[0]) : x[1] for x in resultList }
+
+    print(resultDict)
+
+    if snippetGenerator is not None:
+        for docId, _ in resultList:
+            snippet = snippetGenerator.generateSnippet( indexer, docId, queryTermSetList )
+            print('{}: {}'.format( indexer.getDocNameById( docId ), snippet if snippet is not None else '(text file has changed)' ))
+
 ##########################################################################
 #   CLASS
 ##########################################################################
@@ -41,32 +51,219 @@ def main():
 
     parser = OptionParser(usage='usage: %prog [options] <QUERY_STRING>',
                             version='%prog 0.0')
+    parser.add_option( '--tiered',
+                        action='store_true',
+                        dest='isTiered',
+                        default=False,
+                        help='answer top results from tiered index' )
+    parser.add_option( '--maxResult',
+                        action='store',
+                        type='int',
+                        dest='maxResultNum',
+                        default=DefaultMaxResultNum,
+                        help='number of top results shown (default = {!r})'.format(DefaultMaxResultNum) )
+    parser.add_option( '--impactOrdered',
+                        action='store_true',
+                        dest='isImpactOrdered',
+                        default=False,
+                        help='answer top results score-at-a-time from impact ordered index' )
+    parser.add_option( '--postingBudget',
+                        action='store',
+                        type='int',
+                        dest='postingBudget',
+                        default=None,
+                        help='maximum number of postings scored with impact ordered index (default = unlimited)' )
+    parser.add_option( '--timeBudget',
+                        action='store',
+                        type='float',
+                        dest='timeBudget',
+                        default=None,
+                        help='maximum milliseconds of scoring with impact ordered index (default = unlimited)' )
+    parser.add_option( '--pageSize',
+                        action='store',
+                        type='int',
+                        dest='pageSize',
+                        default=None,
+                        help='page through matching documents this many at a time instead of showing top results' )
+    parser.add_option( '--cursor',
+                        action='store',
+                        dest='cursor',
+                        default=None,
+                        help='start paging after the page given cursor was printed for' )
+    parser.add_option( '--similarTo',
+                        action='store',
+                        dest='similarTo',
+                        default=None,
+                        help='find documents similar to given docId or document name instead of querying' )
+    parser.add_option( '--snippet',
+                        action='store_true',
+                        dest='isSnippet',
+                        default=False,
+                        help='show best matching passage of each result' )
+    parser.add_option( '--textDir',
+                        action='store',
+                        dest='textDir',
+                        default=None,
+                        help='text file directory snippets are read from (default = the one index was built from)' )
+    parser.add_option( '--metrics',
+                        action='store',
+                        dest='metricsFilePath',
+                        default=None,
+                        help='collect stage metrics into given file, prometheus text if it ends with .prom or json otherwise' )
+    parser.add_option( '--profile',
+                        action='store',
+                        dest='profileFilePath',
+                        default=None,
+                        help='capture cProfile statistics into given file' )
+    parser.add_option( '--traceMemory',
+                        action='store_true',
+                        dest='isTraceMemory',
+                        default=False,
+                        help='measure memory high-water marks with tracemalloc' )
 
     (options, args) = parser.parse_args()
 
-    if len(args) != NumRequiredArgs:
+    #   Similar document search takes no query string
+    if len(args) != ( NumRequiredArgs if options.similarTo is None else 0 ):
         parser.error('Incorrect number of arguments')
         sys.exit(-1)
 
-    queryStr = args[0]
+    if options.similarTo is not None and ( options.isTiered or options.isImpactOrdered or options.isSnippet ):
+        parser.error('Option --similarTo cannot be used with --tiered, --impactOrdered or --snippet')
+        sys.exit(-1)
+
+    if options.pageSize is not None and ( options.isTiered or options.isImpactOrdered or options.similarTo is not None ):
+        parser.error('Option --pageSize cannot be used with --tiered, --impactOrdered or --similarTo')
+        sys.exit(-1)
+
+    if options.cursor is not None and options.pageSize is None:
+        parser.error('Option --cursor requires --pageSize')
+        sys.exit(-1)
+
+    queryStr = args[0] if options.similarTo is None else None
 
-    textProcess = TextProcessor( TextFileDir )
-    textProcess.readTextFileFromTextFileDir()
+    #   Enable metrics and profiling capture
+    if options.metricsFilePath is not None or options.profileFilePath is not None:
+        metrics.enable( isProfile=options.profileFilePath is not None, isTraceMemory=options.isTraceMemory )
+
+    #   Everything needed to answer a query is described by manifest of
+    #   the published index generation
+    try:
+        generationDir, indexManifest = readCurrentGeneration( IndexDir )
+    except ValueError as error:
+        print('search_index_dir - {}'.format(error))
+        sys.exit(-1)
 
     indexer = Indexer()
 
-    indexer.readFromDocIdIndexDir( IndexDir, DocIdIndexFileName )
-    indexer.readFromInvertedIndexDir( IndexDir, InvertedIndexFileName )
+    indexer.readFromDocIdStoreDir( generationDir, indexManifest.getFileName( IndexFileKind.DOC_ID_STORE ) )
+    indexer.readFromTermDictionaryDir( generationDir, indexManifest.getFileName( IndexFileKind.TERM_DICTIONARY ) )
+
+    #   Indexes built before vocabulary filters probe term dictionary only
+    if indexManifest.getFileName( IndexFileKind.VOCABULARY_FILTER ) is not None:
+        indexer.readFromVocabularyFilterDir( generationDir, indexManifest.getFileName( IndexFileKind.VOCABULARY_FILTER ) )
+
+    #   Tiered or impact ordered index replaces inverted index for top results
+    if options.isTiered:
+        fileKind = IndexFileKind.TIERED_INDEX
+    elif options.isImpactOrdered:
+        fileKind = IndexFileKind.IMPACT_ORDERED_INDEX
+    else:
+        fileKind = IndexFileKind.INVERTED_INDEX
 
+    if indexManifest.getFileName( fileKind ) is None:
+        print('search_index_dir - Index has not been built with {}.'.format(fileKind))
+        sys.exit(-1)
+
+    if options.similarTo is not None:
+        if indexManifest.getFileName( IndexFileKind.SIMILARITY_INDEX ) is None:
+            print('search_index_dir - Index has not been built with {}.'.format(IndexFileKind.SIMILARITY_INDEX))
+            sys.exit(-1)
+        indexer.readFromSimilarityIndexDir( generationDir, indexManifest.getFileName( IndexFileKind.SIMILARITY_INDEX ) )
+
+    if options.isSnippet:
+        if indexManifest.getFileName( IndexFileKind.FORWARD_INDEX ) is None:
+            print('search_index_dir - Index has not been built with {}.'.format(IndexFileKind.FORWARD_INDEX))
+            sys.exit(-1)
+        indexer.readFromForwardIndexDir( generationDir, indexManifest.getFileName( IndexFileKind.FORWARD_INDEX ) )
+
+    if options.isTiered:
+        indexer.readFromTieredIndexDir( generationDir, indexManifest.getFileName( fileKind ) )
+    elif options.isImpactOrdered:
+        indexer.readFromImpactOrderedIndexDir( generationDir, indexManifest.getFileName( fileKind ) )
+
+        #   Exact weights re-rank candidates of quantized scores
+        invertedIndexFileName = indexManifest.getFileName( IndexFileKind.INVERTED_INDEX )
+        indexer.readFromInvertedIndexDir( generationDir, invertedIndexFileName, isUsePickle=isPickleFileName( invertedIndexFileName ) )
+    else:
+        indexer.readFromInvertedIndexDir( generationDir, indexManifest.getFileName( fileKind ), isUsePickle=isPickleFileName( indexManifest.getFileName( fileKind ) ) )
+
+    #   Query with the same text processing options the index was built with
     queryManager = QueryManager( indexer,
-                                TokenizerOption.REMOVE_STOP_WORDS,
-                                NormalizerOption.REMOVE_PUNCTUATION | NormalizerOption.CASE_FOLDING )
+                                indexManifest.tokenizerOption,
+                                indexManifest.normalizerOption )
 
-    resultDict = queryManager.query( queryStr )
+    #   Snippets are read from text files the index was built from
+    snippetGenerator = None
+    queryTermSetList = None
+    if options.isSnippet:
+        textDir = options.textDir if options.textDir is not None else indexManifest.statDict.get( 'textFileDir' )
+        snippetGenerator = SnippetGenerator( textDir, indexManifest.normalizerOption )
+        queryTermSetList = queryManager.getQueryTermSetList( queryStr )
 
-    resultDict = { indexer.getDocNameById(x[0]) : x[1] for x in resultDict }
+    if options.pageSize is not None:
 
-    print(resultDict)
+        #   Fetch pages one at a time, as long as they are asked for
+        cursor = options.cursor
+        try:
+            while True:
+                resultList, cursor = queryManager.queryPage( queryStr, options.pageSize, cursor )
+
+                printResultList( indexer, resultList, snippetGenerator, queryTermSetList )
+
+                if cursor is None:
+                    break
+
+                #   Keep paging interactively, otherwise leave cursor for the
+                #   next run
+                if not sys.stdin.isatty():
+                    print('search_index_dir - Next page cursor {}.'.format(cursor))
+                    break
+                if input( 'search_index_dir - Press enter for next page, or q to quit: ' ).strip().lower() == 'q':
+                    print('search_index_dir - Next page cursor {}.'.format(cursor))
+                    break
+        except ValueError as error:
+            print('search_index_dir - {}'.format(error))
+            sys.exit(-1)
+
+    elif options.similarTo is not None:
+
+        #   Accept either a docId or a document name
+        docId = int(options.similarTo) if options.similarTo.isdigit() else indexer.docIdStore.findDocId( options.similarTo )
+        if docId is None or docId >= len(indexer.docIdStore):
+            print('search_index_dir - Cannot find document {!r}.'.format(options.similarTo))
+            sys.exit(-1)
+
+        print('search_index_dir - Documents similar to {}.'.format(indexer.getDocNameById(docId)))
+        resultDict = queryManager.querySimilar( docId, options.maxResultNum )
+    elif options.isTiered:
+        resultDict = queryManager.queryTiered( queryStr, options.maxResultNum )
+    elif options.isImpactOrdered:
+        resultDict, isExact = queryManager.queryImpactOrdered( queryStr, options.maxResultNum,
+                                                                postingBudget=options.postingBudget,
+                                                                timeBudget=options.timeBudget/1000 if options.timeBudget is not None else None )
+        print('search_index_dir - {} answer.'.format( 'Exact' if isExact else 'Approximate' ))
+    else:
+        resultDict = queryManager.query( queryStr )
+
+    if options.pageSize is None:
+        printResultList( indexer, resultDict[:options.maxResultNum], snippetGenerator, queryTermSetList )
+
+    #   Dump metrics and profiling capture
+    if options.profileFilePath is not None:
+        metrics.writeProfile( options.profileFilePath )
+    if options.metricsFilePath is not None:
+        metrics.writeMetrics( options.metricsFilePath )
 
 ##########################################################################
 #   RUN
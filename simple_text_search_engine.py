@@ -9,7 +9,8 @@ import os
 from optparse import OptionParser
 from PyQt5 import QtWidgets
 
-from textprocessor.TextProcessor import TextProcessor
+from textprocessor.TextProcessor import NumProcess
+from indexer.IndexManifest import IndexFileKind, readCurrentGeneration
 from gui.SimpleTextSearchEngineWindow import SimpleTextSearchEngineWindow
 
 ##########################################################################
@@ -18,8 +19,8 @@ from gui.SimpleTextSearchEngineWindow import SimpleTextSearchEngineWindow
 
 NumRequiredArgs = 0
 IndexDir = 'index'
-DocIdIndexFileName = 'docId_index.pickle'
-InvertedIndexFileName = 'inverted_index.pickle'
+#   Index files the gui cannot work without
+RequiredIndexFileKindList = [ IndexFileKind.DOC_ID_STORE, IndexFileKind.INVERTED_INDEX, IndexFileKind.TERM_DICTIONARY ]
 
 ##########################################################################
 #   HELPER
@@ -42,6 +43,12 @@ def main():
                         action='store_true',
                         default=False,
                         help='enable debug mode' )
+    parser.add_option( '--numProcess',
+                        dest='numProcess',
+                        action='store',
+                        type='int',
+                        default=NumProcess,
+                        help='number of processes decoding text index (default = {!r})'.format(NumProcess) )
     (options, args) = parser.parse_args()
 
     if len(args) != NumRequiredArgs:
@@ -50,20 +57,20 @@ def main():
 
     #   Parse options
     isDebug = options.isDebug
+    numProcess = options.numProcess
 
-    docIdIndexFilePath = os.path.join( IndexDir, DocIdIndexFileName )
-
-    #   Check if docId index directory exists
-    if not os.path.exists( docIdIndexFilePath ):
-        print('simple_text_search_engine - Cannot find docId index at {}.'.format(docIdIndexFilePath))
+    #   Read manifest of published index generation, it verifies segment files
+    try:
+        generationDir, indexManifest = readCurrentGeneration( IndexDir )
+    except ValueError as error:
+        print('simple_text_search_engine - {}'.format(error))
         sys.exit(-1)
 
-    invertedIndexFilePath = os.path.join( IndexDir, InvertedIndexFileName )
-
-    #   Check if inverted index directory exists
-    if not os.path.exists( invertedIndexFilePath ):
-        print('simple_text_search_engine - Cannot find inverted index at {}.'.format(invertedIndexFilePath))
-        sys.exit(-1)
+    #   Check if required index files have been built
+    for fileKind in RequiredIndexFileKindList:
+        if indexManifest.getFileName( fileKind ) is None:
+            print('simple_text_search_engine - Index in {} has not been built with {}.'.format(generationDir, fileKind))
+            sys.exit(-1)
 
     #   Construct pyqt application
     app = QtWidgets.QApplication([])
@@ -72,7 +79,7 @@ def main():
     simpleTextSearchEngineWindow = SimpleTextSearchEngineWindow( isDebug )
 
     #   Load indices
-    simpleTextSearchEngineWindow.loadIndexDir( IndexDir, DocIdIndexFileName, InvertedIndexFileName )
+    simpleTextSearchEngineWindow.loadIndexDir( IndexDir, numProcess=numProcess )
 
     #   Show window
     simpleTextSearchEngineWindow.show()
@@ -1,6 +1,6 @@
 import os
-import ast
 import re
+from indexer.PostingFile import iterPostingDict, writePostingDict
 
 intermediateIndexDir = 'intermediate_index'
 intermediateIndexFileNameFormat = 'intermediate_index_{id}.txt'
@@ -31,17 +31,14 @@ for intermediateIndexFileName in intermediateIndexFileNameList:
     
     #   Read intermediate file
     with open(os.path.join(intermediateIndexDir, intermediateIndexFileName), 'r', encoding='utf-8') as intermediateIndexFile:
-        serializedIntermediateIndexStr = intermediateIndexFile.read()
+        intermediateIndex = dict(iterPostingDict( intermediateIndexFile ))
 
     #   Get intermediate index id from name
     matched = re.match( intermediateIndexFileNameFormat.format( **{'id':'([0-9]+)'} ), intermediateIndexFileName )
     intermediateIndexId = int(matched.group(1))
 
-    #   Parse read serialized string as dictionary
-    intermediateIndex = ast.literal_eval( serializedIntermediateIndexStr )
-
     intermediateIndex = shiftIntermediateIndex( intermediateIndex, intermediateIndexId )
 
     #   Write shifted intermediate file
     with open(os.path.join(intermediateIndexDir, shiftedIntermediateIndexFileNameFormat.format( **{'id':intermediateIndexId})), 'w', encoding='utf-8') as intermediateIndexFile:
-        intermediateIndexFile.write(repr(intermediateIndex))
\ No newline at end of file
+        writePostingDict( intermediateIndexFile, intermediateIndex )
\ No newline at end of file
@@ -0,0 +1,116 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import re
+from typing import Optional, List, Union
+
+from .Tokenizer import Tokenizer, TokenizerOption, StopWordSet
+from .Normalizer import Normalizer, NormalizerOption, PunctuationCharPattern
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   Ascii characters Normalizer.removePunctuation() removes
+PunctuationByteString = bytes( char for char in range( 128 ) if re.match( '[{}]'.format( PunctuationCharPattern ), chr(char) ) )
+
+StopWordByteSet = { stopWord.encode( 'ascii' ) for stopWord in StopWordSet }
+
+#   NOTE -  str.split() also splits at ascii information separators
+#           0x1c-0x1f, bytes.split() does not, so they are turned into space
+SeparatorTranslationTable = bytes.maketrans( b'\x1c\x1d\x1e\x1f', b'    ' )
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class DecodeErrorPolicy(object):
+    STRICT = 'strict'
+    REPLACE = 'replace'
+    IGNORE = 'ignore'
+    SKIP = 'skip'
+
+DecodeErrorPolicyList = [ DecodeErrorPolicy.STRICT, DecodeErrorPolicy.REPLACE, DecodeErrorPolicy.IGNORE, DecodeErrorPolicy.SKIP ]
+
+class BytesAnalyzer(object):
+    ''' This class tokenizes and normalizes utf-8 text without decoding it,
+        yielding the same terms as Tokenizer and Normalizer do on decoded
+        text. Ascii tokens are filtered, stripped of punctuation and case
+        folded with bytes operations over the whole buffer, only tokens
+        holding non-ascii bytes are decoded and analyzed as unicode. Such
+        tokens are decoded by decode error policy: strict raises, replace
+        and ignore behave like their codec counterparts, skip drops the
+        token. Terms are returned as a bag, ascii ones first.
+    '''
+
+    def __init__( self, tokenizerOption : Optional[int] = TokenizerOption.NONE,
+                        normalizerOption : Optional[int] = NormalizerOption.NONE,
+                        decodeErrorPolicy : Optional[str] = DecodeErrorPolicy.REPLACE ):
+
+        if decodeErrorPolicy not in DecodeErrorPolicyList:
+            raise ValueError( 'BytesAnalyzer - Unknown decode error policy {!r}.'.format( decodeErrorPolicy ) )
+
+        self.isRemoveStopWord = bool( tokenizerOption & TokenizerOption.REMOVE_STOP_WORDS )
+        self.isRemovePunctuation = bool( normalizerOption & NormalizerOption.REMOVE_PUNCTUATION )
+        self.isCaseFolding = bool( normalizerOption & NormalizerOption.CASE_FOLDING )
+        self.decodeErrorPolicy = decodeErrorPolicy
+
+    def analyzeUnicodeToken( self, token : bytes ) -> List[str]:
+        ''' This function decodes a non-ascii token and analyzes it like
+            decoded text, it may split at unicode white space
+        '''
+
+        if self.decodeErrorPolicy == DecodeErrorPolicy.SKIP:
+            try:
+                text = token.decode( 'utf-8' )
+            except UnicodeDecodeError:
+                return list()
+        else:
+            text = token.decode( 'utf-8', errors=self.decodeErrorPolicy )
+
+        tokenList = Tokenizer.tokenize( text, isRemoveStopWord=self.isRemoveStopWord )
+
+        return Normalizer.normalizeTokenList( tokenList, isRemovePunctuation=self.isRemovePunctuation, isCaseFolding=self.isCaseFolding )
+
+    def analyze( self, buffer : Union[bytes, memoryview] ) -> List[str]:
+        ''' This function gets terms of utf-8 text in a bytes-like buffer
+        '''
+
+        data = buffer.translate( SeparatorTranslationTable ) if isinstance( buffer, bytes ) else bytes( buffer ).translate( SeparatorTranslationTable )
+
+        unicodeTokenList = list()
+
+        if data.isascii():
+
+            #   Stop words are matched before normalization, as Tokenizer does
+            if self.isRemoveStopWord:
+                data = b' '.join( token for token in data.split() if token not in StopWordByteSet )
+
+        else:
+            asciiTokenList = list()
+            for token in data.split():
+                if not token.isascii():
+                    unicodeTokenList.append( token )
+                elif not self.isRemoveStopWord or token not in StopWordByteSet:
+                    asciiTokenList.append( token )
+
+            data = b' '.join( asciiTokenList )
+
+        #   Removing punctuation never joins tokens, and a token which is
+        #   all punctuation vanishes on split like Normalizer drops it
+        if self.isRemovePunctuation:
+            data = data.translate( None, PunctuationByteString )
+        if self.isCaseFolding:
+            data = data.lower()
+
+        tokenList = data.decode( 'ascii' ).split()
+
+        for token in unicodeTokenList:
+            tokenList.extend( self.analyzeUnicodeToken( token ) )
+
+        return tokenList
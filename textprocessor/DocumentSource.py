@@ -0,0 +1,216 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import os
+import re
+import bz2
+import gzip
+import struct
+import tarfile
+import zipfile
+from typing import Optional, BinaryIO, List, Dict, Tuple
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+TextFileNamePattern = r'(.+)\.txt'
+
+#   NOTE -  Document name of an archive member is archive file name and
+#           member path joined by member separator, e.g.
+#               gutenberg.zip!etext/moby_dick.txt
+#           A compressed single document keeps its file name, e.g.
+#               moby_dick.txt.gz
+MemberSeparator = '!'
+
+ZipExtension = '.zip'
+TarGzExtensionTuple = ( '.tar.gz', '.tgz' )
+GzExtension = '.gz'
+Bz2Extension = '.bz2'
+
+#   Bytes decompressed at a time when a size is not recorded anywhere
+DecompressChunkSize = 1 << 20
+
+#   Errors of reading a document which is gone, changed or damaged
+DocumentErrorTuple = ( OSError, EOFError, KeyError, zipfile.BadZipFile, tarfile.TarError )
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getGzUncompressedSize( gzFilePath : str ) -> int:
+    ''' This function reads uncompressed size gzip records in its trailer,
+        modulo 4 GiB which no single text file reaches
+    '''
+
+    with open( gzFilePath, 'rb' ) as gzFile:
+        gzFile.seek( -4, os.SEEK_END )
+        return struct.unpack( '<I', gzFile.read( 4 ) )[0]
+
+def getBz2UncompressedSize( bz2FilePath : str ) -> int:
+    ''' This function gets uncompressed size of a bzip2 file, which can
+        only be told by decompressing it
+    '''
+
+    byteSize = 0
+
+    with bz2.open( bz2FilePath, 'rb' ) as bz2File:
+        for chunk in iter( lambda: bz2File.read( DecompressChunkSize ), b'' ):
+            byteSize += len(chunk)
+
+    return byteSize
+
+def splitDocName( docName : str ) -> Tuple[Optional[str], str]:
+    ''' This function splits document name into archive file name and
+        member path, archive file name is None for a file of its own
+    '''
+
+    if MemberSeparator in docName:
+        archiveFileName, memberName = docName.split( MemberSeparator, 1 )
+        if archiveFileName.endswith( ( ZipExtension, ) + TarGzExtensionTuple ):
+            return archiveFileName, memberName
+
+    return None, docName
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class DocumentSource(object):
+    ''' This class lists and opens documents of a text file directory,
+        which holds loose text files, .zip and .tar.gz archives of text
+        files, and .gz or .bz2 compressed text files. Documents are read
+        through decompression straight from where they are stored, nothing
+        is extracted to disk. Opened archives are kept open per process.
+    '''
+
+    def __init__( self, textFileDir : str, textFileNamePattern : Optional[str] = TextFileNamePattern ):
+        self.textFileDir = textFileDir
+        self.textFileNameRegex = re.compile( textFileNamePattern )
+
+        #   Archive file name to opened zip or tar file
+        self.archiveDict = dict()
+
+    def isTextFileName( self, fileName : str ) -> bool:
+        ''' This function checks if base name of a file or member matches
+            text file name pattern
+        '''
+
+        return self.textFileNameRegex.match( os.path.basename( fileName ) ) is not None
+
+    def scan( self ) -> List[Tuple[str, int]]:
+        ''' This function lists documents along with their uncompressed
+            byte sizes. Sources are in sorted file name order and members
+            in archive order, so docIds are reproducible and a worker reads
+            its share of an archive front to back.
+            NOTE -  os.scandir gets file type from directory entries, so only
+                    matching files cost a stat call for their size
+        '''
+
+        docNameToByteSizeTupleList = list()
+
+        with os.scandir( self.textFileDir ) as entryIterator:
+            entryList = sorted( ( entry for entry in entryIterator if entry.is_file() ), key=lambda entry: entry.name )
+
+        for entry in entryList:
+            fileName = entry.name
+
+            if fileName.endswith( ZipExtension ):
+                with zipfile.ZipFile( entry.path ) as zipFile:
+                    docNameToByteSizeTupleList.extend( ( fileName + MemberSeparator + zipInfo.filename, zipInfo.file_size ) for zipInfo in zipFile.infolist() if not zipInfo.is_dir() and self.isTextFileName( zipInfo.filename ) )
+
+            elif fileName.endswith( TarGzExtensionTuple ):
+                with tarfile.open( entry.path, 'r:gz' ) as tarFile:
+                    docNameToByteSizeTupleList.extend( ( fileName + MemberSeparator + tarInfo.name, tarInfo.size ) for tarInfo in tarFile if tarInfo.isfile() and self.isTextFileName( tarInfo.name ) )
+
+            elif fileName.endswith( GzExtension ) and self.isTextFileName( fileName[ :-len(GzExtension) ] ):
+                docNameToByteSizeTupleList.append( ( fileName, getGzUncompressedSize( entry.path ) ) )
+
+            elif fileName.endswith( Bz2Extension ) and self.isTextFileName( fileName[ :-len(Bz2Extension) ] ):
+                docNameToByteSizeTupleList.append( ( fileName, getBz2UncompressedSize( entry.path ) ) )
+
+            elif self.isTextFileName( fileName ):
+                docNameToByteSizeTupleList.append( ( fileName, entry.stat().st_size ) )
+
+        return docNameToByteSizeTupleList
+
+    def getArchive( self, archiveFileName : str ):
+        ''' This function gets opened zip or tar file of given archive
+        '''
+
+        if archiveFileName not in self.archiveDict:
+            archiveFilePath = os.path.join( self.textFileDir, archiveFileName )
+            if archiveFileName.endswith( ZipExtension ):
+                self.archiveDict[archiveFileName] = zipfile.ZipFile( archiveFilePath )
+            else:
+                self.archiveDict[archiveFileName] = tarfile.open( archiveFilePath, 'r:gz' )
+
+        return self.archiveDict[archiveFileName]
+
+    def open( self, docName : str ) -> BinaryIO:
+        ''' This function opens a document for reading its uncompressed
+            bytes, the file object supports seek
+        '''
+
+        archiveFileName, memberName = splitDocName( docName )
+
+        if archiveFileName is not None:
+            archive = self.getArchive( archiveFileName )
+
+            if isinstance( archive, zipfile.ZipFile ):
+                return archive.open( memberName )
+
+            memberFile = archive.extractfile( memberName )
+            if memberFile is None:
+                raise ValueError( 'open() - {} is not a file.'.format( docName ) )
+            return memberFile
+
+        docFilePath = os.path.join( self.textFileDir, docName )
+
+        if docName.endswith( GzExtension ):
+            return gzip.open( docFilePath, 'rb' )
+        elif docName.endswith( Bz2Extension ):
+            return bz2.open( docFilePath, 'rb' )
+
+        return open( docFilePath, 'rb' )
+
+    def getDocByteSize( self, docName : str ) -> Optional[int]:
+        ''' This function gets current uncompressed byte size of a document
+            where it can be told without decompressing, None otherwise
+        '''
+
+        archiveFileName, memberName = splitDocName( docName )
+
+        if archiveFileName is not None:
+            archive = self.getArchive( archiveFileName )
+
+            if isinstance( archive, zipfile.ZipFile ):
+                return archive.getinfo( memberName ).file_size
+            return archive.getmember( memberName ).size
+
+        docFilePath = os.path.join( self.textFileDir, docName )
+
+        if docName.endswith( GzExtension ):
+            return getGzUncompressedSize( docFilePath )
+        elif docName.endswith( Bz2Extension ):
+            return None
+
+        return os.path.getsize( docFilePath )
+
+    def close( self ):
+        ''' This function closes opened archives
+        '''
+
+        for archive in self.archiveDict.values():
+            archive.close()
+
+        self.archiveDict = dict()
+
+    def __getstate__( self ) -> Dict:
+
+        #   Opened archives are not shared with worker processes
+        state = self.__dict__.copy()
+        state['archiveDict'] = dict()
+
+        return state
@@ -0,0 +1,151 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import zlib
+import array
+import random
+from typing import Optional, Iterable, List, Dict, Tuple
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   NOTE -  Signature is cut into bands of rows, documents sharing any
+#           band are candidates. Candidate probability at Jaccard
+#           similarity s is 1 - (1 - s^rows)^bands, about 0.95 at 0.8 and
+#           below 0.01 at 0.3 with these numbers.
+LshBandNum = 10
+LshRowNum = 6
+MinHashNum = LshBandNum*LshRowNum
+
+#   Estimated Jaccard similarity of term sets above which two documents
+#   are near duplicates
+NearDuplicateThreshold = 0.8
+
+MinHashSeed = 0x5eed
+MersennePrime = ( 1 << 61 ) - 1
+
+SignatureTypeCode = 'Q'
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def getMinHashParameterList( minHashNum : int = MinHashNum, seed : int = MinHashSeed ) -> List[Tuple[int, int]]:
+    ''' This function draws ( a, b ) of each hash ( a*x + b ) mod p, the
+        same ones in every process
+    '''
+
+    randomGenerator = random.Random( seed )
+
+    return [ ( randomGenerator.randrange( 1, MersennePrime ), randomGenerator.randrange( 0, MersennePrime ) ) for _ in range( minHashNum ) ]
+
+MinHashParameterList = getMinHashParameterList()
+
+def computeMinHashSignature( termIterable : Iterable[str], minHashParameterList : List[Tuple[int, int]] = MinHashParameterList ) -> Optional[array.array]:
+    ''' This function computes MinHash signature of a term set, or returns
+        None for an empty one
+    '''
+
+    termHashList = [ zlib.crc32( term.encode( 'utf-8' ) ) for term in termIterable ]
+
+    if len(termHashList) == 0:
+        return None
+
+    return array.array( SignatureTypeCode, [ min( ( a*termHash + b ) % MersennePrime for termHash in termHashList ) for a, b in minHashParameterList ] )
+
+def estimateJaccardSimilarity( signature : array.array, otherSignature : array.array ) -> float:
+    ''' This function estimates Jaccard similarity of two term sets as
+        fraction of equal MinHash values
+    '''
+
+    return sum( 1 for value, otherValue in zip( signature, otherSignature ) if value == otherValue )/len(signature)
+
+def findRoot( parentDict : Dict[int, int], docId : int ) -> int:
+    ''' This function finds cluster root of a docId in union find parents
+    '''
+
+    while parentDict.get( docId, docId ) != docId:
+        docId = parentDict[docId]
+
+    return docId
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class NearDuplicateDetector(object):
+    ''' This class clusters documents whose term sets are nearly the same,
+        e.g. several editions of one book. MinHash signatures are bucketed
+        by LSH bands, so only documents sharing a band are compared, and a
+        candidate pair is kept if its estimated similarity reaches the
+        threshold. Clusters are closed transitively.
+    '''
+
+    def __init__( self, threshold : Optional[float] = NearDuplicateThreshold,
+                        numBand : Optional[int] = LshBandNum,
+                        numRow : Optional[int] = LshRowNum ):
+        self.threshold = threshold
+        self.numBand = numBand
+        self.numRow = numRow
+        self.docIdToSignatureDict = dict()
+
+        #   Band index and band values to docIds
+        self.bandToDocIdListDict = dict()
+
+    def addSignature( self, docId : int, signature : array.array ):
+        ''' This function adds MinHash signature of a document
+        '''
+
+        if len(signature) != self.numBand*self.numRow:
+            raise ValueError( 'addSignature() - Signature of docId {} has {} values, expect {}.'.format( docId, len(signature), self.numBand*self.numRow ) )
+
+        self.docIdToSignatureDict[docId] = signature
+
+        for bandIndex in range( self.numBand ):
+            band = ( bandIndex, tuple( signature[ bandIndex*self.numRow:( bandIndex + 1 )*self.numRow ] ) )
+            self.bandToDocIdListDict.setdefault( band, list() ).append( docId )
+
+    def findClusterList( self ) -> List[List[int]]:
+        ''' This function finds clusters of near duplicate documents
+        '''
+
+        #   Union find over docIds of verified candidate pairs
+        parentDict = dict()
+
+        comparedPairSet = set()
+
+        for docIdList in self.bandToDocIdListDict.values():
+            for i, docId in enumerate( docIdList ):
+                for otherDocId in docIdList[ i+1: ]:
+                    if ( docId, otherDocId ) in comparedPairSet:
+                        continue
+                    comparedPairSet.add( ( docId, otherDocId ) )
+
+                    if estimateJaccardSimilarity( self.docIdToSignatureDict[docId], self.docIdToSignatureDict[otherDocId] ) >= self.threshold:
+                        root, otherRoot = findRoot( parentDict, docId ), findRoot( parentDict, otherDocId )
+                        if root != otherRoot:
+                            parentDict[ max( root, otherRoot ) ] = min( root, otherRoot )
+
+        rootToClusterDict = dict()
+        for docId in parentDict.keys():
+            rootToClusterDict.setdefault( findRoot( parentDict, docId ), set() ).update( ( docId, findRoot( parentDict, docId ) ) )
+
+        return sorted( sorted( cluster ) for cluster in rootToClusterDict.values() )
+
+    def findDuplicateDict( self, byteSizeList : List[int] ) -> Dict[int, int]:
+        ''' This function maps each near duplicate document to the canonical
+            one of its cluster, which is the largest, e.g. the most complete
+            edition, and the first one on ties
+        '''
+
+        duplicateDict = dict()
+
+        for cluster in self.findClusterList():
+            canonicalDocId = min( cluster, key=lambda docId: ( -byteSizeList[docId], docId ) )
+            for docId in cluster:
+                if docId != canonicalDocId:
+                    duplicateDict[docId] = canonicalDocId
+
+        return duplicateDict
@@ -0,0 +1,169 @@
+##########################################################################
+#   IMPORT
+##########################################################################
+
+import sys
+import time
+import queue
+import threading
+from typing import Optional, TextIO
+
+##########################################################################
+#   GLOBAL
+##########################################################################
+
+#   Number of documents or seconds a worker accumulates before reporting
+ReportBatchSize = 64
+ReportBatchInterval = 0.5
+
+#   Seconds between two progress lines rendered by the parent
+RenderInterval = 1.0
+
+BytesPerMegabyte = 1024*1024
+
+##########################################################################
+#   HELPER
+##########################################################################
+
+def formatDuration( seconds : float ) -> str:
+    ''' This function formats seconds as h:mm:ss
+    '''
+
+    seconds = int(seconds)
+
+    return '{}:{:02d}:{:02d}'.format( seconds//3600, (seconds//60)%60, seconds%60 )
+
+##########################################################################
+#   CLASS
+##########################################################################
+
+class ProgressReporter(object):
+    ''' This class is used by a worker process to report number of
+        processed documents and bytes to the parent in batches
+    '''
+
+    def __init__( self, progressQueue, processId : int,
+                        batchSize : Optional[int] = ReportBatchSize,
+                        batchInterval : Optional[float] = ReportBatchInterval ):
+        self.progressQueue = progressQueue
+        self.processId = processId
+        self.batchSize = batchSize
+        self.batchInterval = batchInterval
+        self.numDoc = 0
+        self.numByte = 0
+        self.lastReportTime = time.monotonic()
+
+    def report( self, numByte : int ):
+        ''' This function accounts one processed document and sends the
+            batch once it is full or old enough
+        '''
+
+        self.numDoc += 1
+        self.numByte += numByte
+
+        if self.numDoc >= self.batchSize or time.monotonic() - self.lastReportTime >= self.batchInterval:
+            self.flush()
+
+    def flush( self ):
+        ''' This function sends accumulated counts to the parent
+        '''
+
+        if self.numDoc == 0:
+            return
+
+        self.progressQueue.put( ( self.processId, self.numDoc, self.numByte ) )
+
+        self.numDoc = 0
+        self.numByte = 0
+        self.lastReportTime = time.monotonic()
+
+class ProgressMonitor(object):
+    ''' This class runs a thread in the parent process which aggregates
+        worker reports and renders throughput at a fixed rate
+    '''
+
+    def __init__( self, progressQueue, totalNumDoc : int,
+                        renderInterval : Optional[float] = RenderInterval,
+                        isQuiet : Optional[bool] = False,
+                        outputStream : Optional[TextIO] = None ):
+        self.progressQueue = progressQueue
+        self.totalNumDoc = totalNumDoc
+        self.renderInterval = renderInterval
+        self.isQuiet = isQuiet
+        self.outputStream = outputStream if outputStream is not None else sys.stdout
+        self.isInteractive = self.outputStream.isatty()
+        self.numDoc = 0
+        self.numByte = 0
+        self.startTime = None
+        self.stopEvent = threading.Event()
+        self.thread = threading.Thread( target=self.run, daemon=True )
+
+    def start( self ):
+        ''' This function starts monitoring thread
+        '''
+
+        self.startTime = time.monotonic()
+        self.thread.start()
+
+    def stop( self ):
+        ''' This function drains pending reports, stops monitoring thread
+            and renders final summary
+        '''
+
+        self.stopEvent.set()
+        self.thread.join()
+
+        if not self.isQuiet:
+            self.render( isFinal=True )
+
+    def drain( self, timeout : float ):
+        ''' This function aggregates reports arriving within given timeout
+        '''
+
+        deadline = time.monotonic() + timeout
+
+        while True:
+            try:
+                _, numDoc, numByte = self.progressQueue.get( timeout=max( 0, deadline - time.monotonic() ) )
+            except queue.Empty:
+                return
+
+            self.numDoc += numDoc
+            self.numByte += numByte
+
+    def run( self ):
+        ''' This function is monitoring thread loop
+        '''
+
+        while not self.stopEvent.is_set():
+            self.drain( self.renderInterval )
+
+            if not self.isQuiet and not self.stopEvent.is_set():
+                self.render()
+
+        #   Collect reports flushed right before workers exited
+        self.drain( 0 )
+
+    def render( self, isFinal : Optional[bool] = False ):
+        ''' This function writes one progress line
+        '''
+
+        deltaTime = max( time.monotonic() - self.startTime, 1e-9 )
+
+        docPerSecond = self.numDoc/deltaTime
+        megabytePerSecond = self.numByte/BytesPerMegabyte/deltaTime
+
+        if isFinal:
+            message = 'Indexed {} documents ({:.1f} MB) in {}, {:.1f} docs/s, {:.2f} MB/s'.format( self.numDoc, self.numByte/BytesPerMegabyte, formatDuration( deltaTime ), docPerSecond, megabytePerSecond )
+        else:
+            eta = formatDuration( (self.totalNumDoc - self.numDoc)/docPerSecond ) if docPerSecond > 0 else '?'
+            percent = 100*self.numDoc/self.totalNumDoc if self.totalNumDoc > 0 else 100.0
+            message = 'Indexed {}/{} documents ({:.1f}%), {:.1f} docs/s, {:.2f} MB/s, ETA {}'.format( self.numDoc, self.totalNumDoc, percent, docPerSecond, megabytePerSecond, eta )
+
+        #   Overwrite the same line on terminal, one line per render otherwise
+        if self.isInteractive:
+            self.outputStream.write( '\r\033[K' + message + ( '\n' if isFinal else '' ) )
+        else:
+            self.outputStream.write( message + '\n' )
+
+        self.outputStream.flush()
@@ -5,28 +5,105 @@
 
 import os
 import re
+import gzip
+import array
 import pickle
-from typing import Optional
+import hashlib
+from collections import Counter
+from typing import Optional, Iterator, List, Dict, Tuple
 import multiprocessing
 import time
 
 from .Tokenizer import Tokenizer, TokenizerOption
 from .Normalizer import Normalizer, NormalizerOption
+from .Progress import ProgressReporter, ProgressMonitor
+from .DocumentSource import DocumentSource, TextFileNamePattern
+from .BytesAnalyzer import BytesAnalyzer, DecodeErrorPolicy
+from .NearDuplicateDetector import NearDuplicateDetector, computeMinHashSignature, SignatureTypeCode, MinHashNum, NearDuplicateThreshold
+from indexer.PostingFile import formatPostingLine, writeDocIdList
+from indexer.DocIdStore import DocIdStore
+from indexer.ForwardIndex import ForwardIndex, splitPassageOffsetList, encodeTermPassage, OffsetTypeCode, TermTypeCode
+from indexer.IndexManifest import computeDictChecksum, TemporaryFileSuffix
+from indexer.IndexJournal import IndexJournal
+from metrics.Metrics import metrics
 
 ##########################################################################
 #   GLOBAL
 ##########################################################################
 
-TextFileNamePattern = '(.+)\.txt'
+#   NOTE -  Each worker spills its postings as runs sorted by term, named
+#           by worker id and run id, which are merged in one pass later
+IntermediateIndexFileNameFormat = 'intermediate_index_{id}_{runId}.txt.gz'
+ForwardPartFileNameFormat = 'forward_part_{id}.pickle'
+SignaturePartFileNameFormat = 'signature_part_{id}.bin'
 
-IntermediateIndexFileNameFormat = 'intermediate_index_{id}.txt'
+#   Part files a worker appends to at every spill, and journal entry keys
+#   of their sizes
+WorkerPartList = [ ( ForwardPartFileNameFormat, 'forwardPartSize' ), ( SignaturePartFileNameFormat, 'signaturePartSize' ) ]
+
+#   NOTE -  Each worker journals its spills, so an interrupted build can
+#           resume after the last document whose postings reached disk
+IntermediateJournalFileNameFormat = 'intermediate_journal_{id}.jsonl'
 
 NumProcess = 8
 
+#   Bytes of postings and forward records a worker holds before spilling
+WorkerMemoryBudget = 128 << 20
+
+#   Rough in-memory cost of a new term and of a posting in worker dicts
+TermEntryByteSize = 256
+PostingEntryByteSize = 72
+
+#   Runs are read back once, favour speed over ratio
+RunCompressLevel = 1
+
 ##########################################################################
 #   HELPER
 ##########################################################################
 
+def writeIntermediateRun( intermediateRunFilePath : str, termToDocIdToTermFrequencyDict : Dict ):
+    ''' This function writes postings as gzip compressed posting file
+        sorted by term
+    '''
+
+    #   Write under temporary name, a run is either complete or absent
+    temporaryFilePath = intermediateRunFilePath + TemporaryFileSuffix
+
+    with open( temporaryFilePath, 'wb' ) as temporaryFile:
+        with gzip.open( temporaryFile, 'wt', encoding='utf-8', compresslevel=RunCompressLevel ) as intermediateRunFile:
+            for term in sorted( termToDocIdToTermFrequencyDict.keys() ):
+                intermediateRunFile.write( formatPostingLine( term, termToDocIdToTermFrequencyDict[term] ) )
+        temporaryFile.flush()
+        os.fsync( temporaryFile.fileno() )
+
+    os.replace( temporaryFilePath, intermediateRunFilePath )
+
+def iterForwardPart( forwardPartFilePath : str ) -> Iterator[Tuple]:
+    ''' This function reads forward records a worker has spilled, in docId
+        order
+    '''
+
+    with open( forwardPartFilePath, 'rb' ) as forwardPartFile:
+        while True:
+            try:
+                yield pickle.load( forwardPartFile )
+            except EOFError:
+                return
+
+def iterSignaturePart( signaturePartFilePath : str, minHashNum : int = MinHashNum ) -> Iterator[Tuple[int, array.array]]:
+    ''' This function reads (docId, MinHash signature) records a worker has
+        spilled, each is docId followed by signature as 64 bit integers
+    '''
+
+    recordArray = array.array( SignatureTypeCode )
+
+    with open( signaturePartFilePath, 'rb' ) as signaturePartFile:
+        recordArray.frombytes( signaturePartFile.read() )
+
+    recordSize = minHashNum + 1
+    for recordBegin in range( 0, len(recordArray), recordSize ):
+        yield recordArray[recordBegin], recordArray[ recordBegin+1:recordBegin+recordSize ]
+
 def chunkify( l, n ):
     return [ [ l[i] for i in range(j*(len(l)//n),(j+1)*(len(l)//n)) ] for j in range(n-1) ] + [ l[ (n-1)*(len(l)//n): ] ]
 
@@ -39,7 +116,9 @@ class TextProcessor(object):
     def __init__( self, textFileDir : str,
                         textFileNamePattern : Optional[str] = TextFileNamePattern,
                         tokenizerOption : Optional[int] = TokenizerOption.NONE,
-                        normalizerOption : Optional[int] = NormalizerOption.NONE ):
+                        normalizerOption : Optional[int] = NormalizerOption.NONE,
+                        isBytesAnalyzer : Optional[bool] = False,
+                        decodeErrorPolicy : Optional[str] = DecodeErrorPolicy.REPLACE ):
 
         if not os.path.exists( textFileDir ):
             raise ValueError( 'TextProcessor - Input text file directory does not exist at {}.'.format( textFileDir ) )
@@ -48,27 +127,50 @@ class TextProcessor(object):
         
         self.textFileDir = textFileDir
         self.textFileNamePattern = textFileNamePattern
+        self.documentSource = DocumentSource( textFileDir, textFileNamePattern )
         self.tokenizerOption = tokenizerOption
         self.normalizerOption = normalizerOption
+        self.forwardPartFilePathList = None
+        self.signaturePartFilePathList = None
+
+        #   Scan order docId of each reordered docId, None if not reordered
+        self.docIdOrder = None
+
+        #   Analyze text without decoding it, yields the same terms
+        self.bytesAnalyzer = BytesAnalyzer( tokenizerOption, normalizerOption, decodeErrorPolicy ) if isBytesAnalyzer else None
 
         #   Read text file
         self.readTextFileFromTextFileDir()
 
     def readTextFileFromTextFileDir( self ):
         ''' This function reads all text file from given text file directory.
+            Text files inside archives and compressed text files are listed
+            by their member paths, see DocumentSource.
         '''
 
         assert( self.textFileDir != None )
         assert( self.textFileNamePattern != None )
 
-        #   List all text file from text file directory
-        allTextFileNameList = os.listdir( self.textFileDir )
-
-        #   Validate text file name with text file name pattern
-        validTextFileNameList = [ fileName for fileName in allTextFileNameList if re.match( self.textFileNamePattern, fileName ) ]
+        #   List text files matching text file name pattern
+        textFileNameToByteSizeTupleList = self.documentSource.scan()
 
         #   Construct docId to text file name tuple list
-        self.docIdToTextFileNameTupleList = list(enumerate(validTextFileNameList))
+        self.docIdToTextFileNameTupleList = list(enumerate( textFileName for textFileName, _ in textFileNameToByteSizeTupleList ))
+        self.textFileByteSizeList = [ byteSize for _, byteSize in textFileNameToByteSizeTupleList ]
+
+    def getFileListHash( self ) -> str:
+        ''' This function hashes indexed text file names and byte sizes, so
+            a stale index can be told from the corpus it was built from
+        '''
+
+        assert( self.docIdToTextFileNameTupleList != None )
+
+        fileListHash = hashlib.sha256()
+
+        for ( _, textFileName ), byteSize in zip( self.docIdToTextFileNameTupleList, self.textFileByteSizeList ):
+            fileListHash.update( '{}\t{}\n'.format( textFileName, byteSize ).encode( 'utf-8' ) )
+
+        return fileListHash.hexdigest()
 
     def writeDocIdIndex( self, docIdIndexDir : str, docIdIndexFileName : str, isUsePickle : Optional[bool] = True ):
         ''' This function writes docId to text file name mapping dictionary
@@ -89,32 +191,171 @@ class TextProcessor(object):
 
             #   Write index file
             with open( docIdIndexFilePath, 'w', encoding='utf-8' ) as docIdIndexFile:
-                docIdIndexFile.write( repr(self.docIdToTextFileNameTupleList) )
+                writeDocIdList( docIdIndexFile, self.docIdToTextFileNameTupleList )
+
+    def writeDocIdStore( self, docIdStoreDir : str, docIdStoreFileName : str ):
+        ''' This function writes docId to text file name mapping along with
+            text file byte sizes as memory-mappable docId store
+        '''
+
+        assert( self.docIdToTextFileNameTupleList != None )
+
+        DocIdStore.write( os.path.join( docIdStoreDir, docIdStoreFileName ), self.docIdToTextFileNameTupleList, self.textFileByteSizeList )
+
+    def writeForwardIndex( self, forwardIndexDir : str, forwardIndexFileName : str ):
+        ''' This function writes passage offsets and term passages spilled
+            by writeIntermediateIndex() as memory-mappable forward index
+        '''
+
+        if self.forwardPartFilePathList is None:
+            raise ValueError( 'writeForwardIndex() - Intermediate index has been written without forward index.' )
+
+        #   Worker chunks are consecutive docId ranges in worker order
+        forwardRecordIterator = ( forwardRecord for forwardPartFilePath in self.forwardPartFilePathList for forwardRecord in iterForwardPart( forwardPartFilePath ) )
+
+        if self.docIdOrder is not None:
+
+            #   Records are spilled in scan order, gather them to write in
+            #   reordered docId order
+            docIdToForwardRecordDict = { forwardRecord[0]: forwardRecord[1:] for forwardRecord in forwardRecordIterator }
+            forwardRecordIterator = ( ( newDocId, ) + docIdToForwardRecordDict.pop( docId ) for newDocId, docId in enumerate( self.docIdOrder ) )
+
+        ForwardIndex.write( os.path.join( forwardIndexDir, forwardIndexFileName ), forwardRecordIterator )
+
+    def reorderDocId( self, docIdOrder : List[int] ):
+        ''' This function reassigns docIds of text files in given order,
+            the i-th docId of which becomes docId i. DocIds of intermediate
+            index parts stay in scan order.
+        '''
+
+        assert( self.docIdToTextFileNameTupleList != None )
+
+        if sorted( docIdOrder ) != list( range( len(self.docIdToTextFileNameTupleList) ) ):
+            raise ValueError( 'reorderDocId() - DocId order is not a permutation of {} docIds.'.format( len(self.docIdToTextFileNameTupleList) ) )
+
+        self.docIdToTextFileNameTupleList = [ ( newDocId, self.docIdToTextFileNameTupleList[docId][1] ) for newDocId, docId in enumerate( docIdOrder ) ]
+        self.textFileByteSizeList = [ self.textFileByteSizeList[docId] for docId in docIdOrder ]
+        self.docIdOrder = list( docIdOrder )
+
+    def findNearDuplicateDict( self, threshold : Optional[float] = NearDuplicateThreshold ) -> Dict[int, int]:
+        ''' This function clusters documents by MinHash signatures spilled
+            by writeIntermediateIndex() and maps each near duplicate docId to
+            the canonical docId of its cluster
+        '''
+
+        if self.signaturePartFilePathList is None:
+            raise ValueError( 'findNearDuplicateDict() - Intermediate index has been written without MinHash signatures.' )
+
+        if metrics.isEnabled:
+            startTime = time.perf_counter()
+
+        nearDuplicateDetector = NearDuplicateDetector( threshold=threshold )
+
+        for signaturePartFilePath in self.signaturePartFilePathList:
+            for docId, signature in iterSignaturePart( signaturePartFilePath ):
+                nearDuplicateDetector.addSignature( docId, signature )
+
+        duplicateDict = nearDuplicateDetector.findDuplicateDict( self.textFileByteSizeList )
+
+        if metrics.isEnabled:
+            metrics.addTimeSince( 'dedup', startTime )
+            metrics.incrementCounter( 'near_duplicates', len(duplicateDict) )
+
+        return duplicateDict
+
+    def tokenizeBytes( self, data : bytes, startTime : Optional[float] = None ) -> List[str]:
+        ''' This function tokenizes and normalizes utf-8 text, with bytes
+            analyzer if this text processor has one. If perf_counter start
+            time is given, time of each stage since then goes to metrics.
+        '''
+
+        if self.bytesAnalyzer is not None:
+
+            #   Do tokenize and normalize in one pass over bytes
+            tokenList = self.bytesAnalyzer.analyze( data )
+
+            if startTime is not None:
+                metrics.addTimeSince( 'analyze', startTime )
+
+            return tokenList
+
+        return self.tokenizeText( data.decode( 'utf-8' ), startTime=startTime )
+
+    def tokenizeText( self, text : str, startTime : Optional[float] = None ) -> List[str]:
+        ''' This function tokenizes and normalizes text with options of this
+            text processor. If perf_counter start time is given, time of
+            each stage since then goes to metrics.
+        '''
+
+        #   Do tokenize
+        tokenList = Tokenizer.tokenize( text, isRemoveStopWord=self.tokenizerOption & TokenizerOption.REMOVE_STOP_WORDS )
+
+        if startTime is not None:
+            startTime = metrics.addTimeSince( 'tokenize', startTime )
+
+        #   Do normalize
+        tokenList = Normalizer.normalizeTokenList( tokenList, isRemovePunctuation=self.normalizerOption & NormalizerOption.REMOVE_PUNCTUATION,
+                                                                isCaseFolding=self.normalizerOption & NormalizerOption.CASE_FOLDING )
+
+        if startTime is not None:
+            metrics.addTimeSince( 'normalize', startTime )
+
+        return tokenList
 
     def writeIntermediateIndex( self, intermediateIndexDir : str,
                                         intermediateIndexFileNameFormat : Optional[str] = IntermediateIndexFileNameFormat,
-                                        numProcess : Optional[int] = NumProcess ):
+                                        numProcess : Optional[int] = NumProcess,
+                                        isQuiet : Optional[bool] = False,
+                                        isForwardIndex : Optional[bool] = False,
+                                        memoryBudget : Optional[int] = WorkerMemoryBudget,
+                                        isResume : Optional[bool] = False,
+                                        isMinHash : Optional[bool] = False ):
         ''' This function writes intermediate indices to index file directory
             with specified name format by splitting current text file name list into
-            chunks and multiprocessing them
+            chunks and multiprocessing them. Each worker spills a sorted run
+            whenever it holds memory budget bytes, so indexing memory stays
+            around number of processes times budget. Progress is reported by
+            workers in batches and rendered here unless quiet flag is set.
+            Passages of the forward index are collected in the same pass if
+            requested, and so are MinHash signatures of document term sets
+            for near duplicate detection.
+            If resume flag is set, runs journaled by an interrupted build
+            of the same corpus and options are kept and each worker goes on
+            after the last document they cover.
         '''
 
         #   Check if intermediate index file directory exists
         if not os.path.exists(intermediateIndexDir):
             raise ValueError('writeIntermediateIndex() - No directory at {}.'.format(intermediateIndexDir))
-        
-        #   Inititalize multiprocessing objects
-        manager = multiprocessing.Manager()
-        outputQueue = manager.Queue()
 
         #   Split text file name list into small chunks by number of processes
         docIdToTextFileNameTupleListChunk = chunkify( self.docIdToTextFileNameTupleList, numProcess )
 
+        #   Find where each worker stopped and remove anything not journaled
+        buildKey = self.getIntermediateBuildKey( intermediateIndexFileNameFormat, numProcess, isForwardIndex, isMinHash )
+        resumeEntryList = self.prepareIntermediateIndexDir( intermediateIndexDir, intermediateIndexFileNameFormat, buildKey, len(docIdToTextFileNameTupleListChunk), isForwardIndex, isMinHash, isResume )
+
+        numRemainingDoc = sum( len(docIdToTextFileNameTupleList) if resumeEntry is None else sum( 1 for docId, _ in docIdToTextFileNameTupleList if docId > resumeEntry['lastDocId'] )
+                                    for docIdToTextFileNameTupleList, resumeEntry in zip( docIdToTextFileNameTupleListChunk, resumeEntryList ) )
+
+        if isResume and not isQuiet:
+            print('writeIntermediateIndex() - Resume with {} of {} documents left.'.format(numRemainingDoc, len(self.docIdToTextFileNameTupleList)))
+
+        #   Inititalize multiprocessing objects
+        manager = multiprocessing.Manager()
+        outputQueue = manager.Queue()
+        progressQueue = multiprocessing.Queue()
+
         #   Begin timer
         startTime = time.time()
 
+        #   Start rendering progress aggregated from all workers
+        progressMonitor = ProgressMonitor( progressQueue, numRemainingDoc, isQuiet=isQuiet )
+        progressMonitor.start()
+
         #   Construct processes to construct intermediate index
-        processList = [ multiprocessing.Process( target=self.constructIntermediateIndex, args=( docIdToTextFileNameTupleList, outputQueue, i ) ) for i, docIdToTextFileNameTupleList in enumerate(docIdToTextFileNameTupleListChunk) ]
+        processList = [ multiprocessing.Process( target=self.constructIntermediateIndex, args=( docIdToTextFileNameTupleList, intermediateIndexDir, outputQueue, i, progressQueue,
+                                                                                                intermediateIndexFileNameFormat, memoryBudget, isForwardIndex, buildKey, resumeEntryList[i], isMinHash ) ) for i, docIdToTextFileNameTupleList in enumerate(docIdToTextFileNameTupleListChunk) ]
 
         #   Start process
         for process in processList:
@@ -124,21 +365,115 @@ class TextProcessor(object):
         for process in processList:
             process.join()
 
-        #   Get result from output queue
-        resultList = [ outputQueue.get() for process in processList ]
+        #   Stop rendering progress
+        progressMonitor.stop()
+
+        #   Get number of spilled runs and worker metrics snapshot from output queue
+        numRun = 0
+        for process in processList:
+            workerNumRun, metricsSnapshot = outputQueue.get()
+            numRun += workerNumRun
+
+            #   Merge worker metrics
+            if metricsSnapshot is not None:
+                metrics.mergeSnapshot( metricsSnapshot )
+
+        self.forwardPartFilePathList = [ os.path.join( intermediateIndexDir, ForwardPartFileNameFormat.format( id=i ) ) for i in range( len(processList) ) ] if isForwardIndex else None
+        self.signaturePartFilePathList = [ os.path.join( intermediateIndexDir, SignaturePartFileNameFormat.format( id=i ) ) for i in range( len(processList) ) ] if isMinHash else None
 
         #   Stop timer
         deltaTime = time.time() - startTime
 
         #   Log timer message
-        print('writeIntermediateIndex() - Index time = {} seconds.'.format(deltaTime))
+        if not isQuiet:
+            print('writeIntermediateIndex() - Index time = {} seconds, {} runs.'.format(deltaTime, numRun))
+
+        if metrics.isEnabled:
+            metrics.incrementCounter( 'runs_spilled', numRun )
+            metrics.recordMemory( 'intermediate_index' )
 
-        #   Write result into intermediate index file at given directory
-        for i, result in enumerate(resultList):
-            with open( os.path.join( intermediateIndexDir, intermediateIndexFileNameFormat.format(**{'id':i}) ), 'w', encoding='utf-8' ) as indexFile:
-                indexFile.write( repr(result) )
+    def getIntermediateBuildKey( self, intermediateIndexFileNameFormat : str, numProcess : int, isForwardIndex : bool, isMinHash : bool ) -> str:
+        ''' This function computes key of everything worker chunks and their
+            runs depend on, journaled runs are only reused under the same key
+        '''
+
+        return computeDictChecksum( { 'fileListHash': self.getFileListHash(),
+                                        'tokenizerOption': int(self.tokenizerOption),
+                                        'normalizerOption': int(self.normalizerOption),
+                                        'intermediateIndexFileNameFormat': intermediateIndexFileNameFormat,
+                                        'numProcess': numProcess,
+                                        'isForwardIndex': isForwardIndex,
+                                        'isMinHash': isMinHash } )
+
+    def prepareIntermediateIndexDir( self, intermediateIndexDir : str, intermediateIndexFileNameFormat : str, buildKey : str,
+                                            numWorker : int, isForwardIndex : bool, isMinHash : bool, isResume : bool ) -> List[Optional[Dict]]:
+        ''' This function gets last journal entry of each worker if resuming,
+            then removes runs, part files and journals it does not cover,
+            they would be merged otherwise. Returns last journal entry of
+            each worker, None where the worker starts afresh.
+        '''
 
-    def constructIntermediateIndex( self, docIdToTextFileNameTupleList, outputQueue, processId=0 ):
+        isPartEnabledDict = { ForwardPartFileNameFormat: isForwardIndex, SignaturePartFileNameFormat: isMinHash }
+        resumeEntryList = [ None ]*numWorker
+
+        if isResume:
+            for i in range( numWorker ):
+                journalEntryList = IndexJournal( os.path.join( intermediateIndexDir, IntermediateJournalFileNameFormat.format( id=i ) ), buildKey ).read()
+                if len(journalEntryList) > 0:
+                    resumeEntryList[i] = journalEntryList[-1]
+
+                #   Part records journaled as written must be there
+                for partFileNameFormat, partSizeKey in WorkerPartList:
+                    partFilePath = os.path.join( intermediateIndexDir, partFileNameFormat.format( id=i ) )
+                    if resumeEntryList[i] is not None and isPartEnabledDict[partFileNameFormat] and ( not os.path.exists( partFilePath ) or os.path.getsize( partFilePath ) < resumeEntryList[i][partSizeKey] ):
+                        resumeEntryList[i] = None
+
+        runFileNamePattern = '^{}$'.format( intermediateIndexFileNameFormat.format( id='([0-9]+)', runId='([0-9]+)' ) )
+        workerFileNameFormatList = [ partFileNameFormat for partFileNameFormat, _ in WorkerPartList ] + [ IntermediateJournalFileNameFormat ]
+
+        for fileName in os.listdir( intermediateIndexDir ):
+
+            filePath = os.path.join( intermediateIndexDir, fileName )
+
+            #   Run of a spill that did not complete
+            if fileName.endswith( TemporaryFileSuffix ) and re.match( runFileNamePattern[:-1], fileName ):
+                os.remove( filePath )
+                continue
+
+            runMatched = re.match( runFileNamePattern, fileName )
+
+            if runMatched:
+                workerId, runId = int(runMatched.group(1)), int(runMatched.group(2))
+                resumeEntry = resumeEntryList[workerId] if workerId < numWorker else None
+                if resumeEntry is None or runId >= resumeEntry['numRun']:
+                    os.remove( filePath )
+                continue
+
+            for workerFileNameFormat in workerFileNameFormatList:
+                workerMatched = re.match( '^{}$'.format( workerFileNameFormat.format( id='([0-9]+)' ) ), fileName )
+                if not workerMatched:
+                    continue
+
+                workerId = int(workerMatched.group(1))
+                resumeEntry = resumeEntryList[workerId] if workerId < numWorker else None
+                if resumeEntry is None:
+                    os.remove( filePath )
+                else:
+
+                    #   Drop part records appended after last journal entry
+                    for partFileNameFormat, partSizeKey in WorkerPartList:
+                        if workerFileNameFormat == partFileNameFormat:
+                            os.truncate( filePath, resumeEntry.get( partSizeKey, 0 ) )
+
+        return resumeEntryList
+
+    def constructIntermediateIndex( self, docIdToTextFileNameTupleList, intermediateIndexDir, outputQueue, processId=0, progressQueue=None,
+                                            intermediateIndexFileNameFormat=IntermediateIndexFileNameFormat,
+                                            memoryBudget=WorkerMemoryBudget,
+                                            isForwardIndex=False,
+                                            buildKey=None,
+                                            resumeEntry=None,
+                                            isMinHash=False ):
         ''' This function constructs an intermediated index which represents
             a term to document id to term frequency mapping dictionary.
             The index should be in this following format:
@@ -155,42 +490,212 @@ class TextProcessor(object):
                             },
                     ...
                 }
+            Once its approximate size reaches memory budget, it is written
+            to intermediate index directory as a run sorted by term and
+            construction goes on with an empty one.
+            If forward index flag is set, text is tokenized passage by
+            passage instead, which yields the same tokens, and a (docId,
+            passage offset list, term hash list, term passage list) record
+            is collected for each document and spilled along with runs.
+            If MinHash flag is set, a (docId, MinHash signature) record of
+            each document term set is spilled likewise.
+            Every spill is journaled with the last docId it covers. Given
+            the last journal entry of an interrupted build, construction
+            goes on after that docId.
         '''
 
         #   Initialize term to document id to term frequency mapping dictionary
         #   NOTE - document id is indexed by validated text file name list
         termToDocIdToTermFrequencyDict = dict()
+        forwardRecordList = list()
+        signatureRecordList = list()
+        memoryByteSize = 0
+        numRun = 0
+        lastDocId = -1
+        isComplete = False
 
-        #   Get number of text file name list
-        numTextFile = len(docIdToTextFileNameTupleList)
+        #   Construct batched progress reporter
+        progressReporter = ProgressReporter( progressQueue, processId ) if progressQueue is not None else None
+
+        journal = IndexJournal( os.path.join( intermediateIndexDir, IntermediateJournalFileNameFormat.format( id=processId ) ), buildKey )
+        journal.open( isResume=resumeEntry is not None )
+
+        if resumeEntry is not None:
+
+            #   Skip documents whose postings are already spilled
+            numRun, lastDocId, isComplete = resumeEntry['numRun'], resumeEntry['lastDocId'], resumeEntry['isComplete']
+            docIdToTextFileNameTupleList = [ ( docId, textFileName ) for docId, textFileName in docIdToTextFileNameTupleList if docId > lastDocId ]
+
+        else:
+
+            #   Start part files afresh, spilled records are appended to them
+            for partFileNameFormat, isPartEnabled in ( ( ForwardPartFileNameFormat, isForwardIndex ), ( SignaturePartFileNameFormat, isMinHash ) ):
+                if isPartEnabled:
+                    open( os.path.join( intermediateIndexDir, partFileNameFormat.format( id=processId ) ), 'wb' ).close()
+
+        #   NOTE - Forked worker inherits parent metrics, start from scratch
+        isMetricsEnabled = metrics.isEnabled
+        if isMetricsEnabled:
+            metrics.reset()
 
         #   For each docId and textFileName
-        for docNum, (docId, textFileName) in enumerate( docIdToTextFileNameTupleList ):
+        for docId, textFileName in docIdToTextFileNameTupleList:
+
+            if isMetricsEnabled:
+                startTime = time.perf_counter()
+
+            if isForwardIndex:
+
+                #   Read raw bytes, passages are located by byte offset
+                with self.documentSource.open( textFileName ) as textFile:
+                    data = textFile.read()
+
+                textFileSize = len(data)
+
+                if isMetricsEnabled:
+                    startTime = metrics.addTimeSince( 'read', startTime )
+
+                #   Tokenize passage by passage and keep terms of each one
+                passageOffsetList = splitPassageOffsetList( data )
+                tokenList = list()
+                passageTermSetList = list()
+
+                for passageBegin, passageEnd in zip( passageOffsetList, passageOffsetList[1:] ):
+                    passageTokenList = self.tokenizeBytes( data[ passageBegin:passageEnd ] )
+                    tokenList.extend( passageTokenList )
+                    passageTermSetList.append( set(passageTokenList) )
 
-            print('[CPU #{}] Now processing {}. ({}/{})'.format(processId, textFileName, docNum+1, numTextFile))
+                termHashList, termPassageList = encodeTermPassage( passageTermSetList )
+                forwardRecord = ( docId, array.array( OffsetTypeCode, passageOffsetList ), array.array( TermTypeCode, termHashList ), array.array( TermTypeCode, termPassageList ) )
+                forwardRecordList.append( forwardRecord )
+                memoryByteSize += sum( len(forwardArray)*forwardArray.itemsize for forwardArray in forwardRecord[1:] )
 
-            #   Open text file from text file directory
-            with open( os.path.join( self.textFileDir, textFileName ), encoding='utf-8' ) as textFile:
-                
-                #   Read text from file
-                text = textFile.read()
+                if isMetricsEnabled:
+                    startTime = metrics.addTimeSince( 'passage', startTime )
 
-            #   Do tokenize
-            tokenList = Tokenizer.tokenize( text, isRemoveStopWord=self.tokenizerOption & TokenizerOption.REMOVE_STOP_WORDS )
-                
-            #   Do normalize
-            tokenList = Normalizer.normalizeTokenList( tokenList, isRemovePunctuation=self.normalizerOption & NormalizerOption.REMOVE_PUNCTUATION,
-                                                                        isCaseFolding=self.normalizerOption & NormalizerOption.CASE_FOLDING )
+            else:
+
+                #   Open text file from text file directory or archive
+                with self.documentSource.open( textFileName ) as textFile:
+
+                    #   Read text from file
+                    data = textFile.read()
+
+                #   Get text file size in bytes
+                textFileSize = len(data)
+
+                if isMetricsEnabled:
+                    startTime = metrics.addTimeSince( 'read', startTime )
+
+                #   Do tokenize and normalize, timing each stage
+                tokenList = self.tokenizeBytes( data, startTime=startTime if isMetricsEnabled else None )
+
+                if isMetricsEnabled:
+                    startTime = time.perf_counter()
+
+            termFrequencyCounter = Counter( tokenList )
+
+            #   Count each term once per document
+            for token, termFrequency in termFrequencyCounter.items():
 
-            for token in tokenList:
-                
                 #   Initialize document id to term frequency dictionary
                 if token not in termToDocIdToTermFrequencyDict:
                     termToDocIdToTermFrequencyDict[token] = dict()
+                    memoryByteSize += TermEntryByteSize
 
                 #   Assign offset document id and term frequency
-                termToDocIdToTermFrequencyDict[token][docId] = tokenList.count(token)
+                termToDocIdToTermFrequencyDict[token][docId] = termFrequency
+                memoryByteSize += PostingEntryByteSize
+
+            if isMinHash:
+
+                #   Sketch term set, an empty document has nothing to match
+                signature = computeMinHashSignature( termFrequencyCounter.keys() )
+                if signature is not None:
+                    signatureRecordList.append( ( docId, signature ) )
+                    memoryByteSize += ( len(signature) + 1 )*signature.itemsize
+
+            if isMetricsEnabled:
+                startTime = metrics.addTimeSince( 'count', startTime )
+                metrics.incrementCounter( 'docs_indexed' )
+                metrics.incrementCounter( 'bytes_indexed', textFileSize )
+                metrics.incrementCounter( 'tokens_indexed', len(tokenList) )
+
+            #   Spill run and forward records once memory budget is reached
+            if memoryByteSize >= memoryBudget:
+
+                if isMetricsEnabled:
+                    metrics.recordMemory( 'index_worker' )
+
+                numRun = self.spillIntermediateRun( termToDocIdToTermFrequencyDict, forwardRecordList, signatureRecordList, intermediateIndexDir, intermediateIndexFileNameFormat, processId, numRun, isForwardIndex, isMinHash, journal, docId )
+                termToDocIdToTermFrequencyDict = dict()
+                forwardRecordList = list()
+                signatureRecordList = list()
+                memoryByteSize = 0
+
+                if isMetricsEnabled:
+                    metrics.addTimeSince( 'serialize', startTime )
+
+            if progressReporter is not None:
+                progressReporter.report( textFileSize )
+
+        #   Report remaining progress batch
+        if progressReporter is not None:
+            progressReporter.flush()
+
+        if isMetricsEnabled:
+            metrics.recordMemory( 'index_worker' )
+            startTime = time.perf_counter()
+
+        #   Spill what is left, unless an earlier build has finished this chunk
+        if not isComplete:
+            if len(docIdToTextFileNameTupleList) > 0:
+                lastDocId = docIdToTextFileNameTupleList[-1][0]
+            numRun = self.spillIntermediateRun( termToDocIdToTermFrequencyDict, forwardRecordList, signatureRecordList, intermediateIndexDir, intermediateIndexFileNameFormat, processId, numRun, isForwardIndex, isMinHash, journal, lastDocId, isComplete=True )
+
+        journal.close()
+        self.documentSource.close()
+
+        if isMetricsEnabled:
+            metrics.addTimeSince( 'serialize', startTime )
+
+        outputQueue.put( ( numRun, metrics.getSnapshot() if isMetricsEnabled else None ) )
+
+    def spillIntermediateRun( self, termToDocIdToTermFrequencyDict : Dict, forwardRecordList : List[Tuple], signatureRecordList : List[Tuple], intermediateIndexDir : str, intermediateIndexFileNameFormat : str,
+                                    processId : int, numRun : int, isForwardIndex : bool, isMinHash : bool,
+                                    journal : IndexJournal, lastDocId : int, isComplete : Optional[bool] = False ) -> int:
+        ''' This function writes postings held by a worker as its next run
+            and appends its forward and signature records to its part files,
+            then journals them as covering documents up to last docId.
+            Returns number of runs written so far.
+        '''
+
+        if len(termToDocIdToTermFrequencyDict) > 0:
+            writeIntermediateRun( os.path.join( intermediateIndexDir, intermediateIndexFileNameFormat.format( id=processId, runId=numRun ) ), termToDocIdToTermFrequencyDict )
+            numRun += 1
+
+        forwardPartSize = 0
+
+        if isForwardIndex:
+            with open( os.path.join( intermediateIndexDir, ForwardPartFileNameFormat.format( id=processId ) ), 'ab' ) as forwardPartFile:
+                for forwardRecord in forwardRecordList:
+                    pickle.dump( forwardRecord, forwardPartFile, protocol=pickle.HIGHEST_PROTOCOL )
+                forwardPartFile.flush()
+                os.fsync( forwardPartFile.fileno() )
+                forwardPartSize = forwardPartFile.tell()
+
+        signaturePartSize = 0
+
+        if isMinHash:
+            with open( os.path.join( intermediateIndexDir, SignaturePartFileNameFormat.format( id=processId ) ), 'ab' ) as signaturePartFile:
+                for docId, signature in signatureRecordList:
+                    signaturePartFile.write( array.array( SignatureTypeCode, [ docId ] ).tobytes() )
+                    signaturePartFile.write( signature.tobytes() )
+                signaturePartFile.flush()
+                os.fsync( signaturePartFile.fileno() )
+                signaturePartSize = signaturePartFile.tell()
 
-            print('[CPU #{}] Done processing {}. ({}/{})'.format(processId, textFileName, docNum+1, numTextFile))
+        #   Spilled work counts as done only once journaled
+        journal.append( { 'numRun': numRun, 'lastDocId': lastDocId, 'forwardPartSize': forwardPartSize, 'signaturePartSize': signaturePartSize, 'isComplete': isComplete } )
 
-        outputQueue.put( termToDocIdToTermFrequencyDict )
\ No newline at end of file
+        return numRun
\ No newline at end of file